@@ -2,7 +2,6 @@
 Django Admin configuration for BoostyFi models.
 """
 from django.contrib import admin
-from django.db.models import Sum, Count, F
 from django.utils.html import format_html
 from mptt.admin import MPTTModelAdmin
 
@@ -85,27 +84,16 @@ class BoostyFiUserAdmin(MPTTModelAdmin):
         return obj.short_wallet
     short_wallet_display.short_description = 'Wallet'
     
-    def children_count(self, obj):
-        return obj.get_children().count()
-    children_count.short_description = 'Children'
-    
-    def purchases_count(self, obj):
-        return obj.purchases.filter(payment_status='COMPLETED').count()
-    purchases_count.short_description = 'Purchases'
-    
+    # Counters are stored columns refreshed after every import
     def total_volume(self, obj):
-        result = obj.purchases.filter(
-            payment_status='COMPLETED'
-        ).aggregate(total=Sum('amount'))
-        return f"${result['total'] or 0:.2f}"
+        return f"${obj.direct_volume:.2f}"
     total_volume.short_description = 'Volume'
+    total_volume.admin_order_field = 'direct_volume'
     
     def total_earnings(self, obj):
-        result = obj.earnings.filter(
-            status='WITHDRAWN'
-        ).aggregate(total=Sum('amount'))
-        return f"${result['total'] or 0:.2f}"
+        return f"${obj.total_earnings:.2f}"
     total_earnings.short_description = 'Earnings'
+    total_earnings.admin_order_field = 'total_earnings'
     
     def total_atla_display(self, obj):
         return f"{obj.total_atla:.2f}"
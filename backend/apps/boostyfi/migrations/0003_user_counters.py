@@ -0,0 +1,60 @@
+# Generated by Django 5.0.9 on 2026-10-16 20:06
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    BoostyFiUser = apps.get_model('boostyfi', 'BoostyFiUser')
+    BoostyFiPurchase = apps.get_model('boostyfi', 'BoostyFiPurchase')
+    BoostyFiEarning = apps.get_model('boostyfi', 'BoostyFiEarning')
+    
+    completed = BoostyFiPurchase.objects.filter(
+        buyer=OuterRef('pk'), payment_status='COMPLETED'
+    ).order_by().values('buyer')
+    withdrawn = BoostyFiEarning.objects.filter(
+        user=OuterRef('pk'), status='WITHDRAWN'
+    ).order_by().values('user')
+    children = BoostyFiUser.objects.filter(parent=OuterRef('pk')).order_by().values('parent')
+    zero = Value(Decimal('0'), output_field=DecimalField(max_digits=20, decimal_places=6))
+    
+    BoostyFiUser.objects.update(
+        children_count=Coalesce(Subquery(children.annotate(cnt=Count('id')).values('cnt')), Value(0)),
+        purchases_count=Coalesce(Subquery(completed.annotate(cnt=Count('id')).values('cnt')), Value(0)),
+        direct_volume=Coalesce(Subquery(completed.annotate(total=Sum('amount')).values('total')), zero),
+        total_earnings=Coalesce(Subquery(withdrawn.annotate(total=Sum('amount')).values('total')), zero),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boostyfi', '0002_team_volume_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='boostyfiuser',
+            name='children_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='boostyfiuser',
+            name='direct_volume',
+            field=models.DecimalField(decimal_places=6, default=0, max_digits=20),
+        ),
+        migrations.AddField(
+            model_name='boostyfiuser',
+            name='purchases_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='boostyfiuser',
+            name='total_earnings',
+            field=models.DecimalField(decimal_places=6, default=0, max_digits=20),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.9 on 2026-10-16 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boostyfi', '0004_team_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='boostyfiearning',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='boostyfipurchase',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='boostyfiuser',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+    ]
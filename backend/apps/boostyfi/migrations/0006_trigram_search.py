@@ -0,0 +1,41 @@
+# Generated by Django 5.0.9 on 2026-10-16 20:42
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boostyfi', '0005_content_hash'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='boostyfiuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('username'), name='gin_trgm_ops'), name='boostyfi_username_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='boostyfiuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('wallet'), name='gin_trgm_ops'), name='boostyfi_wallet_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='boostyfiuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('evm_address'), name='gin_trgm_ops'), name='boostyfi_evm_address_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='boostyfiuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('tron_address'), name='gin_trgm_ops'), name='boostyfi_tron_address_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='boostyfiuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('referral_code'), name='gin_trgm_ops'), name='boostyfi_referral_code_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='boostyfiuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='gin_trgm_ops'), name='boostyfi_email_trgm'),
+        ),
+    ]
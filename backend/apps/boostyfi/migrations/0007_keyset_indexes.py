@@ -0,0 +1,37 @@
+# Generated by Django 5.0.9 on 2026-10-16 20:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boostyfi', '0006_trigram_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='boostyfiearning',
+            index=models.Index(fields=['created_at', 'id'], name='boostyfi_bo_created_498ad8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boostyfiearning',
+            index=models.Index(fields=['user_original_id', 'created_at', 'id'], name='boostyfi_bo_user_or_0dccbe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boostyfipurchase',
+            index=models.Index(fields=['created_at', 'id'], name='boostyfi_bo_created_ae5fc8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boostyfipurchase',
+            index=models.Index(fields=['buyer_original_id', 'created_at', 'id'], name='boostyfi_bo_buyer_o_d81b78_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boostyfiuser',
+            index=models.Index(fields=['created_at', 'id'], name='boostyfi_bo_created_70df1e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boostyfiuser',
+            index=models.Index(fields=['username', 'id'], name='boostyfi_bo_usernam_ad593e_idx'),
+        ),
+    ]
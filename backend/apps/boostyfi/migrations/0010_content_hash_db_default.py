@@ -0,0 +1,28 @@
+# Generated by Django 5.0.9 on 2026-10-16 21:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boostyfi', '0009_user_counters_db_default'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='boostyfiearning',
+            name='content_hash',
+            field=models.CharField(blank=True, db_default='', default='', editable=False, max_length=32),
+        ),
+        migrations.AlterField(
+            model_name='boostyfipurchase',
+            name='content_hash',
+            field=models.CharField(blank=True, db_default='', default='', editable=False, max_length=32),
+        ),
+        migrations.AlterField(
+            model_name='boostyfiuser',
+            name='content_hash',
+            field=models.CharField(blank=True, db_default='', default='', editable=False, max_length=32),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.9 on 2026-10-16 21:40
+
+from django.db import migrations
+
+from apps.core.wallets import split_addresses
+
+
+def backfill_wallet_addresses(apps, schema_editor):
+    WalletAddress = apps.get_model('core', 'WalletAddress')
+    BoostyFiUser = apps.get_model('boostyfi', 'BoostyFiUser')
+    fields = ['wallet', 'evm_address', 'tron_address']
+    rows = BoostyFiUser.objects.order_by().values_list('pk', *fields)
+    WalletAddress.objects.filter(owner_type='boostyfi_user').delete()
+    WalletAddress.objects.bulk_create(
+        (
+            WalletAddress(address=address, owner_type='boostyfi_user', owner_id=pk, field=field)
+            for pk, *values in rows.iterator()
+            for field, value in zip(fields, values)
+            for address in split_addresses(value)
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_wallet_address'),
+        ('boostyfi', '0010_content_hash_db_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_wallet_addresses, migrations.RunPython.noop),
+    ]
@@ -2,65 +2,151 @@
 BoostyFi models for users, purchases, and earnings.
 """
 from decimal import Decimal
-from django.db import models
-from django.db.models import Count, Sum, Q, OuterRef, Subquery, Value, DecimalField
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models, transaction
+from django.db.models import Count, Sum, Q, F, Prefetch, OuterRef, Subquery, Value, DecimalField
 from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
 from mptt.models import MPTTModel, TreeForeignKey
 from mptt.managers import TreeManager
 
-from apps.core.models import TimeStampedModel
+from apps.core.models import TimeStampedModel, WalletAddress, WalletOwner
+from apps.core.search import trigram_index
+from apps.core.tree import (
+    NestedSetBuilderMixin,
+    SubtreeQuerySetMixin,
+    roots_tree_size_index,
+    running_totals,
+    subtree_rollups,
+)
 
+# Denormalized per-user counters, recomputed in bulk after every import
+COUNTER_FIELDS = ['children_count', 'purchases_count', 'direct_volume', 'total_earnings']
 
-class BoostyFiUserQuerySet(models.QuerySet):
-    """Custom QuerySet with tree field annotations."""
-    
-    def annotate_tree_fields(self):
-        """Add computed fields for tree display using subqueries to avoid JOIN multiplication."""
+# Latest earnings shown on the user detail endpoint
+RECENT_EARNINGS = 15
+
+# Text fields matched by the search endpoints, each with a trigram index
+USER_SEARCH_FIELDS = ['username', 'wallet', 'evm_address', 'tron_address', 'referral_code', 'email']
+
+
+class BoostyFiUserQuerySet(SubtreeQuerySetMixin, models.QuerySet):
+    """Custom QuerySet with helpers for the denormalized counter columns."""
+    
+    def counter_expressions(self):
+        """
+        Subquery expressions computing each counter column from the source
+        tables, without JOIN multiplication.
+        """
         from .models import BoostyFiPurchase, BoostyFiEarning
         
+        # Subquery for children count
+        children_count_sq = BoostyFiUser.objects.filter(
+            parent=OuterRef('pk')
+        ).order_by().values('parent').annotate(cnt=Count('id')).values('cnt')
+        
         # Subquery for purchases count
         purchases_count_sq = BoostyFiPurchase.objects.filter(
             buyer=OuterRef('pk'),
             payment_status='COMPLETED'
-        ).values('buyer').annotate(cnt=Count('id')).values('cnt')
+        ).order_by().values('buyer').annotate(cnt=Count('id')).values('cnt')
         
         # Subquery for direct volume
         direct_volume_sq = BoostyFiPurchase.objects.filter(
             buyer=OuterRef('pk'),
             payment_status='COMPLETED'
-        ).values('buyer').annotate(total=Sum('amount')).values('total')
+        ).order_by().values('buyer').annotate(total=Sum('amount')).values('total')
         
         # Subquery for total earnings
         total_earnings_sq = BoostyFiEarning.objects.filter(
             user=OuterRef('pk'),
             status='WITHDRAWN'
-        ).values('user').annotate(total=Sum('amount')).values('total')
+        ).order_by().values('user').annotate(total=Sum('amount')).values('total')
         
-        return self.annotate(
-            children_count=Count('children', distinct=True),
-            purchases_count=Coalesce(
-                Subquery(purchases_count_sq),
-                Value(0)
-            ),
-            direct_volume=Coalesce(
-                Subquery(direct_volume_sq),
-                Value(Decimal('0'), output_field=DecimalField(max_digits=20, decimal_places=2))
-            ),
-            total_earnings=Coalesce(
-                Subquery(total_earnings_sq),
-                Value(Decimal('0'), output_field=DecimalField(max_digits=20, decimal_places=2))
-            )
+        zero = Value(Decimal('0'), output_field=DecimalField(max_digits=20, decimal_places=6))
+        return {
+            'children_count': Coalesce(Subquery(children_count_sq), Value(0)),
+            'purchases_count': Coalesce(Subquery(purchases_count_sq), Value(0)),
+            'direct_volume': Coalesce(Subquery(direct_volume_sq), zero),
+            'total_earnings': Coalesce(Subquery(total_earnings_sq), zero),
+        }
+    
+    def refresh_counters(self):
+        """Recompute the stored counter columns with a single UPDATE."""
+        return self.update(**self.counter_expressions())
+    
+    def for_detail(self):
+        """
+        Join and prefetch what the detail serializer reads: the rollup and
+        parent rows, the purchases and the latest earnings with their buyers.
+        """
+        from .models import BoostyFiEarning
+        
+        recent_earnings = BoostyFiEarning.objects.select_related('buyer').order_by('-created_at', '-id')
+        return self.select_related('rollup', 'parent').prefetch_related(
+            'purchases',
+            Prefetch('earnings', queryset=recent_earnings[:RECENT_EARNINGS], to_attr='recent_earnings'),
         )
+    
+    def with_counter_drift(self):
+        """Users whose stored counters differ from the source tables."""
+        live = {f'live_{name}': expr for name, expr in self.counter_expressions().items()}
+        drift = Q()
+        for name in COUNTER_FIELDS:
+            drift |= ~Q(**{name: F(f'live_{name}')})
+        return self.annotate(**live).filter(drift)
 
 
-class BoostyFiUserManager(TreeManager):
+class BoostyFiUserManager(NestedSetBuilderMixin, TreeManager):
     """Custom manager for BoostyFiUser."""
     
     def get_queryset(self):
         return BoostyFiUserQuerySet(self.model, using=self._db)
     
-    def annotate_tree_fields(self):
-        return self.get_queryset().annotate_tree_fields()
+    def refresh_counters(self):
+        return self.get_queryset().refresh_counters()
+    
+    def with_counter_drift(self):
+        return self.get_queryset().with_counter_drift()
+    
+    def for_detail(self):
+        return self.get_queryset().for_detail()
+    
+    def subtree(self, nodes, depth, include_self=True):
+        return self.get_queryset().subtree(nodes, depth, include_self=include_self)
+    
+    def refresh_aggregates(self, tree_ids=None):
+        """
+        Recompute the counter columns and the team tables built from them,
+        and re-index the wallet addresses. Run after imports and tree rebuilds.
+        ``tree_ids`` limits the refresh to those trees, for imports that
+        changed rows of a few trees without renumbering them.
+        """
+        users = self.all() if tree_ids is None else self.filter(tree_id__in=tree_ids)
+        users.refresh_counters()
+        BoostyFiTeamVolumeIndex.rebuild(tree_ids)
+        BoostyFiTeamRollup.rebuild(tree_ids)
+        WalletAddress.rebuild(WalletOwner.BOOSTYFI_USER, users, ['wallet', 'evm_address', 'tron_address'], partial=tree_ids is not None)
+    
+    def compute_stats(self):
+        """Totals shown by the stats endpoint, stored in the stats snapshot."""
+        purchases = BoostyFiPurchase.objects.filter(payment_status=PaymentStatus.COMPLETED).aggregate(
+            count=Count('id'),
+            volume=Sum('amount'),
+        )
+        earnings = BoostyFiEarning.objects.filter(status=EarningStatus.WITHDRAWN).aggregate(
+            total=Sum('amount'),
+        )
+        return {
+            'total_users': self.count(),
+            'total_purchases': purchases['count'],
+            'total_volume': purchases['volume'] or 0,
+            'total_earnings': earnings['total'] or 0,
+            'total_atla': self.aggregate(
+                total=Sum(F('locked_atla_balance') + F('unlocked_atla_balance'))
+            )['total'] or 0,
+            'root_users': self.filter(parent__isnull=True).count(),
+        }
 
 
 class ReferralType(models.TextChoices):
@@ -77,6 +163,8 @@ class BoostyFiUser(MPTTModel, TimeStampedModel):
     """
     # Original ID from CSV
     original_id = models.IntegerField(unique=True, db_index=True)
+    # Hash of the imported CSV values, compared by delta imports
+    content_hash = models.CharField(max_length=32, blank=True, editable=False, default='', db_default='')
     
     # User info
     username = models.CharField(max_length=255, blank=True, db_index=True)
@@ -132,6 +220,13 @@ class BoostyFiUser(MPTTModel, TimeStampedModel):
     original_tree_id = models.IntegerField(null=True, blank=True)
     original_level = models.IntegerField(null=True, blank=True)
     
+    # Denormalized counters (see COUNTER_FIELDS), with database defaults so
+    # raw SQL inserts may leave them out
+    children_count = models.IntegerField(default=0, db_default=0)
+    purchases_count = models.IntegerField(default=0, db_default=0)
+    direct_volume = models.DecimalField(max_digits=20, decimal_places=6, default=0, db_default=0)
+    total_earnings = models.DecimalField(max_digits=20, decimal_places=6, default=0, db_default=0)
+    
     objects = BoostyFiUserManager()
     
     class MPTTMeta:
@@ -141,6 +236,14 @@ class BoostyFiUser(MPTTModel, TimeStampedModel):
         verbose_name = 'BoostyFi User'
         verbose_name_plural = 'BoostyFi Users'
         ordering = ['original_id']
+        indexes = [
+            trigram_index(field, f'boostyfi_{field}_trgm') for field in USER_SEARCH_FIELDS
+        ] + [
+            # Keyset pagination orderings, with the primary key as tiebreaker
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['username', 'id']),
+            roots_tree_size_index('boostyfi_root_tree_size_idx'),
+        ]
     
     def __str__(self):
         return f"{self.username or f'User {self.original_id}'}"
@@ -155,6 +258,39 @@ class BoostyFiUser(MPTTModel, TimeStampedModel):
     @property
     def total_atla(self):
         return self.locked_atla_balance + self.unlocked_atla_balance
+    
+    @cached_property
+    def earnings_summary(self):
+        """
+        Earnings count and total per type and per referral system plus the
+        pending total, from one grouped query. Cached for the detail serializer.
+        """
+        rows = self.earnings.order_by().values('earning_type', 'referral_system_type').annotate(
+            count=Count('id'),
+            total=Sum('amount'),
+            pending=Sum('amount', filter=Q(status=EarningStatus.PENDING)),
+        )
+        groups = {'earning_type': {}, 'referral_system_type': {}}
+        pending = Decimal('0')
+        for row in rows:
+            pending += row['pending'] or 0
+            for key, totals in groups.items():
+                group = totals.setdefault(row[key], {key: row[key], 'count': 0, 'total': Decimal('0')})
+                group['count'] += row['count']
+                group['total'] += row['total'] or 0
+        return {
+            'by_type': list(groups['earning_type'].values()),
+            'by_system': list(groups['referral_system_type'].values()),
+            'pending': pending,
+        }
+    
+    @property
+    def team_rollup(self):
+        """The user's team rollup, or None if rollups were not built yet."""
+        try:
+            return self.rollup
+        except ObjectDoesNotExist:
+            return None
 
 
 class PaymentStatus(models.TextChoices):
@@ -176,6 +312,8 @@ class BoostyFiPurchase(TimeStampedModel):
     """
     # Original ID from CSV
     original_id = models.IntegerField(unique=True, db_index=True)
+    # Hash of the imported CSV values, compared by delta imports
+    content_hash = models.CharField(max_length=32, blank=True, editable=False, default='', db_default='')
     
     # Relationship
     buyer = models.ForeignKey(
@@ -224,6 +362,11 @@ class BoostyFiPurchase(TimeStampedModel):
         verbose_name = 'BoostyFi Purchase'
         verbose_name_plural = 'BoostyFi Purchases'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination, unfiltered and per buyer
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['buyer_original_id', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"Purchase #{self.original_id} - ${self.amount}"
@@ -251,6 +394,8 @@ class BoostyFiEarning(TimeStampedModel):
     """
     # Original ID from CSV
     original_id = models.IntegerField(unique=True, db_index=True)
+    # Hash of the imported CSV values, compared by delta imports
+    content_hash = models.CharField(max_length=32, blank=True, editable=False, default='', db_default='')
     
     # Relationships
     user = models.ForeignKey(
@@ -327,6 +472,11 @@ class BoostyFiEarning(TimeStampedModel):
         verbose_name = 'BoostyFi Earning'
         verbose_name_plural = 'BoostyFi Earnings'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination, unfiltered and per recipient
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['user_original_id', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"Earning #{self.original_id} - ${self.amount} ({self.earning_type})"
@@ -335,3 +485,148 @@ class BoostyFiEarning(TimeStampedModel):
     def referral_system_name(self):
         mapping = {1: 'Influencer', 2: 'KOL', 3: 'MLM'}
         return mapping.get(self.referral_system_type, 'Unknown')
+
+
+class BoostyFiTeamVolumeIndex(models.Model):
+    """
+    Prefix-sum index of completed purchase volume over the nested set.
+    Each row holds the running total of the user's tree (ordered by lft)
+    before the user and after their last descendant, so team volume is
+    a single subtraction. Rebuilt after tree rebuilds and imports.
+    """
+    user = models.OneToOneField(
+        BoostyFiUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='volume_index'
+    )
+    total_at_lft = models.DecimalField(max_digits=24, decimal_places=6, default=0)
+    total_at_rght = models.DecimalField(max_digits=24, decimal_places=6, default=0)
+    
+    class Meta:
+        verbose_name = 'BoostyFi Team Volume Index'
+        verbose_name_plural = 'BoostyFi Team Volume Index'
+    
+    def __str__(self):
+        return f"Team volume for user #{self.user_id} - ${self.team_volume}"
+    
+    @property
+    def team_volume(self):
+        return self.total_at_rght - self.total_at_lft
+    
+    @classmethod
+    def get_team_volumes(cls, user_ids=None, tree_ids=None) -> dict:
+        """
+        Get team volume for many users, or the users of ``tree_ids``, or
+        every indexed user by default, with one query (user_id -> volume).
+        """
+        rows = cls.objects.all()
+        if user_ids is not None:
+            rows = rows.filter(user_id__in=list(user_ids))
+        if tree_ids is not None:
+            rows = rows.filter(user__tree_id__in=tree_ids)
+        rows = rows.values_list('user_id', 'total_at_lft', 'total_at_rght')
+        return {user_id: at_rght - at_lft for user_id, at_lft, at_rght in rows.iterator()}
+    
+    @classmethod
+    def get_team_volume(cls, user_id):
+        """Get team volume for one user, or None if the user is not indexed."""
+        return cls.get_team_volumes([user_id]).get(user_id)
+    
+    @classmethod
+    def rebuild(cls, tree_ids=None):
+        """Recompute the index for every tree, or ``tree_ids``, from completed purchases."""
+        purchases = BoostyFiPurchase.objects.filter(
+            payment_status=PaymentStatus.COMPLETED,
+            buyer__isnull=False
+        )
+        nodes = BoostyFiUser.objects.all()
+        rows = cls.objects.all()
+        if tree_ids is not None:
+            purchases = purchases.filter(buyer__tree_id__in=tree_ids)
+            nodes = nodes.filter(tree_id__in=tree_ids)
+            rows = rows.filter(user__tree_id__in=tree_ids)
+        volumes = dict(
+            purchases.order_by().values('buyer').annotate(
+                total=Sum('amount')
+            ).values_list('buyer', 'total')
+        )
+        nodes = nodes.order_by('tree_id', 'lft').values_list(
+            'id', 'tree_id', 'lft', 'rght'
+        )
+        totals = running_totals(nodes.iterator(), volumes)
+        
+        with transaction.atomic():
+            rows.delete()
+            cls.objects.bulk_create(
+                (
+                    cls(user_id=user_id, total_at_lft=at_lft, total_at_rght=at_rght)
+                    for user_id, (at_lft, at_rght) in totals.items()
+                ),
+                batch_size=1000
+            )
+        return len(totals)
+
+
+class BoostyFiTeamRollup(models.Model):
+    """
+    Subtree totals per user, computed in one bottom-up pass over each tree
+    from the stored counter columns, with team_volume taken from the team
+    volume index. team_size counts descendants, max_depth is the deepest
+    level below the user, the other totals include the user.
+    """
+    user = models.OneToOneField(
+        BoostyFiUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rollup'
+    )
+    team_size = models.IntegerField(default=0)
+    team_volume = models.DecimalField(max_digits=24, decimal_places=6, default=0, db_index=True)
+    team_earnings = models.DecimalField(max_digits=24, decimal_places=6, default=0)
+    team_purchases = models.IntegerField(default=0)
+    max_depth = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'BoostyFi Team Rollup'
+        verbose_name_plural = 'BoostyFi Team Rollups'
+    
+    def __str__(self):
+        return f"Team of user #{self.user_id} - {self.team_size} members"
+    
+    @classmethod
+    def rebuild(cls, tree_ids=None):
+        """
+        Recompute rollups for every tree, or ``tree_ids``. Expects fresh
+        counter columns and a fresh team volume index, which team_volume is
+        read from.
+        """
+        nodes = BoostyFiUser.objects.all()
+        rows = cls.objects.all()
+        if tree_ids is not None:
+            nodes = nodes.filter(tree_id__in=tree_ids)
+            rows = rows.filter(user__tree_id__in=tree_ids)
+        nodes = nodes.order_by('-tree_id', '-lft').values_list(
+            'id', 'parent_id', 'total_earnings', 'purchases_count'
+        )
+        rollups = subtree_rollups(nodes.iterator())
+        volumes = BoostyFiTeamVolumeIndex.get_team_volumes(tree_ids=tree_ids)
+        
+        with transaction.atomic():
+            rows.delete()
+            cls.objects.bulk_create(
+                (
+                    cls(
+                        user_id=user_id,
+                        team_size=team_size,
+                        max_depth=max_depth,
+                        team_volume=volumes.get(user_id, 0),
+                        team_earnings=team_earnings,
+                        team_purchases=team_purchases,
+                    )
+                    for user_id, (team_size, max_depth, team_earnings, team_purchases)
+                    in rollups.items()
+                ),
+                batch_size=1000
+            )
+        return len(rollups)
@@ -2,9 +2,13 @@
 Serializers for BoostyFi API.
 """
 from rest_framework import serializers
-from django.db.models import Sum, Count
 
-from .models import BoostyFiUser, BoostyFiPurchase, BoostyFiEarning
+from .models import (
+    RECENT_EARNINGS,
+    BoostyFiUser,
+    BoostyFiPurchase,
+    BoostyFiEarning,
+)
 from apps.core.models import SellerAssignment
 
 
@@ -35,11 +39,11 @@ class BoostyFiEarningSerializer(serializers.ModelSerializer):
 
 
 class BoostyFiUserListSerializer(serializers.ModelSerializer):
-    """Serializer for user list view."""
-    children_count = serializers.SerializerMethodField()
-    purchases_count = serializers.SerializerMethodField()
-    direct_volume = serializers.SerializerMethodField()
-    total_earnings = serializers.SerializerMethodField()
+    """Serializer for user list view, reading the stored counter columns."""
+    children_count = serializers.IntegerField(read_only=True)
+    purchases_count = serializers.IntegerField(read_only=True)
+    direct_volume = serializers.FloatField(read_only=True)
+    total_earnings = serializers.FloatField(read_only=True)
     total_atla = serializers.ReadOnlyField()
     
     class Meta:
@@ -49,35 +53,25 @@ class BoostyFiUserListSerializer(serializers.ModelSerializer):
             'referral_type', 'is_active', 'children_count', 'purchases_count',
             'direct_volume', 'total_earnings', 'total_atla', 'created_at'
         ]
-    
-    def get_children_count(self, obj):
-        return obj.get_children().count()
-    
-    def get_purchases_count(self, obj):
-        return obj.purchases.filter(payment_status='COMPLETED').count()
-    
-    def get_direct_volume(self, obj):
-        result = obj.purchases.filter(
-            payment_status='COMPLETED'
-        ).aggregate(total=Sum('amount'))
-        return float(result['total'] or 0)
-    
-    def get_total_earnings(self, obj):
-        result = obj.earnings.filter(
-            status='WITHDRAWN'
-        ).aggregate(total=Sum('amount'))
-        return float(result['total'] or 0)
 
 
 class BoostyFiUserDetailSerializer(serializers.ModelSerializer):
-    """Serializer for user detail view."""
-    children_count = serializers.SerializerMethodField()
+    """
+    Serializer for user detail view. Expects a user loaded with
+    ``BoostyFiUser.objects.for_detail()``; counters come from the stored columns.
+    """
+    children_count = serializers.IntegerField(read_only=True)
     team_size = serializers.SerializerMethodField()
-    purchases_count = serializers.SerializerMethodField()
+    purchases_count = serializers.IntegerField(read_only=True)
     pending_purchases_count = serializers.SerializerMethodField()
-    direct_volume = serializers.SerializerMethodField()
-    team_volume = serializers.SerializerMethodField()
-    total_earnings = serializers.SerializerMethodField()
+    direct_volume = serializers.FloatField(read_only=True)
+    team_volume = serializers.FloatField(source='team_rollup.team_volume', read_only=True, default=0)
+    team_earnings = serializers.DecimalField(
+        source='rollup.team_earnings', max_digits=24, decimal_places=2, read_only=True
+    )
+    team_purchases = serializers.IntegerField(source='rollup.team_purchases', read_only=True)
+    max_depth = serializers.IntegerField(source='rollup.max_depth', read_only=True)
+    total_earnings = serializers.FloatField(read_only=True)
     pending_earnings = serializers.SerializerMethodField()
     parent_username = serializers.CharField(source='parent.username', read_only=True)
     purchases = BoostyFiPurchaseSerializer(many=True, read_only=True)
@@ -96,65 +90,37 @@ class BoostyFiUserDetailSerializer(serializers.ModelSerializer):
             'locked_atla_balance', 'unlocked_atla_balance', 'total_atla',
             'date_joined', 'created_at', 'parent_username',
             'children_count', 'team_size', 'purchases_count', 'pending_purchases_count',
-            'direct_volume', 'team_volume', 'total_earnings', 'pending_earnings',
+            'direct_volume', 'team_volume', 'team_earnings', 'team_purchases', 'max_depth',
+            'total_earnings', 'pending_earnings',
             'purchases', 'recent_earnings', 'earnings_by_type', 'earnings_by_system',
             'assigned_sellers'
         ]
     
-    def get_children_count(self, obj):
-        return obj.get_children().count()
-    
     def get_team_size(self, obj):
+        rollup = obj.team_rollup
+        if rollup is not None:
+            return rollup.team_size
         return obj.get_descendant_count()
     
-    def get_purchases_count(self, obj):
-        return obj.purchases.filter(payment_status='COMPLETED').count()
-    
     def get_pending_purchases_count(self, obj):
-        return obj.purchases.filter(payment_status='PENDING').count()
-    
-    def get_direct_volume(self, obj):
-        result = obj.purchases.filter(
-            payment_status='COMPLETED'
-        ).aggregate(total=Sum('amount'))
-        return float(result['total'] or 0)
-    
-    def get_team_volume(self, obj):
-        """Calculate total volume from user and all descendants."""
-        descendants = obj.get_descendants(include_self=True)
-        result = BoostyFiPurchase.objects.filter(
-            buyer__in=descendants,
-            payment_status='COMPLETED'
-        ).aggregate(total=Sum('amount'))
-        return float(result['total'] or 0)
-    
-    def get_total_earnings(self, obj):
-        result = obj.earnings.filter(
-            status='WITHDRAWN'
-        ).aggregate(total=Sum('amount'))
-        return float(result['total'] or 0)
+        # Counted over the purchases listed in the response
+        return sum(1 for purchase in obj.purchases.all() if purchase.payment_status == 'PENDING')
     
     def get_pending_earnings(self, obj):
-        result = obj.earnings.filter(
-            status='PENDING'
-        ).aggregate(total=Sum('amount'))
-        return float(result['total'] or 0)
+        return float(obj.earnings_summary['pending'])
     
     def get_recent_earnings(self, obj):
-        earnings = obj.earnings.order_by('-created_at')[:15]
+        # Prefetched by for_detail(), otherwise queried with the same join
+        earnings = getattr(obj, 'recent_earnings', None)
+        if earnings is None:
+            earnings = obj.earnings.select_related('buyer').order_by('-created_at', '-id')[:RECENT_EARNINGS]
         return BoostyFiEarningSerializer(earnings, many=True).data
     
     def get_earnings_by_type(self, obj):
-        return list(obj.earnings.values('earning_type').annotate(
-            count=Count('id'),
-            total=Sum('amount')
-        ))
+        return obj.earnings_summary['by_type']
     
     def get_earnings_by_system(self, obj):
-        return list(obj.earnings.values('referral_system_type').annotate(
-            count=Count('id'),
-            total=Sum('amount')
-        ))
+        return obj.earnings_summary['by_system']
     
     def get_assigned_sellers(self, obj):
         return SellerAssignment.get_seller_names_for_user('boostyfi', obj.id)
@@ -165,7 +131,13 @@ class BoostyFiUserTreeSerializer(serializers.ModelSerializer):
     children = serializers.SerializerMethodField()
     purchases_count = serializers.IntegerField(read_only=True, default=0)
     direct_volume = serializers.DecimalField(max_digits=20, decimal_places=2, read_only=True, default=0)
-    team_volume = serializers.SerializerMethodField()
+    team_volume = serializers.FloatField(source='team_rollup.team_volume', read_only=True, default=0)
+    team_size = serializers.IntegerField(source='rollup.team_size', read_only=True)
+    team_earnings = serializers.DecimalField(
+        source='rollup.team_earnings', max_digits=24, decimal_places=2, read_only=True
+    )
+    team_purchases = serializers.IntegerField(source='rollup.team_purchases', read_only=True)
+    max_depth = serializers.IntegerField(source='rollup.max_depth', read_only=True)
     total_earnings = serializers.DecimalField(max_digits=20, decimal_places=2, read_only=True, default=0)
     children_count = serializers.IntegerField(read_only=True, default=0)
     tree_size = serializers.IntegerField(read_only=True, default=0)
@@ -177,23 +149,10 @@ class BoostyFiUserTreeSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'original_id', 'username', 'wallet', 'referral_type',
             'is_active', 'children_count', 'tree_size', 'purchases_count', 'direct_volume',
-            'team_volume', 'total_earnings', 'total_atla', 'children', 'assigned_sellers'
+            'team_volume', 'team_size', 'team_earnings', 'team_purchases', 'max_depth',
+            'total_earnings', 'total_atla', 'children', 'assigned_sellers'
         ]
     
-    def get_team_volume(self, obj):
-        """Calculate total volume from user and all descendants using MPTT."""
-        # Use MPTT lft/rght for efficient descendant query
-        descendants = BoostyFiUser.objects.filter(
-            tree_id=obj.tree_id,
-            lft__gte=obj.lft,
-            rght__lte=obj.rght
-        )
-        result = BoostyFiPurchase.objects.filter(
-            buyer__in=descendants,
-            payment_status='COMPLETED'
-        ).aggregate(total=Sum('amount'))
-        return float(result['total'] or 0)
-    
     def get_children(self, obj):
         max_depth = self.context.get('max_depth', 0)
         current_depth = self.context.get('current_depth', 0)
@@ -201,19 +160,24 @@ class BoostyFiUserTreeSerializer(serializers.ModelSerializer):
         if current_depth >= max_depth:
             return []
         
-        # Use annotated children if available, otherwise fetch
-        children = obj.get_children().annotate_tree_fields()
+        # Use the preloaded subtree if the view provided one, otherwise fetch
+        children_map = self.context.get('children_map')
+        if children_map is not None:
+            children = children_map.get(obj.id, [])
+        else:
+            children = obj.get_children()
         return BoostyFiUserTreeSerializer(
             children,
             many=True,
             context={
-                'max_depth': max_depth,
+                **self.context,
                 'current_depth': current_depth + 1
             }
         ).data
     
     def get_assigned_sellers(self, obj):
-        return SellerAssignment.get_seller_names_for_user('boostyfi', obj.id)
+        # Filled in for the whole response by apps.core.cache.attach_sellers()
+        return []
 
 
 class BoostyFiStatsSerializer(serializers.Serializer):
@@ -224,3 +188,5 @@ class BoostyFiStatsSerializer(serializers.Serializer):
     total_earnings = serializers.DecimalField(max_digits=20, decimal_places=2)
     total_atla = serializers.DecimalField(max_digits=30, decimal_places=2)
     root_users = serializers.IntegerField()
+    snapshot_at = serializers.DateTimeField()
+    dataset_version = serializers.IntegerField()
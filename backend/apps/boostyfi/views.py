@@ -1,7 +1,10 @@
 """
 API Views for BoostyFi.
 """
-from django.db.models import Sum, Count, F, Q, ExpressionWrapper, IntegerField
+from decimal import Decimal
+
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -9,7 +12,18 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
-from .models import BoostyFiUser, BoostyFiPurchase, BoostyFiEarning
+from apps.core.cache import DatasetCacheMixin, attach_sellers
+from apps.core.models import Dataset, StatsSnapshot
+from apps.core.pagination import KeysetPagination, RootsPagination
+from apps.core.search import trigram_search
+from apps.core.tree import group_children, tree_size
+
+from .models import (
+    USER_SEARCH_FIELDS,
+    BoostyFiUser,
+    BoostyFiPurchase,
+    BoostyFiEarning,
+)
 from .serializers import (
     BoostyFiUserListSerializer,
     BoostyFiUserDetailSerializer,
@@ -20,7 +34,7 @@ from .serializers import (
 )
 
 
-class BoostyFiUserViewSet(viewsets.ReadOnlyModelViewSet):
+class BoostyFiUserViewSet(DatasetCacheMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for BoostyFi users.
     
@@ -31,9 +45,13 @@ class BoostyFiUserViewSet(viewsets.ReadOnlyModelViewSet):
     """
     queryset = BoostyFiUser.objects.all()
     permission_classes = [AllowAny]  # Adjust as needed
+    cache_dataset = Dataset.BOOSTYFI
+    seller_platform = 'boostyfi'
+    sellerless_actions = ['list', 'stats']
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['is_active', 'referral_code_confirmed', 'referral_type']
-    search_fields = ['username', 'wallet', 'evm_address', 'tron_address', 'referral_code', 'email']
+    search_fields = USER_SEARCH_FIELDS
     ordering_fields = ['created_at', 'username', 'original_id']
     ordering = ['original_id']
     
@@ -44,6 +62,43 @@ class BoostyFiUserViewSet(viewsets.ReadOnlyModelViewSet):
             return BoostyFiUserTreeSerializer
         return BoostyFiUserListSerializer
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.for_detail()
+        elif self.action != 'list':
+            # Team statistics are read from the rollup table
+            queryset = queryset.select_related('rollup')
+        return queryset
+    
+    def get_tree_context(self, nodes, max_depth):
+        """
+        Build serializer context with the subtrees of ``nodes`` preloaded
+        (joined with their team rollups), so serializing costs a fixed number
+        of queries regardless of depth. The sellers of every node are added
+        to the serialized body by ``with_sellers()``.
+        """
+        children_map = {}
+        if max_depth > 0:
+            subtree = BoostyFiUser.objects.subtree(
+                nodes, max_depth, include_self=False
+            ).select_related('rollup')
+            children_map = group_children(subtree)
+        
+        return {
+            'max_depth': max_depth,
+            'current_depth': 0,
+            'children_map': children_map,
+        }
+    
+    def with_sellers(self, data):
+        """
+        Response of ``data`` with the ``assigned_sellers`` of every node filled
+        in by ``attach_sellers()``, the grouped query that also refreshes
+        cached bodies.
+        """
+        return Response(attach_sellers(data, self.seller_platform))
+    
     @action(detail=True, methods=['get'])
     def tree(self, request, pk=None):
         """Get user's subtree with configurable depth."""
@@ -52,131 +107,108 @@ class BoostyFiUserViewSet(viewsets.ReadOnlyModelViewSet):
         
         serializer = BoostyFiUserTreeSerializer(
             user,
-            context={'max_depth': max_depth, 'current_depth': 0}
+            context=self.get_tree_context([user], max_depth)
         )
-        return Response(serializer.data)
+        return self.with_sellers(serializer.data)
+    
+    # Orderings accepted by the roots ``sort`` parameter
+    ROOTS_ORDERINGS = {
+        'tree_size': ['-tree_size', 'original_id'],
+        'team_volume': ['-team_volume', 'original_id'],
+    }
     
     @action(detail=False, methods=['get'])
     def roots(self, request):
-        """Get root users (users without parents) with pagination, sorted by tree size descending."""
-        # Annotate with tree_size using MPTT lft/rght: (rght - lft - 1) / 2 = number of descendants
-        roots = self.queryset.filter(parent__isnull=True).annotate_tree_fields().annotate(
-            tree_size=ExpressionWrapper(
-                (F('rght') - F('lft') - 1) / 2,
-                output_field=IntegerField()
+        """
+        Get root users (users without parents) sorted by tree size (default)
+        or team volume descending, paginated by cursor. The tree size order
+        is read off a partial index on roots, and the total is the root count
+        kept in the stats snapshot, so every page costs the same.
+        """
+        sort = request.query_params.get('sort', 'tree_size')
+        if sort not in self.ROOTS_ORDERINGS:
+            return Response(
+                {'error': f"sort must be one of: {', '.join(self.ROOTS_ORDERINGS)}"},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        ).order_by('-tree_size', 'original_id')  # Sort by tree size descending, then by original_id
-        max_depth = int(request.query_params.get('depth', 0))  # Default 0 - no children
         
-        # Pagination parameters
-        limit = min(int(request.query_params.get('limit', 50)), 200)  # Max 200
-        offset = int(request.query_params.get('offset', 0))
+        roots = self.get_queryset().filter(parent__isnull=True).annotate(
+            tree_size=tree_size(),
+            team_volume=Coalesce('rollup__team_volume', Value(Decimal('0'))),
+        )
+        max_depth = int(request.query_params.get('depth', 0))  # Default 0 - no children
         
-        total_count = roots.count()
-        roots_page = roots[offset:offset + limit]
+        paginator = RootsPagination(ordering=self.ROOTS_ORDERINGS[sort])
+        roots_page = paginator.paginate_queryset(roots, request, view=self)
         
         serializer = BoostyFiUserTreeSerializer(
             roots_page,
             many=True,
-            context={'max_depth': max_depth, 'current_depth': 0}
+            context=self.get_tree_context(roots_page, max_depth)
         )
         
-        return Response({
+        return self.with_sellers({
             'results': serializer.data,
-            'total': total_count,
-            'limit': limit,
-            'offset': offset,
-            'has_more': offset + limit < total_count,
+            'total': StatsSnapshot.get(Dataset.BOOSTYFI).data['root_users'],
+            'limit': paginator.page_size,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'has_more': paginator.has_next,
         })
     
     @action(detail=True, methods=['get'])
     def ancestors(self, request, pk=None):
         """Get user's ancestors (path from root to this user)."""
         user = self.get_object()
-        ancestors = user.get_ancestors(include_self=True).annotate_tree_fields()
+        ancestors = list(user.get_ancestors(include_self=True).select_related('rollup'))
         
         serializer = BoostyFiUserTreeSerializer(
             ancestors,
             many=True,
-            context={'max_depth': 0, 'current_depth': 0}
+            context=self.get_tree_context(ancestors, 0)
         )
-        return Response({
+        return self.with_sellers({
             'user_id': user.id,
             'path': serializer.data,
         })
     
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Search users with autocomplete-friendly response."""
+        """Search users with autocomplete-friendly response, best matches first."""
         query = request.query_params.get('q', '').strip()
         limit = min(int(request.query_params.get('limit', 20)), 50)
         
         if len(query) < 2:
             return Response({'results': [], 'query': query})
         
-        users = self.queryset.filter(
-            Q(username__icontains=query) |
-            Q(wallet__icontains=query) |
-            Q(referral_code__icontains=query) |
-            Q(email__icontains=query) |
-            Q(evm_address__icontains=query) |
-            Q(tron_address__icontains=query)
-        ).annotate_tree_fields()[:limit]
+        users = trigram_search(self.get_queryset(), USER_SEARCH_FIELDS, query)[:limit]
+        users = list(users)
         
         serializer = BoostyFiUserTreeSerializer(
             users,
             many=True,
-            context={'max_depth': 0, 'current_depth': 0}
+            context=self.get_tree_context(users, 0)
         )
-        return Response({
+        return self.with_sellers({
             'results': serializer.data,
             'query': query,
         })
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Get overall statistics."""
-        total_users = BoostyFiUser.objects.count()
-        
-        completed_purchases = BoostyFiPurchase.objects.filter(
-            payment_status='COMPLETED'
-        )
-        total_purchases = completed_purchases.count()
-        total_volume = completed_purchases.aggregate(
-            total=Sum('amount')
-        )['total'] or 0
-        
-        withdrawn_earnings = BoostyFiEarning.objects.filter(
-            status='WITHDRAWN'
-        )
-        total_earnings = withdrawn_earnings.aggregate(
-            total=Sum('amount')
-        )['total'] or 0
-        
-        total_atla = BoostyFiUser.objects.aggregate(
-            total=Sum(F('locked_atla_balance') + F('unlocked_atla_balance'))
-        )['total'] or 0
-        
-        root_users = BoostyFiUser.objects.filter(parent__isnull=True).count()
-        
-        data = {
-            'total_users': total_users,
-            'total_purchases': total_purchases,
-            'total_volume': total_volume,
-            'total_earnings': total_earnings,
-            'total_atla': total_atla,
-            'root_users': root_users,
-        }
-        
-        serializer = BoostyFiStatsSerializer(data)
+        """Get overall statistics from the snapshot taken after the last import."""
+        snapshot = StatsSnapshot.get(Dataset.BOOSTYFI)
+        serializer = BoostyFiStatsSerializer(snapshot.as_response())
         return Response(serializer.data)
 
 
-class BoostyFiPurchaseViewSet(viewsets.ReadOnlyModelViewSet):
+class BoostyFiPurchaseViewSet(DatasetCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for BoostyFi purchases."""
     queryset = BoostyFiPurchase.objects.all()
     serializer_class = BoostyFiPurchaseSerializer
     permission_classes = [AllowAny]
+    cache_dataset = Dataset.BOOSTYFI
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['payment_status', 'payment_type', 'jggl_pack_id', 'buyer_original_id']
     search_fields = ['tx_hash']
@@ -184,11 +216,13 @@ class BoostyFiPurchaseViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['-created_at']
 
 
-class BoostyFiEarningViewSet(viewsets.ReadOnlyModelViewSet):
+class BoostyFiEarningViewSet(DatasetCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for BoostyFi earnings."""
-    queryset = BoostyFiEarning.objects.all()
+    queryset = BoostyFiEarning.objects.select_related('buyer')
     serializer_class = BoostyFiEarningSerializer
     permission_classes = [AllowAny]
+    cache_dataset = Dataset.BOOSTYFI
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['status', 'earning_type', 'referral_system_type', 'user_original_id']
     ordering_fields = ['created_at', 'amount']
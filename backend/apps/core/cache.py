@@ -0,0 +1,290 @@
+"""
+Response cache and conditional GET for the read-only platform endpoints,
+both keyed by the dataset version that imports bump.
+"""
+import hashlib
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import resolve
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .local_cache import LocalCache
+from .models import DATASET_MODELS, DatasetVersion, SellerAssignment
+from .tree import tree_size
+
+# Response bodies this worker served last, checked before Redis
+local_cache = LocalCache(settings.LOCAL_RESPONSE_CACHE_BYTES, settings.LOCAL_RESPONSE_CACHE_TIMEOUT)
+
+
+def response_cache_key(request, dataset, version):
+    """
+    Key of a GET response: the dataset version, the URL (pagination links
+    are absolute) and the query parameters in a canonical order, so
+    publishing a new version of the dataset makes every earlier key
+    unreachable.
+    """
+    query = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    url = request.build_absolute_uri(request.path)
+    digest = hashlib.sha1(f'{url}?{query}'.encode('utf-8')).hexdigest()
+    return f'response:{dataset}:v{version}:{digest}'
+
+
+def attach_sellers(data, platform):
+    """
+    Copy of ``data`` with the ``assigned_sellers`` of every user, at any
+    nesting depth, filled in from the current seller assignments with one
+    query. ``data`` itself, possibly a shared cache entry, is not changed.
+    """
+    user_ids = set()
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            if 'assigned_sellers' in item and 'id' in item:
+                user_ids.add(item['id'])
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+
+    if not user_ids:
+        return data
+    sellers = SellerAssignment.get_seller_names_for_users(platform, user_ids)
+    return fill_sellers(data, sellers)
+
+
+def fill_sellers(item, sellers):
+    """Copy of the containers of ``item`` with the users' sellers from ``sellers``."""
+    if isinstance(item, dict):
+        copy = {key: fill_sellers(value, sellers) for key, value in item.items()}
+        if 'assigned_sellers' in item and 'id' in item:
+            copy['assigned_sellers'] = sellers.get(item['id'], [])
+        return copy
+    if isinstance(item, list):
+        return [fill_sellers(value, sellers) for value in item]
+    return item
+
+
+def response_etag(request, key, seller_platform=None):
+    """
+    Strong ETag of a response body: its cache key (dataset version and
+    request), the rendered format and, for bodies listing sellers, the
+    platform's seller state token.
+    """
+    parts = [key, request.accepted_renderer.format]
+    if seller_platform:
+        parts.append(SellerAssignment.state_token(seller_platform))
+    return quote_etag(hashlib.sha1(':'.join(parts).encode('utf-8')).hexdigest())
+
+
+def etag_matches(request, etag):
+    """Whether ``If-None-Match`` lists ``etag``, compared weakly as RFC 9110 asks."""
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in (tag.removeprefix('W/') for tag in etags)
+
+
+class DatasetCacheMixin:
+    """
+    ViewSet mixin serving GET responses from the default cache and
+    answering conditional requests.
+
+    Entries are keyed by ``cache_dataset``'s version, which the importers and
+    ``rebuild_tree_task`` bump when they publish, so a new import never
+    serves old bodies. Seller claims change between imports: when
+    ``seller_platform`` is set, the cached ``assigned_sellers`` are replaced
+    with the current assignments on every hit, except for the actions in
+    ``sellerless_actions`` whose bodies have none.
+
+    Responses carry an ETag derived from the same key, so a request whose
+    ``If-None-Match`` still matches gets a 304 from cache lookups alone,
+    before any ORM work.
+
+    Bodies are also kept in the worker's ``local_cache``, so hot ones such
+    as the first roots page are served without a round trip to Redis;
+    publishing a version empties it for the dataset.
+
+    Misses are coalesced: one worker computes a key under a lock in Redis
+    while concurrent requests for it get the body of the previous dataset
+    version if Redis still holds it, or else wait for the result for up to
+    ``RESPONSE_COALESCE_WAIT`` seconds before computing it themselves.
+    """
+    cache_dataset = None
+    seller_platform = None
+    sellerless_actions = ()
+    cache_timeout = settings.RESPONSE_CACHE_TIMEOUT
+
+    def dispatch(self, request, *args, **kwargs):
+        # The viewset has bound ``get`` to the action by now; wrap it so the
+        # cache is read after authentication, permission checks and content
+        # negotiation
+        if getattr(self, 'get', None) is not None:
+            self.get = self.cached_handler(self.get)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_seller_platform(self):
+        """Platform whose sellers the current action's body lists, if any."""
+        if self.action in self.sellerless_actions:
+            return None
+        return self.seller_platform
+
+    def cached_handler(self, handler):
+        def cached(request, *args, **kwargs):
+            version, published_at = DatasetVersion.cached(self.cache_dataset)
+            local_cache.sync(self.cache_dataset, version)
+            key = response_cache_key(request, self.cache_dataset, version)
+            etag = response_etag(request, key, self.get_seller_platform())
+            if etag_matches(request, etag):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                stale_key = response_cache_key(request, self.cache_dataset, version - 1) if version else None
+                response = self.cached_response(handler, key, stale_key, request, *args, **kwargs)
+                if getattr(response, 'stale', False):
+                    # Validate the old body against its own version, so
+                    # clients come back for the new one
+                    etag, published_at = response_etag(request, stale_key, self.get_seller_platform()), None
+            if response.status_code in (200, 304):
+                self.set_validators(response, etag, published_at)
+            return response
+        return cached
+
+    def cached_response(self, handler, key, stale_key, request, *args, **kwargs):
+        data = self.get_cached(key)
+        if data is None and self.cache_timeout:
+            return self.coalesced_response(handler, key, stale_key, request, *args, **kwargs)
+        if data is None:
+            return handler(request, *args, **kwargs)
+        return self.cached_body(data)
+
+    def coalesced_response(self, handler, key, stale_key, request, *args, **kwargs):
+        """
+        Compute the body of ``key`` under its lock, or else serve the stale
+        body, or the result of the lock holder, or as a last resort compute
+        it regardless once the wait is over or the holder gave up.
+        """
+        lock_key = f'{key}:lock'
+        token = uuid.uuid4().hex
+        if not cache.add(lock_key, token, settings.RESPONSE_COALESCE_LOCK_TIMEOUT):
+            data = cache.get(stale_key) if stale_key else None
+            if data is not None:
+                response = self.cached_body(data)
+                response.stale = True
+                return response
+            data = self.wait_for(key, lock_key)
+            if data is not None:
+                local_cache.set(self.cache_dataset, key, data)
+                return self.cached_body(data)
+            token = None
+
+        try:
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, self.cache_timeout)
+                local_cache.set(self.cache_dataset, key, response.data)
+            return response
+        finally:
+            if token is not None and cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    @staticmethod
+    def wait_for(key, lock_key):
+        """
+        Body stored under ``key`` by the holder of ``lock_key``, polled for
+        up to ``RESPONSE_COALESCE_WAIT`` seconds. None once the wait is over
+        or the lock is released without a body, e.g. after an error.
+        """
+        deadline = time.monotonic() + settings.RESPONSE_COALESCE_WAIT
+        delay = 0.01
+        while time.monotonic() < deadline:
+            time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+            data = cache.get(key)
+            if data is not None:
+                return data
+            if cache.get(lock_key) is None:
+                return cache.get(key)
+            delay = min(delay * 2, 0.2)
+        return None
+
+    def cached_body(self, data):
+        seller_platform = self.get_seller_platform()
+        if seller_platform:
+            data = attach_sellers(data, seller_platform)
+        return Response(data)
+
+    def get_cached(self, key):
+        """Cached body under ``key``, from this worker's memory or else Redis."""
+        if not self.cache_timeout:
+            return None
+        data = local_cache.get(self.cache_dataset, key)
+        if data is None:
+            data = cache.get(key)
+            if data is not None:
+                local_cache.set(self.cache_dataset, key, data)
+        return data
+
+    @staticmethod
+    def set_validators(response, etag, published_at):
+        response['ETag'] = etag
+        if published_at is not None:
+            response['Last-Modified'] = http_date(published_at.timestamp())
+        # Revalidate on every use: without this, Last-Modified lets browsers
+        # reuse the body heuristically, missing imports and seller claims
+        patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ['Accept'])
+
+
+def warm_urls(platform, top_roots, tree_depths):
+    """
+    The requests the frontend makes first on ``platform``: stats, the first
+    page of roots, and the subtrees and ancestors of the ``top_roots``
+    largest roots at each of ``tree_depths``.
+    """
+    prefix = f'/api/v1/{platform}/users'
+    urls = [f'{prefix}/stats/', f'{prefix}/roots/?depth=0&limit=50&sort=tree_size']
+
+    user_model = apps.get_model(DATASET_MODELS[platform][0])
+    roots = user_model.objects.filter(parent__isnull=True).order_by(tree_size().desc(), 'original_id')
+    for root_id in roots.values_list('id', flat=True)[:top_roots]:
+        urls += [f'{prefix}/{root_id}/tree/?depth={depth}' for depth in tree_depths]
+        urls.append(f'{prefix}/{root_id}/ancestors/')
+    return urls
+
+
+def warm_response_cache(platform, top_roots=None, tree_depths=None):
+    """
+    Render the ``warm_urls()`` of ``platform`` into the response cache under
+    its current dataset version, by calling their views as if requested at
+    ``CACHE_WARM_URL``. Returns the number of responses cached.
+    """
+    # Builds plain WSGI requests; imported here so workers serving the API
+    # never load django.test
+    from django.test.client import RequestFactory
+
+    if top_roots is None:
+        top_roots = settings.CACHE_WARM_TOP_ROOTS
+    if tree_depths is None:
+        tree_depths = settings.CACHE_WARM_TREE_DEPTHS
+
+    origin = urlsplit(settings.CACHE_WARM_URL)
+    # The views build the cache key from the absolute URL, so the requests
+    # carry the public origin; no middleware runs, as none changes the key
+    factory = RequestFactory(HTTP_HOST=origin.netloc, HTTP_ACCEPT='application/json')
+    warmed = 0
+    for url in warm_urls(platform, top_roots, tree_depths):
+        match = resolve(urlsplit(url).path)
+        request = factory.get(url, secure=origin.scheme == 'https')
+        warmed += match.func(request, *match.args, **match.kwargs).status_code == 200
+    return warmed
@@ -0,0 +1,885 @@
+"""
+Streaming CSV import into PostgreSQL.
+
+Each CSV is parsed row by row and streamed with COPY into a temporary staging
+table, then moved into the platform tables with set-based SQL that resolves
+the ``*_original_id`` references to internal ids. Every row stores an md5 of
+its staged values in ``content_hash`` so delta imports can skip unchanged rows,
+unless a reference resolves to another row than before, e.g. one imported
+since. Rows inserted by other means have an empty hash and are rewritten once.
+"""
+import csv
+import json
+import time
+import uuid
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import DatasetVersion
+
+
+class ImportInProgress(Exception):
+    """Another import or post-import pipeline holds the platform's import lock."""
+
+
+def acquire_import_lock(platform):
+    """
+    Take the import lock of ``platform`` in the shared cache. Returns the
+    token needed to release it, or None when it is already held. The lock
+    expires after ``IMPORT_LOCK_TIMEOUT`` seconds in case its holder dies.
+    """
+    token = uuid.uuid4().hex
+    if cache.add(f'import-lock:{platform}', token, settings.IMPORT_LOCK_TIMEOUT):
+        return token
+    return None
+
+
+def release_import_lock(platform, token):
+    """Release the import lock of ``platform`` if ``token`` still holds it."""
+    key = f'import-lock:{platform}'
+    if cache.get(key) == token:
+        cache.delete(key)
+
+
+@contextmanager
+def import_lock(platform):
+    """Hold the import lock of ``platform``, raising ImportInProgress if taken."""
+    token = acquire_import_lock(platform)
+    if token is None:
+        raise ImportInProgress(f'{platform}: another import is in progress')
+    try:
+        yield token
+    finally:
+        release_import_lock(platform, token)
+
+
+def iter_csv(path):
+    """Yield the rows of a CSV export as dicts without loading the whole file."""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:  # utf-8-sig handles BOM
+        yield from csv.DictReader(f)
+
+
+def chunked(iterable, size):
+    """Yield lists of up to ``size`` items from ``iterable``."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class IdMap:
+    """
+    Compact ``original_id -> pk`` map for resolving references during imports.
+
+    Backed by two sorted integer arrays (16 bytes per entry) instead of a dict
+    of model instances; lookups are a binary search.
+    """
+
+    def __init__(self):
+        self.keys = array('q')
+        self.values = array('q')
+
+    @classmethod
+    def from_queryset(cls, queryset, key='original_id'):
+        """Load the map from the database, streamed in key order."""
+        id_map = cls()
+        rows = queryset.order_by(key).values_list(key, 'pk')
+        for original_id, pk in rows.iterator(chunk_size=10000):
+            id_map.keys.append(original_id)
+            id_map.values.append(pk)
+        return id_map
+
+    def get(self, key, default=None):
+        if key is None:
+            return default
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return self.values[index]
+        return default
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def parse_datetime(value):
+    """Parse datetime from the formats found in the exports."""
+    if not value or value.strip() == '':
+        return None
+
+    formats = [
+        '%Y-%m-%d %H:%M:%S.%f %z',
+        '%Y-%m-%d %H:%M:%S %z',
+        '%Y-%m-%d %H:%M:%S.%f',
+        '%Y-%m-%d %H:%M:%S',
+        '%Y-%m-%dT%H:%M:%S.%f%z',
+        '%Y-%m-%dT%H:%M:%S%z',
+    ]
+
+    for fmt in formats:
+        try:
+            dt = datetime.strptime(value.strip(), fmt)
+            if dt.tzinfo is None:
+                dt = timezone.make_aware(dt)
+            return dt
+        except ValueError:
+            continue
+    return None
+
+
+def parse_decimal(value, default=Decimal('0')):
+    """Parse decimal from string."""
+    if not value or value.strip() == '':
+        return default
+    try:
+        return Decimal(value.strip())
+    except (InvalidOperation, ValueError):
+        return default
+
+
+def parse_bool(value):
+    """Parse boolean from string."""
+    if not value:
+        return False
+    return value.lower() in ('true', '1', 'yes', 't')
+
+
+def parse_int(value, default=None):
+    """Parse integer from string."""
+    if not value or value.strip() == '':
+        return default
+    try:
+        return int(value.strip())
+    except ValueError:
+        return default
+
+
+def load_json(value):
+    """Parse JSON from string, treating missing or invalid values as empty."""
+    if not value or value.strip() == '':
+        return {}
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return {}
+
+
+def parse_json(value):
+    """Parse JSON from string, returned as JSON text for COPY."""
+    return json.dumps(load_json(value))
+
+
+def parse_str(value):
+    """Strip a text value, treating missing values as empty."""
+    return (value or '').strip()
+
+
+def parse_nullable_str(value):
+    """Strip a text value, treating empty values as NULL."""
+    return (value or '').strip() or None
+
+
+class TableSpec:
+    """
+    How one CSV export maps onto a model.
+
+    ``columns`` is a list of ``(column, csv_field, parser)``. Columns that are
+    not model fields only exist in the staging table, e.g. ``parent_original_id``.
+    ``references`` maps foreign key names to the staging column holding the
+    ``original_id`` of the referenced row.
+    """
+
+    def __init__(self, model, patterns, columns, references=None):
+        self.model_label = model
+        self.patterns = patterns
+        self.columns = columns
+        self.references = references or {}
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def find_file(self, data_dir):
+        """Return the newest export matching one of the patterns, if any."""
+        for pattern in self.patterns:
+            matches = sorted(Path(data_dir).glob(pattern))
+            if matches:
+                return matches[-1]
+        return None
+
+    def parse_row(self, row):
+        return tuple(parser(row.get(field)) for _, field, parser in self.columns)
+
+
+USER_COLUMNS = [
+    ('original_id', 'id', parse_int),
+    ('parent_original_id', 'parent_id', parse_int),
+    ('username', 'username', parse_str),
+    ('email', 'email', parse_nullable_str),
+    ('password_hash', 'password', parse_str),
+    ('referral_code', 'referral_code', parse_str),
+    ('referral_code_confirmed', 'referral_code_confirmed', parse_bool),
+    ('wallet', 'wallet', parse_str),
+    ('is_superuser', 'is_superuser', parse_bool),
+    ('is_staff', 'is_staff', parse_bool),
+    ('is_active', 'is_active', parse_bool),
+    ('is_deleted', 'is_deleted', parse_bool),
+    ('is_blocked', 'is_blocked', parse_bool),
+    ('date_joined', 'date_joined', parse_datetime),
+    ('parent_changed_at', 'parent_changed_at', parse_datetime),
+    ('original_lft', 'lft', parse_int),
+    ('original_rght', 'rght', parse_int),
+    ('original_tree_id', 'tree_id', parse_int),
+    ('original_level', 'level', parse_int),
+]
+
+PURCHASE_COLUMNS = [
+    ('original_id', 'id', parse_int),
+    ('created_at', 'created_at', parse_datetime),
+    ('buyer_original_id', 'buyer_id', parse_int),
+    ('tx_hash', 'tx_hash', parse_str),
+    ('block_number', 'block_number', parse_int),
+    ('contract_address', 'contract_address', parse_str),
+    ('metadata', 'metadata', parse_json),
+    ('payment_status', 'payment_status', parse_str),
+    ('referral_system_status', 'referral_system_status', parse_int),
+]
+
+PLATFORMS = {
+    'limitless': {
+        'users': TableSpec(
+            'limitless.LimitlessUser',
+            ['limitless_users.csv', 'jggl_users_*.csv'],
+            USER_COLUMNS,
+            references={'parent': 'parent_original_id'},
+        ),
+        'purchases': TableSpec(
+            'limitless.LimitlessPurchase',
+            ['limitless_purchases.csv', 'jggl_purchases_*.csv'],
+            PURCHASE_COLUMNS + [
+                ('amount_usdt', 'amount_usdt', parse_decimal),
+                ('pack_id', 'pack_id', parse_int),
+            ],
+            references={'buyer': 'buyer_original_id'},
+        ),
+        'earnings': TableSpec(
+            'limitless.LimitlessEarning',
+            ['limitless_referral_earnings.csv', 'jggl_ref_earnings_*.csv'],
+            [
+                ('original_id', 'id', parse_int),
+                ('created_at', 'created_at', parse_datetime),
+                ('recipient_original_id', 'recipient_id', parse_int),
+                ('buyer_original_id', 'buyer_id', parse_int),
+                ('purchase_original_id', 'purchase_id', parse_int),
+                ('earning_type', 'earning_type', parse_str),
+                ('level', 'level', parse_int),
+                ('percentage', 'percentage', parse_decimal),
+                ('amount_usdt', 'amount_usdt', parse_decimal),
+                ('status', 'status', parse_str),
+                ('is_grace_period', 'is_grace_period', parse_bool),
+                ('recipient_was_active', 'recipient_was_active', parse_bool),
+                ('compression_applied', 'compression_applied', parse_bool),
+                ('original_level', 'original_level', parse_int),
+                ('shares_count', 'shares_count', parse_int),
+                ('distribution_id', 'distribution_id', parse_int),
+            ],
+            references={
+                'recipient': 'recipient_original_id',
+                'buyer': 'buyer_original_id',
+                'purchase': 'purchase_original_id',
+            },
+        ),
+    },
+    'boostyfi': {
+        'users': TableSpec(
+            'boostyfi.BoostyFiUser',
+            ['boostyfi_users.csv'],
+            USER_COLUMNS + [
+                ('referral_type', 'referral_type', parse_str),
+                ('evm_address', 'evm_address', parse_str),
+                ('tron_address', 'tron_address', parse_str),
+                ('locked_atla_balance', 'locked_atla_balance', parse_decimal),
+                ('unlocked_atla_balance', 'unlocked_atla_balance', parse_decimal),
+            ],
+            references={'parent': 'parent_original_id'},
+        ),
+        'purchases': TableSpec(
+            'boostyfi.BoostyFiPurchase',
+            ['boostyfi_purchases.csv'],
+            PURCHASE_COLUMNS + [
+                ('amount', 'amount', parse_decimal),
+                ('full_amount', 'full_amount', parse_decimal),
+                ('discount_rate', 'discount_rate', parse_decimal),
+                ('payment_type', 'payment_type', parse_str),
+                ('jggl_pack_id', 'jggl_pack_id', parse_int),
+                ('atla_pack_id', 'atla_pack_id', parse_int),
+                ('paylink_invoice_id', 'paylink_invoice_id', parse_str),
+                ('paylink_reference_id', 'paylink_reference_id', parse_str),
+            ],
+            references={'buyer': 'buyer_original_id'},
+        ),
+        'earnings': TableSpec(
+            'boostyfi.BoostyFiEarning',
+            ['boostyfi_referral_earnings.csv'],
+            [
+                ('original_id', 'id', parse_int),
+                ('created_at', 'created_at', parse_datetime),
+                ('user_original_id', 'user_id', parse_int),
+                ('buyer_original_id', 'buyer_id', parse_int),
+                ('purchase_original_id', 'purchase_id', parse_int),
+                ('earning_type', 'earning_type', parse_str),
+                ('generation_level', 'generation_level', parse_int),
+                ('percentage', 'percentage', parse_decimal),
+                ('amount', 'amount', parse_decimal),
+                ('referral_pool', 'referral_pool', parse_decimal),
+                ('referral_system_type', 'referral_system_type', parse_int),
+                ('status', 'status', parse_str),
+                ('ppv', 'ppv', parse_decimal),
+                ('tv', 'tv', parse_decimal),
+                ('tier', 'tier', parse_int),
+                ('qualification_reason', 'qualification_reason', parse_str),
+                ('tx_amount', 'tx_amount', parse_decimal),
+                ('rpr', 'rpr', parse_decimal),
+                ('calculated_at', 'calculated_at', parse_datetime),
+                ('is_sponsor_earning', 'is_sponsor_earning', parse_bool),
+                ('sponsor_withhold_amount', 'sponsor_withhold_amount', parse_decimal),
+            ],
+            references={
+                'user': 'user_original_id',
+                'buyer': 'buyer_original_id',
+                'purchase': 'purchase_original_id',
+            },
+        ),
+    },
+}
+
+# Load order; later tables reference the earlier ones
+TABLES = ['users', 'purchases', 'earnings']
+
+
+class CopyImporter:
+    """
+    Reload of one platform from its CSV exports using COPY.
+
+    Files are looked up in ``data_dir`` and ``data_dir/<platform>``, so both
+    the ``sheets/`` layout and the dated ``jggl_*`` exports work. Tables whose
+    file is missing keep their rows, unless they reference a table that is
+    loaded, in which case they are emptied. Loading a table upserts its rows
+    on ``original_id``, so existing rows keep their pk (and with it seller
+    assignments and bookmarked URLs), and deletes the rows missing from the
+    export.
+
+    With ``delta=True`` nothing is emptied or deleted: rows are only written
+    when their content hash or resolved references changed, rows missing
+    from the export are reported but kept, and the nested sets are only
+    rebuilt when users were added or moved.
+
+    With ``swap=True`` the reload goes into copies of the tables in a
+    separate schema, where indexes, constraints and aggregates are built
+    before the copies replace the live tables in one short transaction.
+    Readers see the old data until then, and rows keep their pk.
+    """
+
+    def __init__(self, platform, data_dir, log=print, delta=False, swap=False):
+        self.platform = platform
+        self.specs = PLATFORMS[platform]
+        self.data_dir = Path(data_dir)
+        self.log = log
+        self.delta = delta
+        self.swap = swap
+        self.live_schema = None
+        self.published = False
+        # Trees whose users or their rows a delta wrote, None once renumbered
+        self.touched_trees = set()
+
+    def find_files(self):
+        files = {}
+        for name in TABLES:
+            spec = self.specs[name]
+            path = spec.find_file(self.data_dir / self.platform) or spec.find_file(self.data_dir)
+            if path:
+                files[name] = path
+        return files
+
+    @contextmanager
+    def stage(self, name):
+        """Time a stage and log its throughput from the row count it sets."""
+        progress = {'rows': 0}
+        started = time.monotonic()
+        yield progress
+        elapsed = time.monotonic() - started
+        rate = progress['rows'] / elapsed if elapsed else 0
+        self.log(f'{self.platform} {name}: {progress["rows"]:,} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)')
+
+    def run(self):
+        files = self.find_files()
+        if not files:
+            self.log(f'{self.platform}: no export files found in {self.data_dir}')
+            return {}
+
+        if self.swap:
+            return self.run_swap(files)
+
+        with transaction.atomic():
+            if not self.delta:
+                # Tables without an export that reference a loaded one
+                first = next(name for name in TABLES if name in files)
+                for name in TABLES[TABLES.index(first):]:
+                    if name not in files:
+                        self.truncate(self.specs[name].model)
+            loaded, changed = self.load(files)
+            if changed:
+                self.refresh_aggregates()
+                self.publish()
+            else:
+                self.log(f'{self.platform} aggregates: nothing changed, skipped')
+        return loaded
+
+    def run_swap(self, files):
+        models = self.shadow_models()
+        shadow = f'shadow_{self.platform}'
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT current_schema()')
+            self.live_schema = cursor.fetchone()[0]
+        # Captured outside the shadow search_path so references stay unqualified
+        definitions = self.table_definitions(models)
+
+        # Tables loaded before the first export present are copied as they are
+        first = next(name for name in TABLES if name in files)
+        kept = [self.specs[name].model for name in TABLES[:TABLES.index(first)]]
+
+        # Separate transactions: an index built in the transaction that just
+        # rewrote its table cannot be used by that same transaction
+        try:
+            with self.shadow_transaction(shadow):
+                with self.stage('shadow tables') as progress:
+                    progress['rows'] = self.create_shadow_tables(shadow, models, kept)
+                loaded, _ = self.load(files)
+            with self.shadow_transaction(shadow):
+                with self.stage('indexes and constraints') as progress:
+                    progress['rows'] = self.create_definitions(definitions, models)
+            with self.shadow_transaction(shadow):
+                self.refresh_aggregates()
+            with self.stage('swap') as progress:
+                progress['rows'] = self.swap_tables(shadow, models)
+        except Exception:
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP SCHEMA IF EXISTS {qn(shadow)} CASCADE')
+            raise
+        self.publish()
+        return loaded
+
+    @contextmanager
+    def shadow_transaction(self, shadow):
+        """Transaction in which unqualified table names resolve to the shadow copies."""
+        qn = connection.ops.quote_name
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(f'SET LOCAL search_path TO {qn(shadow)}, {qn(self.live_schema)}')
+            yield
+
+    def load(self, files):
+        """Load the tables that have an export. Returns ``(loaded, changed)``."""
+        user_model = self.specs['users'].model
+        loaded = {}
+        changed = False
+        for name in TABLES:
+            if name not in files:
+                continue
+            spec = self.specs[name]
+            self.log(f'{self.platform} {name}: loading {files[name]}')
+            staging = f'staging_{self.platform}_{name}'
+
+            with self.stage(f'{name} copy') as progress:
+                staged = progress['rows'] = self.copy_to_staging(spec, staging, files[name])
+            with self.stage(f'{name} {"insert" if self.swap else "upsert"}') as progress:
+                inserted, updated = self.insert_from_staging(spec, staging)
+                progress['rows'] = loaded[name] = inserted + updated
+            if self.delta:
+                self.log(
+                    f'{self.platform} {name}: {inserted:,} new, {updated:,} changed, '
+                    f'{staged - inserted - updated:,} unchanged, '
+                    f'{self.count_missing(spec, staging):,} missing from the export (kept)'
+                )
+            elif not self.swap:
+                with self.stage(f'{name} delete missing') as progress:
+                    progress['rows'] = self.delete_missing(spec, staging)
+                changed = changed or bool(progress['rows'])
+            changed = changed or bool(loaded[name])
+
+            if name == 'users':
+                with self.stage('parent links') as progress:
+                    moved = progress['rows'] = self.link_parents(spec, staging)
+                changed = changed or bool(moved)
+                if self.delta and not (inserted or moved):
+                    self.log(f'{self.platform} nested sets: no new or moved users, skipped')
+                    continue
+                with self.stage('nested sets') as progress:
+                    progress['rows'] = user_model.objects.bulk_rebuild()
+                self.touched_trees = None
+        return loaded, changed
+
+    def refresh_aggregates(self):
+        """
+        Refresh the counters, team tables and wallet index: of the trees a
+        delta touched, unless it renumbered them, or else of every tree.
+        """
+        user_model = self.specs['users'].model
+        tree_ids = self.touched_trees if self.delta else None
+        users = user_model.objects.all()
+        if tree_ids is not None:
+            tree_ids = sorted(tree_ids)
+            users = users.filter(tree_id__in=tree_ids)
+            self.log(f'{self.platform} aggregates: limited to {len(tree_ids):,} touched trees')
+        with self.stage('aggregates') as progress:
+            user_model.objects.refresh_aggregates(tree_ids)
+            progress['rows'] = users.count()
+
+    def publish(self):
+        """Bump the dataset version and snapshot the stats of the new data."""
+        started = time.monotonic()
+        version = DatasetVersion.publish(self.platform)
+        self.published = True
+        self.log(
+            f'{self.platform}: published dataset version {version}, '
+            f'stats snapshot in {time.monotonic() - started:.2f}s'
+        )
+
+    def truncate(self, model):
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {connection.ops.quote_name(model._meta.db_table)} CASCADE')
+
+    def shadow_models(self):
+        """The imported models plus every model referencing them, e.g. the team tables."""
+        models = [self.specs[name].model for name in TABLES]
+        for model in models:
+            for relation in model._meta.related_objects:
+                related = relation.related_model
+                if (relation.one_to_many or relation.one_to_one) and related not in models:
+                    models.append(related)
+        return models
+
+    def table_definitions(self, models):
+        """
+        SQL recreating the keys, indexes and foreign keys of the live tables,
+        in that order, for tables of the same name earlier in the search_path.
+        """
+        qn = connection.ops.quote_name
+        keys, indexes, foreign_keys = [], [], []
+        with connection.cursor() as cursor:
+            for model in models:
+                table = qn(model._meta.db_table)
+                live = f'{qn(self.live_schema)}.{table}'
+                cursor.execute(
+                    "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+                    "WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f', 'x') "
+                    "ORDER BY conname",
+                    [live]
+                )
+                for name, kind, definition in cursor.fetchall():
+                    statement = f'ALTER TABLE {table} ADD CONSTRAINT {qn(name)} {definition}'
+                    (foreign_keys if kind == 'f' else keys).append(statement)
+                cursor.execute(
+                    "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index AS i "
+                    "WHERE i.indrelid = %s::regclass AND NOT EXISTS ("
+                    "SELECT 1 FROM pg_constraint AS c "
+                    "WHERE c.conindid = i.indexrelid AND c.conrelid = i.indrelid"
+                    ") ORDER BY i.indexrelid",
+                    [live]
+                )
+                for definition, in cursor.fetchall():
+                    indexes.append(definition.replace(
+                        f' ON {self.live_schema}.{model._meta.db_table} ', f' ON {table} ', 1
+                    ))
+        return keys + indexes + foreign_keys
+
+    def create_shadow_tables(self, shadow, models, kept):
+        """
+        Create empty copies of the live tables in the ``shadow`` schema, with
+        their identity sequences continuing from the live ones. The ``kept``
+        models are copied row for row. Returns the number of copied rows.
+        """
+        qn = connection.ops.quote_name
+        rows = 0
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP SCHEMA IF EXISTS {qn(shadow)} CASCADE')
+            cursor.execute(f'CREATE SCHEMA {qn(shadow)}')
+            for model in models:
+                table = qn(model._meta.db_table)
+                live = f'{qn(self.live_schema)}.{table}'
+                copy = f'{qn(shadow)}.{table}'
+                cursor.execute(
+                    f'CREATE TABLE {copy} (LIKE {live} '
+                    'INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING CONSTRAINTS)'
+                )
+                self.continue_sequence(cursor, live, copy, model._meta.pk.column)
+                if model in kept:
+                    cursor.execute(f'INSERT INTO {copy} SELECT * FROM {live}')
+                    rows += cursor.rowcount
+        return rows
+
+    def continue_sequence(self, cursor, live, copy, column):
+        """Start the copy's identity sequence where the live one stands."""
+        cursor.execute(
+            'SELECT pg_get_serial_sequence(%s, %s), pg_get_serial_sequence(%s, %s)',
+            [live, column, copy, column]
+        )
+        live_sequence, copy_sequence = cursor.fetchone()
+        if live_sequence is None:
+            return
+        cursor.execute(f'SELECT last_value, is_called FROM {live_sequence}')
+        last_value, is_called = cursor.fetchone()
+        cursor.execute('SELECT setval(%s, %s, false)', [copy_sequence, last_value + 1 if is_called else last_value])
+
+    def create_definitions(self, definitions, models):
+        """Build the captured keys and indexes, then refresh planner statistics."""
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for statement in definitions:
+                cursor.execute(statement)
+            for model in models:
+                cursor.execute(f'ANALYZE {qn(model._meta.db_table)}')
+        return len(definitions)
+
+    def swap_tables(self, shadow, models):
+        """Replace the live tables with the shadow copies in one transaction."""
+        qn = connection.ops.quote_name
+        live = qn(self.live_schema)
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Give up rather than queue every reader behind a long-running query
+            cursor.execute("SET LOCAL lock_timeout = '10s'")
+            cursor.execute(
+                f'DROP TABLE {", ".join(f"{live}.{qn(model._meta.db_table)}" for model in models)}'
+            )
+            for model in models:
+                cursor.execute(f'ALTER TABLE {qn(shadow)}.{qn(model._meta.db_table)} SET SCHEMA {live}')
+            cursor.execute(f'DROP SCHEMA {qn(shadow)}')
+        return len(models)
+
+    def staging_columns(self, spec):
+        """Staging column definitions, typed like the model fields they feed."""
+        model_fields = {field.name: field for field in spec.model._meta.concrete_fields}
+        definitions = []
+        for column, _, _ in spec.columns:
+            field = model_fields.get(column)
+            db_type = field.db_type(connection) if field else 'integer'
+            definitions.append(f'{connection.ops.quote_name(column)} {db_type}')
+        return definitions
+
+    def copy_to_staging(self, spec, staging, path):
+        """
+        Stream the CSV through COPY into a temp table, returning the row
+        count. Of rows repeating an original_id only the last one is kept,
+        as the row by row import did; the upsert may touch each row once.
+        """
+        columns = [column for column, _, _ in spec.columns]
+        quoted = ', '.join(connection.ops.quote_name(column) for column in columns)
+        rows = 0
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {staging}')
+            cursor.execute(
+                f'CREATE TEMP TABLE {staging} ({", ".join(self.staging_columns(spec))}) '
+                'ON COMMIT DROP'
+            )
+            with cursor.copy(f'COPY {staging} ({quoted}) FROM STDIN') as copy:
+                for row in iter_csv(path):
+                    values = spec.parse_row(row)
+                    if not values[0]:  # rows without an original_id
+                        continue
+                    copy.write_row(values)
+                    rows += 1
+            cursor.execute(f'ANALYZE {staging}')
+            # COPY appends in file order, so the last copy has the highest ctid
+            cursor.execute(
+                f'DELETE FROM {staging} AS s WHERE EXISTS ('
+                f'SELECT 1 FROM {staging} AS later '
+                f'WHERE later.original_id = s.original_id AND later.ctid > s.ctid)'
+            )
+            if cursor.rowcount:
+                rows -= cursor.rowcount
+                self.log(
+                    f'{self.platform} {spec.model._meta.model_name}: {cursor.rowcount:,} rows '
+                    f'repeating an original_id replaced by their last occurrence'
+                )
+        return rows
+
+    def insert_from_staging(self, spec, staging):
+        """
+        Insert the staged rows, resolving references to other tables with
+        joins on ``original_id``. Fields missing from the export get their
+        model default. Returns ``(inserted, updated)``.
+
+        Existing rows are updated in place, keeping their pk, tree fields and
+        counters; in delta mode only when the content hash or a resolved
+        foreign key differs, adding the trees of the users the written rows
+        are or were linked to to ``touched_trees``. The shadow tables of a
+        swap start empty and take the pks from the join on the live table
+        instead.
+        """
+        model = spec.model
+        qn = connection.ops.quote_name
+        staged = {column for column, _, _ in spec.columns}
+        tree_fields = set()
+        if hasattr(model, '_mptt_meta'):
+            opts = model._mptt_meta
+            tree_fields = {opts.tree_id_attr, opts.left_attr, opts.right_attr, opts.level_attr}
+        targets, selects, joins, params = [], [], [], []
+        updates = []  # columns taken from the export on conflict
+        resolved = []  # foreign keys resolved from other tables
+
+        for field in model._meta.concrete_fields:
+            if field.primary_key:
+                if self.swap:
+                    # Rows already in the live table keep their pk
+                    joins.append(
+                        f'LEFT JOIN {qn(self.live_schema)}.{qn(model._meta.db_table)} AS live '
+                        f'ON live.original_id = s.original_id'
+                    )
+                    selects.append(f'COALESCE(live.{qn(field.column)}, nextval(pg_get_serial_sequence(%s, %s)))')
+                    params.extend([model._meta.db_table, field.column])
+                    targets.append(qn(field.column))
+                continue
+            column = qn(field.column)
+            if field.name == 'content_hash':
+                selects.append('md5(s::text)')
+                updates.append(column)
+            elif field.name in spec.references and field.related_model is not model:
+                alias = f'ref_{field.name}'
+                related = field.related_model._meta.db_table
+                joins.append(
+                    f'LEFT JOIN {qn(related)} AS {alias} '
+                    f'ON {alias}.original_id = s.{qn(spec.references[field.name])}'
+                )
+                selects.append(f'{alias}.{qn(field.related_model._meta.pk.column)}')
+                updates.append(column)
+                resolved.append(column)
+            elif field.name in staged:
+                if getattr(field, 'auto_now_add', False):
+                    selects.append(f'COALESCE(s.{column}, now())')
+                else:
+                    selects.append(f's.{column}')
+                updates.append(column)
+            elif getattr(field, 'auto_now', False):
+                selects.append('now()')
+                updates.append(column)
+            elif getattr(field, 'auto_now_add', False):
+                selects.append('now()')
+            elif field.name in spec.references:
+                selects.append('NULL')  # self references are linked after the insert
+            elif field.name in tree_fields:
+                selects.append('0')  # numbered by bulk_rebuild()
+            else:
+                selects.append('%s')
+                params.append(field.get_db_prep_save(field.get_default(), connection))
+            targets.append(column)
+
+        sql = (
+            f'INSERT INTO {qn(model._meta.db_table)} AS t ({", ".join(targets)}) '
+            f'SELECT {", ".join(selects)} FROM {staging} AS s {" ".join(joins)}'
+        )
+        with connection.cursor() as cursor:
+            if self.swap:
+                cursor.execute(sql, params)
+                return cursor.rowcount, 0
+            assignments = ', '.join(f'{column} = EXCLUDED.{column}' for column in updates)
+            # A full load rewrites every row: unchanged rows may still point
+            # at referenced rows deleted as missing from their export. The
+            # hash covers the staged original_ids, not the ids they resolve
+            # to, so a delta also rewrites rows whose reference now resolves
+            condition = ''
+            if self.delta:
+                changed = ['t.content_hash IS DISTINCT FROM EXCLUDED.content_hash'] + [
+                    f't.{column} IS DISTINCT FROM EXCLUDED.{column}' for column in resolved
+                ]
+                condition = f'WHERE {" OR ".join(changed)} '
+            if not self.delta:
+                cursor.execute(
+                    f'WITH written AS ({sql} ON CONFLICT (original_id) DO UPDATE SET {assignments} '
+                    f'RETURNING xmax = 0 AS inserted) '
+                    f'SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) '
+                    f'FROM written',
+                    params
+                )
+                return cursor.fetchone()
+
+            # Users of the written rows before and after the write: the
+            # sibling SELECTs read the table as it was before the upsert
+            table = qn(model._meta.db_table)
+            pk = qn(model._meta.pk.column)
+            user_model = self.specs['users'].model
+            user_columns = [pk] if model is user_model else [
+                qn(field.column) for field in model._meta.concrete_fields
+                if field.is_relation and field.related_model is user_model
+            ]
+            touched = ' UNION '.join(
+                f'SELECT written.{column} FROM written UNION '
+                f'SELECT old.{column} FROM {table} AS old JOIN written ON old.{pk} = written.written_pk'
+                for column in user_columns
+            )
+            cursor.execute(
+                f'WITH written AS ({sql} ON CONFLICT (original_id) DO UPDATE SET {assignments} '
+                f'{condition}'
+                f'RETURNING xmax = 0 AS inserted, t.{pk} AS written_pk, '
+                f'{", ".join(f"t.{column}" for column in user_columns)}) '
+                f'SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted), '
+                f'ARRAY(SELECT DISTINCT tree_id FROM {qn(user_model._meta.db_table)} '
+                f'WHERE {qn(user_model._meta.pk.column)} IN ({touched})) '
+                f'FROM written',
+                params
+            )
+            inserted, updated, tree_ids = cursor.fetchone()
+            if self.touched_trees is not None:
+                self.touched_trees.update(tree_ids)
+            return inserted, updated
+
+    def count_missing(self, spec, staging):
+        """Count rows whose original_id is no longer in the export."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {connection.ops.quote_name(spec.model._meta.db_table)} AS t '
+                f'WHERE NOT EXISTS (SELECT 1 FROM {staging} AS s WHERE s.original_id = t.original_id)'
+            )
+            return cursor.fetchone()[0]
+
+    def delete_missing(self, spec, staging):
+        """
+        Delete the rows whose original_id is no longer in the export. Rows
+        referencing them are rewritten, deleted or emptied later in the same
+        transaction, before the deferred foreign keys are checked.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {connection.ops.quote_name(spec.model._meta.db_table)} AS t '
+                f'WHERE NOT EXISTS (SELECT 1 FROM {staging} AS s WHERE s.original_id = t.original_id)'
+            )
+            return cursor.rowcount
+
+    def link_parents(self, spec, staging):
+        """
+        Set the self-referencing parent links with one UPDATE ... FROM,
+        returning the number of users whose parent changed.
+        """
+        qn = connection.ops.quote_name
+        table = qn(spec.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} AS u SET parent_id = p.id '
+                f'FROM {staging} AS s LEFT JOIN {table} AS p '
+                f'ON p.original_id = s.{qn(spec.references["parent"])} '
+                f'WHERE u.original_id = s.original_id AND u.parent_id IS DISTINCT FROM p.id'
+            )
+            return cursor.rowcount
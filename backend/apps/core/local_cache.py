@@ -0,0 +1,112 @@
+"""
+Per-process LRU tier in front of the shared response cache.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from prometheus_client import Counter, Gauge
+
+HITS = Counter(
+    'response_local_cache_hits_total', 'Responses served from the per-process cache', ['dataset']
+)
+MISSES = Counter(
+    'response_local_cache_misses_total', 'Per-process cache lookups that fell through to Redis', ['dataset']
+)
+EVICTIONS = Counter(
+    'response_local_cache_evictions_total',
+    'Entries dropped from the per-process cache, by reason (size, expired, version)',
+    ['dataset', 'reason'],
+)
+SIZE = Gauge('response_local_cache_bytes', 'Pickled size of the per-process cache entries')
+
+
+class LocalCache:
+    """
+    Least recently used cache of response bodies in process memory, bounded
+    by the total pickled size of its entries and by a lifetime per entry.
+
+    Entries belong to a dataset; once ``sync()`` sees another version of
+    the dataset, the entries cached under the previous one are dropped at
+    once instead of waiting to age out.
+
+    ``set()`` stores a detached copy of the value, sized by its pickle, and
+    ``get()`` returns that stored object itself, shared by every thread
+    serving the entry: callers must treat it as read-only (``attach_sellers``
+    returns a filled-in copy rather than changing it).
+    """
+
+    def __init__(self, max_bytes, timeout):
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        # key -> (dataset, payload, size, expires)
+        self.entries = OrderedDict()
+        self.versions = {}
+        self.size = 0
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0 and self.timeout > 0
+
+    def sync(self, dataset, version):
+        """Record the current ``version`` of ``dataset``, dropping older entries."""
+        if not self.enabled or self.versions.get(dataset) == version:
+            return
+        with self.lock:
+            self.versions[dataset] = version
+            stale = [key for key, entry in self.entries.items() if entry[0] == dataset]
+            for key in stale:
+                self.discard(key, 'version')
+
+    def get(self, dataset, key):
+        if not self.enabled:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[3] <= time.monotonic():
+                self.discard(key, 'expired')
+                entry = None
+            if entry is None:
+                MISSES.labels(dataset).inc()
+                return None
+            self.entries.move_to_end(key)
+        HITS.labels(dataset).inc()
+        return entry[1]
+
+    def set(self, dataset, key, value):
+        """Cache a detached copy of ``value``, unless it alone exceeds the size bound."""
+        if not self.enabled:
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        size = len(pickled)
+        if size > self.max_bytes:
+            return
+        # Round trip once here rather than on every hit: the copy shares
+        # nothing with the caller and drops serializer references that
+        # DRF's ReturnDict/ReturnList would otherwise keep alive
+        payload = pickle.loads(pickled)
+        with self.lock:
+            if key in self.entries:
+                self.discard(key, None)
+            self.entries[key] = (dataset, payload, size, time.monotonic() + self.timeout)
+            self.size += size
+            while self.size > self.max_bytes:
+                self.discard(next(iter(self.entries)), 'size')
+            SIZE.set(self.size)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.versions.clear()
+            self.size = 0
+            SIZE.set(0)
+
+    def discard(self, key, reason):
+        # Called with the lock held
+        dataset, _, size, _ = self.entries.pop(key)
+        self.size -= size
+        SIZE.set(self.size)
+        if reason:
+            EVICTIONS.labels(dataset, reason).inc()
@@ -0,0 +1,78 @@
+"""
+Management command to bulk load CSV exports with PostgreSQL COPY.
+"""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.importing import CopyImporter, ImportInProgress, import_lock
+from apps.core.tasks import post_import_pipeline
+
+
+class Command(BaseCommand):
+    help = 'Reload platform data from CSV exports using COPY into staging tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--app',
+            type=str,
+            choices=['limitless', 'boostyfi', 'all'],
+            default='all',
+            help='Which app data to import (default: all)'
+        )
+        parser.add_argument(
+            '--data-dir',
+            type=str,
+            default='../sheets',
+            help='Directory with the exports, either sheets/ or a dated export folder (default: ../sheets)'
+        )
+        parser.add_argument(
+            '--delta',
+            action='store_true',
+            help='Upsert new and changed rows only instead of reloading the tables'
+        )
+        parser.add_argument(
+            '--swap',
+            action='store_true',
+            help='Reload into shadow tables and swap them in, keeping the live tables readable'
+        )
+        parser.add_argument(
+            '--no-warm',
+            action='store_true',
+            help='Do not queue the post-import pipeline warming the response cache'
+        )
+
+    def handle(self, *args, **options):
+        data_dir = Path(options['data_dir'])
+
+        if not data_dir.exists():
+            raise CommandError(f"Data directory not found: {data_dir}")
+
+        if options['delta'] and options['swap']:
+            raise CommandError('--delta and --swap cannot be combined')
+
+        app = options['app']
+        for platform in ['limitless', 'boostyfi']:
+            if app not in [platform, 'all']:
+                continue
+            importer = CopyImporter(
+                platform, data_dir, log=self.stdout.write, delta=options['delta'], swap=options['swap']
+            )
+            try:
+                with import_lock(platform):
+                    loaded = importer.run()
+            except ImportInProgress as e:
+                raise CommandError(str(e))
+            if loaded:
+                summary = ', '.join(f'{count:,} {name}' for name, count in loaded.items())
+                verb = 'wrote' if options['delta'] else 'loaded'
+                self.stdout.write(self.style.SUCCESS(f'{platform}: {verb} {summary}'))
+            if importer.published and not options['no_warm']:
+                self.queue_pipeline(platform)
+
+        self.stdout.write(self.style.SUCCESS('Import completed successfully!'))
+
+    def queue_pipeline(self, platform):
+        """Queue the warming of the published version, once the import lock is free."""
+        task_id = post_import_pipeline.delay(platform, rebuild=False).id
+        self.stdout.write(f'{platform}: queued the post-import pipeline ({task_id})')
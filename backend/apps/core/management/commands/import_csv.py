@@ -1,15 +1,16 @@
 """
 Management command to import CSV data into PostgreSQL.
 """
-import csv
-import json
-from datetime import datetime
-from decimal import Decimal, InvalidOperation
 from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
-from django.utils import timezone
+from django.db import connection, transaction
+
+from apps.core.importing import (
+    IdMap, ImportInProgress, import_lock, iter_csv, load_json, parse_bool, parse_datetime, parse_decimal, parse_int,
+)
+from apps.core.models import Dataset, DatasetVersion
+from apps.core.tasks import post_import_pipeline
 
 
 class Command(BaseCommand):
@@ -34,6 +35,11 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing data before import'
         )
+        parser.add_argument(
+            '--no-warm',
+            action='store_true',
+            help='Do not queue the post-import pipeline warming the response cache'
+        )
 
     def handle(self, *args, **options):
         sheets_dir = Path(options['sheets_dir'])
@@ -44,82 +50,60 @@ class Command(BaseCommand):
         app = options['app']
         clear = options['clear']
         
-        if app in ['limitless', 'all']:
-            self.import_limitless(sheets_dir / 'limitless', clear)
-        
-        if app in ['boostyfi', 'all']:
-            self.import_boostyfi(sheets_dir / 'boostyfi', clear)
-        
-        self.stdout.write(self.style.SUCCESS('Import completed successfully!'))
-
-    def parse_datetime(self, value):
-        """Parse datetime from various formats."""
-        if not value or value.strip() == '':
-            return None
-        
-        formats = [
-            '%Y-%m-%d %H:%M:%S.%f %z',
-            '%Y-%m-%d %H:%M:%S %z',
-            '%Y-%m-%d %H:%M:%S.%f',
-            '%Y-%m-%d %H:%M:%S',
-            '%Y-%m-%dT%H:%M:%S.%f%z',
-            '%Y-%m-%dT%H:%M:%S%z',
-        ]
-        
-        for fmt in formats:
-            try:
-                dt = datetime.strptime(value.strip(), fmt)
-                if dt.tzinfo is None:
-                    dt = timezone.make_aware(dt)
-                return dt
-            except ValueError:
+        importers = {'limitless': self.import_limitless, 'boostyfi': self.import_boostyfi}
+        for platform, run_import in importers.items():
+            if app not in [platform, 'all']:
                 continue
+            try:
+                with import_lock(platform):
+                    run_import(sheets_dir / platform, clear)
+            except ImportInProgress as e:
+                raise CommandError(str(e))
+            if not options['no_warm']:
+                self.queue_pipeline(platform)
         
-        self.stdout.write(self.style.WARNING(f"Could not parse datetime: {value}"))
-        return None
-
-    def parse_decimal(self, value, default=Decimal('0')):
-        """Parse decimal from string."""
-        if not value or value.strip() == '':
-            return default
-        try:
-            return Decimal(value.strip())
-        except (InvalidOperation, ValueError):
-            return default
-
-    def parse_bool(self, value):
-        """Parse boolean from string."""
-        if not value:
-            return False
-        return value.lower() in ('true', '1', 'yes', 't')
+        self.stdout.write(self.style.SUCCESS('Import completed successfully!'))
 
-    def parse_int(self, value, default=None):
-        """Parse integer from string."""
-        if not value or value.strip() == '':
-            return default
-        try:
-            return int(value.strip())
-        except ValueError:
-            return default
+    def queue_pipeline(self, platform):
+        """Queue the warming of the published version, once the import lock is free."""
+        task_id = post_import_pipeline.delay(platform, rebuild=False).id
+        self.stdout.write(f'{platform}: queued the post-import pipeline ({task_id})')
 
-    def parse_json(self, value):
-        """Parse JSON from string."""
-        if not value or value.strip() == '':
-            return {}
-        try:
-            return json.loads(value)
-        except json.JSONDecodeError:
-            return {}
+    def parse_datetime(self, value):
+        """Parse datetime, warning about values in none of the known formats."""
+        dt = parse_datetime(value)
+        if dt is None and value and value.strip():
+            self.stdout.write(self.style.WARNING(f"Could not parse datetime: {value}"))
+        return dt
 
     def read_csv(self, filepath):
-        """Read CSV file and return list of dicts."""
+        """Stream CSV rows as dicts."""
         if not filepath.exists():
             self.stdout.write(self.style.WARNING(f"File not found: {filepath}"))
-            return []
-        
-        with open(filepath, 'r', encoding='utf-8-sig') as f:  # utf-8-sig handles BOM
-            reader = csv.DictReader(f)
-            return list(reader)
+            return iter(())
+        return iter_csv(filepath)
+
+    def link_parents(self, model, users_file, user_ids):
+        """
+        Set parent links from a second pass over the users file, COPYing the
+        pairs into a temp table applied with one UPDATE ... FROM.
+        """
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            # Dropped on commit, but a caller's outer transaction may import twice
+            cursor.execute('DROP TABLE IF EXISTS parent_links')
+            cursor.execute('CREATE TEMP TABLE parent_links (id bigint PRIMARY KEY, parent_id bigint) ON COMMIT DROP')
+            with cursor.copy('COPY parent_links (id, parent_id) FROM STDIN') as copy:
+                for row in self.read_csv(users_file):
+                    user_id = user_ids.get(parse_int(row.get('id')))
+                    parent_id = user_ids.get(parse_int(row.get('parent_id')))
+                    if user_id and parent_id:
+                        copy.write_row((user_id, parent_id))
+            cursor.execute(
+                f'UPDATE {qn(model._meta.db_table)} AS u SET parent_id = l.parent_id '
+                'FROM parent_links AS l WHERE u.id = l.id'
+            )
+            return cursor.rowcount
 
     @transaction.atomic
     def import_limitless(self, data_dir, clear=False):
@@ -135,87 +119,72 @@ class Command(BaseCommand):
             LimitlessUser.objects.all().delete()
         
         # Import users first
-        users_data = self.read_csv(data_dir / 'limitless_users.csv')
-        self.stdout.write(f'Found {len(users_data)} users to import')
-        
-        user_map = {}  # original_id -> instance
-        parent_map = {}  # original_id -> parent_original_id
+        users_file = data_dir / 'limitless_users.csv'
+        users_count = 0
         
         # First pass: create all users without parents
-        for row in users_data:
-            original_id = self.parse_int(row.get('id'))
+        for row in self.read_csv(users_file):
+            original_id = parse_int(row.get('id'))
             if not original_id:
                 continue
             
-            parent_id = self.parse_int(row.get('parent_id'))
-            if parent_id:
-                parent_map[original_id] = parent_id
-            
-            user, created = LimitlessUser.objects.update_or_create(
+            LimitlessUser.objects.update_or_create(
                 original_id=original_id,
                 defaults={
                     'username': row.get('username', '').strip(),
                     'email': row.get('email', '').strip() or None,
                     'password_hash': row.get('password', '').strip(),
                     'referral_code': row.get('referral_code', '').strip(),
-                    'referral_code_confirmed': self.parse_bool(row.get('referral_code_confirmed')),
+                    'referral_code_confirmed': parse_bool(row.get('referral_code_confirmed')),
                     'wallet': row.get('wallet', '').strip(),
-                    'is_superuser': self.parse_bool(row.get('is_superuser')),
-                    'is_staff': self.parse_bool(row.get('is_staff')),
-                    'is_active': self.parse_bool(row.get('is_active')),
-                    'is_deleted': self.parse_bool(row.get('is_deleted')),
-                    'is_blocked': self.parse_bool(row.get('is_blocked')),
+                    'is_superuser': parse_bool(row.get('is_superuser')),
+                    'is_staff': parse_bool(row.get('is_staff')),
+                    'is_active': parse_bool(row.get('is_active')),
+                    'is_deleted': parse_bool(row.get('is_deleted')),
+                    'is_blocked': parse_bool(row.get('is_blocked')),
                     'date_joined': self.parse_datetime(row.get('date_joined')),
                     'parent_changed_at': self.parse_datetime(row.get('parent_changed_at')),
-                    'original_lft': self.parse_int(row.get('lft')),
-                    'original_rght': self.parse_int(row.get('rght')),
-                    'original_tree_id': self.parse_int(row.get('tree_id')),
-                    'original_level': self.parse_int(row.get('level')),
+                    'original_lft': parse_int(row.get('lft')),
+                    'original_rght': parse_int(row.get('rght')),
+                    'original_tree_id': parse_int(row.get('tree_id')),
+                    'original_level': parse_int(row.get('level')),
                 }
             )
-            user_map[original_id] = user
+            users_count += 1
         
-        self.stdout.write(f'Created/updated {len(user_map)} users')
+        self.stdout.write(f'Created/updated {users_count} users')
         
         # Second pass: set parent relationships
-        for original_id, parent_original_id in parent_map.items():
-            if original_id in user_map and parent_original_id in user_map:
-                user = user_map[original_id]
-                user.parent = user_map[parent_original_id]
-                user.save(update_fields=['parent'])
-        
-        self.stdout.write('Set parent relationships')
+        user_ids = IdMap.from_queryset(LimitlessUser.objects.all())
+        linked = self.link_parents(LimitlessUser, users_file, user_ids)
+        self.stdout.write(f'Set {linked} parent relationships')
         
         # Rebuild MPTT tree
-        LimitlessUser.objects.rebuild()
+        LimitlessUser.objects.bulk_rebuild()
         self.stdout.write('Rebuilt MPTT tree')
         
         # Import purchases
-        purchases_data = self.read_csv(data_dir / 'limitless_purchases.csv')
-        self.stdout.write(f'Found {len(purchases_data)} purchases to import')
-        
-        purchase_map = {}  # original_id -> instance
-        for row in purchases_data:
-            original_id = self.parse_int(row.get('id'))
+        purchases_count = 0
+        for row in self.read_csv(data_dir / 'limitless_purchases.csv'):
+            original_id = parse_int(row.get('id'))
             if not original_id:
                 continue
             
-            buyer_original_id = self.parse_int(row.get('buyer_id'))
-            buyer = user_map.get(buyer_original_id)
+            buyer_original_id = parse_int(row.get('buyer_id'))
             
             purchase, created = LimitlessPurchase.objects.update_or_create(
                 original_id=original_id,
                 defaults={
-                    'buyer': buyer,
+                    'buyer_id': user_ids.get(buyer_original_id),
                     'buyer_original_id': buyer_original_id,
-                    'amount_usdt': self.parse_decimal(row.get('amount_usdt')),
+                    'amount_usdt': parse_decimal(row.get('amount_usdt')),
                     'tx_hash': row.get('tx_hash', '').strip(),
-                    'block_number': self.parse_int(row.get('block_number')),
+                    'block_number': parse_int(row.get('block_number')),
                     'contract_address': row.get('contract_address', '').strip(),
-                    'metadata': self.parse_json(row.get('metadata')),
+                    'metadata': load_json(row.get('metadata')),
                     'payment_status': row.get('payment_status', 'PENDING').strip(),
-                    'referral_system_status': self.parse_int(row.get('referral_system_status')),
-                    'pack_id': self.parse_int(row.get('pack_id')),
+                    'referral_system_status': parse_int(row.get('referral_system_status')),
+                    'pack_id': parse_int(row.get('pack_id')),
                 }
             )
             
@@ -225,43 +194,42 @@ class Command(BaseCommand):
                 purchase.created_at = created_at
                 purchase.save(update_fields=['created_at'])
             
-            purchase_map[original_id] = purchase
+            purchases_count += 1
         
-        self.stdout.write(f'Created/updated {len(purchase_map)} purchases')
+        self.stdout.write(f'Created/updated {purchases_count} purchases')
         
         # Import earnings
-        earnings_data = self.read_csv(data_dir / 'limitless_referral_earnings.csv')
-        self.stdout.write(f'Found {len(earnings_data)} earnings to import')
-        
-        for row in earnings_data:
-            original_id = self.parse_int(row.get('id'))
+        purchase_ids = IdMap.from_queryset(LimitlessPurchase.objects.all())
+        earnings_count = 0
+        for row in self.read_csv(data_dir / 'limitless_referral_earnings.csv'):
+            original_id = parse_int(row.get('id'))
             if not original_id:
                 continue
             
-            recipient_original_id = self.parse_int(row.get('recipient_id'))
-            buyer_original_id = self.parse_int(row.get('buyer_id'))
-            purchase_original_id = self.parse_int(row.get('purchase_id'))
+            recipient_original_id = parse_int(row.get('recipient_id'))
+            buyer_original_id = parse_int(row.get('buyer_id'))
+            purchase_original_id = parse_int(row.get('purchase_id'))
             
             earning, created = LimitlessEarning.objects.update_or_create(
                 original_id=original_id,
                 defaults={
-                    'recipient': user_map.get(recipient_original_id),
+                    'recipient_id': user_ids.get(recipient_original_id),
                     'recipient_original_id': recipient_original_id,
-                    'buyer': user_map.get(buyer_original_id),
+                    'buyer_id': user_ids.get(buyer_original_id),
                     'buyer_original_id': buyer_original_id,
-                    'purchase': purchase_map.get(purchase_original_id),
+                    'purchase_id': purchase_ids.get(purchase_original_id),
                     'purchase_original_id': purchase_original_id,
                     'earning_type': row.get('earning_type', 'NETWORK').strip(),
-                    'level': self.parse_int(row.get('level')),
-                    'percentage': self.parse_decimal(row.get('percentage')),
-                    'amount_usdt': self.parse_decimal(row.get('amount_usdt')),
+                    'level': parse_int(row.get('level')),
+                    'percentage': parse_decimal(row.get('percentage')),
+                    'amount_usdt': parse_decimal(row.get('amount_usdt')),
                     'status': row.get('status', 'PENDING').strip(),
-                    'is_grace_period': self.parse_bool(row.get('is_grace_period')),
-                    'recipient_was_active': self.parse_bool(row.get('recipient_was_active')),
-                    'compression_applied': self.parse_bool(row.get('compression_applied')),
-                    'original_level': self.parse_int(row.get('original_level')),
-                    'shares_count': self.parse_int(row.get('shares_count')),
-                    'distribution_id': self.parse_int(row.get('distribution_id')),
+                    'is_grace_period': parse_bool(row.get('is_grace_period')),
+                    'recipient_was_active': parse_bool(row.get('recipient_was_active')),
+                    'compression_applied': parse_bool(row.get('compression_applied')),
+                    'original_level': parse_int(row.get('original_level')),
+                    'shares_count': parse_int(row.get('shares_count')),
+                    'distribution_id': parse_int(row.get('distribution_id')),
                 }
             )
             
@@ -270,8 +238,19 @@ class Command(BaseCommand):
             if created_at:
                 earning.created_at = created_at
                 earning.save(update_fields=['created_at'])
+            
+            earnings_count += 1
+        
+        self.stdout.write(f'Created/updated {earnings_count} earnings')
+        
+        # Recompute denormalized counters and team tables
+        LimitlessUser.objects.refresh_aggregates()
+        self.stdout.write('Refreshed counters, team volume index, team rollups and wallet addresses')
+        
+        version = DatasetVersion.publish(Dataset.LIMITLESS)
+        self.stdout.write(f'Published dataset version {version} with a fresh stats snapshot')
         
-        self.stdout.write(self.style.SUCCESS(f'Limitless import completed'))
+        self.stdout.write(self.style.SUCCESS('Limitless import completed'))
 
     @transaction.atomic
     def import_boostyfi(self, data_dir, clear=False):
@@ -287,96 +266,81 @@ class Command(BaseCommand):
             BoostyFiUser.objects.all().delete()
         
         # Import users first
-        users_data = self.read_csv(data_dir / 'boostyfi_users.csv')
-        self.stdout.write(f'Found {len(users_data)} users to import')
-        
-        user_map = {}  # original_id -> instance
-        parent_map = {}  # original_id -> parent_original_id
+        users_file = data_dir / 'boostyfi_users.csv'
+        users_count = 0
         
         # First pass: create all users without parents
-        for row in users_data:
-            original_id = self.parse_int(row.get('id'))
+        for row in self.read_csv(users_file):
+            original_id = parse_int(row.get('id'))
             if not original_id:
                 continue
             
-            parent_id = self.parse_int(row.get('parent_id'))
-            if parent_id:
-                parent_map[original_id] = parent_id
-            
-            user, created = BoostyFiUser.objects.update_or_create(
+            BoostyFiUser.objects.update_or_create(
                 original_id=original_id,
                 defaults={
                     'username': row.get('username', '').strip(),
                     'email': row.get('email', '').strip() or None,
                     'password_hash': row.get('password', '').strip(),
                     'referral_code': row.get('referral_code', '').strip(),
-                    'referral_code_confirmed': self.parse_bool(row.get('referral_code_confirmed')),
+                    'referral_code_confirmed': parse_bool(row.get('referral_code_confirmed')),
                     'referral_type': row.get('referral_type', '').strip(),
                     'wallet': row.get('wallet', '').strip(),
                     'evm_address': row.get('evm_address', '').strip(),
                     'tron_address': row.get('tron_address', '').strip(),
-                    'locked_atla_balance': self.parse_decimal(row.get('locked_atla_balance')),
-                    'unlocked_atla_balance': self.parse_decimal(row.get('unlocked_atla_balance')),
-                    'is_superuser': self.parse_bool(row.get('is_superuser')),
-                    'is_staff': self.parse_bool(row.get('is_staff')),
-                    'is_active': self.parse_bool(row.get('is_active')),
-                    'is_deleted': self.parse_bool(row.get('is_deleted')),
-                    'is_blocked': self.parse_bool(row.get('is_blocked')),
+                    'locked_atla_balance': parse_decimal(row.get('locked_atla_balance')),
+                    'unlocked_atla_balance': parse_decimal(row.get('unlocked_atla_balance')),
+                    'is_superuser': parse_bool(row.get('is_superuser')),
+                    'is_staff': parse_bool(row.get('is_staff')),
+                    'is_active': parse_bool(row.get('is_active')),
+                    'is_deleted': parse_bool(row.get('is_deleted')),
+                    'is_blocked': parse_bool(row.get('is_blocked')),
                     'date_joined': self.parse_datetime(row.get('date_joined')),
                     'parent_changed_at': self.parse_datetime(row.get('parent_changed_at')),
-                    'original_lft': self.parse_int(row.get('lft')),
-                    'original_rght': self.parse_int(row.get('rght')),
-                    'original_tree_id': self.parse_int(row.get('tree_id')),
-                    'original_level': self.parse_int(row.get('level')),
+                    'original_lft': parse_int(row.get('lft')),
+                    'original_rght': parse_int(row.get('rght')),
+                    'original_tree_id': parse_int(row.get('tree_id')),
+                    'original_level': parse_int(row.get('level')),
                 }
             )
-            user_map[original_id] = user
+            users_count += 1
         
-        self.stdout.write(f'Created/updated {len(user_map)} users')
+        self.stdout.write(f'Created/updated {users_count} users')
         
         # Second pass: set parent relationships
-        for original_id, parent_original_id in parent_map.items():
-            if original_id in user_map and parent_original_id in user_map:
-                user = user_map[original_id]
-                user.parent = user_map[parent_original_id]
-                user.save(update_fields=['parent'])
-        
-        self.stdout.write('Set parent relationships')
+        user_ids = IdMap.from_queryset(BoostyFiUser.objects.all())
+        linked = self.link_parents(BoostyFiUser, users_file, user_ids)
+        self.stdout.write(f'Set {linked} parent relationships')
         
         # Rebuild MPTT tree
-        BoostyFiUser.objects.rebuild()
+        BoostyFiUser.objects.bulk_rebuild()
         self.stdout.write('Rebuilt MPTT tree')
         
         # Import purchases
-        purchases_data = self.read_csv(data_dir / 'boostyfi_purchases.csv')
-        self.stdout.write(f'Found {len(purchases_data)} purchases to import')
-        
-        purchase_map = {}  # original_id -> instance
-        for row in purchases_data:
-            original_id = self.parse_int(row.get('id'))
+        purchases_count = 0
+        for row in self.read_csv(data_dir / 'boostyfi_purchases.csv'):
+            original_id = parse_int(row.get('id'))
             if not original_id:
                 continue
             
-            buyer_original_id = self.parse_int(row.get('buyer_id'))
-            buyer = user_map.get(buyer_original_id)
+            buyer_original_id = parse_int(row.get('buyer_id'))
             
             purchase, created = BoostyFiPurchase.objects.update_or_create(
                 original_id=original_id,
                 defaults={
-                    'buyer': buyer,
+                    'buyer_id': user_ids.get(buyer_original_id),
                     'buyer_original_id': buyer_original_id,
-                    'amount': self.parse_decimal(row.get('amount')),
-                    'full_amount': self.parse_decimal(row.get('full_amount')),
-                    'discount_rate': self.parse_decimal(row.get('discount_rate')),
+                    'amount': parse_decimal(row.get('amount')),
+                    'full_amount': parse_decimal(row.get('full_amount')),
+                    'discount_rate': parse_decimal(row.get('discount_rate')),
                     'tx_hash': row.get('tx_hash', '').strip(),
-                    'block_number': self.parse_int(row.get('block_number')),
+                    'block_number': parse_int(row.get('block_number')),
                     'contract_address': row.get('contract_address', '').strip(),
-                    'metadata': self.parse_json(row.get('metadata')),
+                    'metadata': load_json(row.get('metadata')),
                     'payment_status': row.get('payment_status', 'PENDING').strip(),
                     'payment_type': row.get('payment_type', 'CRYPTO').strip(),
-                    'referral_system_status': self.parse_int(row.get('referral_system_status')),
-                    'jggl_pack_id': self.parse_int(row.get('jggl_pack_id')),
-                    'atla_pack_id': self.parse_int(row.get('atla_pack_id')),
+                    'referral_system_status': parse_int(row.get('referral_system_status')),
+                    'jggl_pack_id': parse_int(row.get('jggl_pack_id')),
+                    'atla_pack_id': parse_int(row.get('atla_pack_id')),
                     'paylink_invoice_id': row.get('paylink_invoice_id', '').strip(),
                     'paylink_reference_id': row.get('paylink_reference_id', '').strip(),
                 }
@@ -388,48 +352,47 @@ class Command(BaseCommand):
                 purchase.created_at = created_at
                 purchase.save(update_fields=['created_at'])
             
-            purchase_map[original_id] = purchase
+            purchases_count += 1
         
-        self.stdout.write(f'Created/updated {len(purchase_map)} purchases')
+        self.stdout.write(f'Created/updated {purchases_count} purchases')
         
         # Import earnings
-        earnings_data = self.read_csv(data_dir / 'boostyfi_referral_earnings.csv')
-        self.stdout.write(f'Found {len(earnings_data)} earnings to import')
-        
-        for row in earnings_data:
-            original_id = self.parse_int(row.get('id'))
+        purchase_ids = IdMap.from_queryset(BoostyFiPurchase.objects.all())
+        earnings_count = 0
+        for row in self.read_csv(data_dir / 'boostyfi_referral_earnings.csv'):
+            original_id = parse_int(row.get('id'))
             if not original_id:
                 continue
             
-            user_original_id = self.parse_int(row.get('user_id'))
-            buyer_original_id = self.parse_int(row.get('buyer_id'))
-            purchase_original_id = self.parse_int(row.get('purchase_id'))
+            user_original_id = parse_int(row.get('user_id'))
+            buyer_original_id = parse_int(row.get('buyer_id'))
+            purchase_original_id = parse_int(row.get('purchase_id'))
             
             earning, created = BoostyFiEarning.objects.update_or_create(
                 original_id=original_id,
                 defaults={
-                    'user': user_map.get(user_original_id),
+                    'user_id': user_ids.get(user_original_id),
                     'user_original_id': user_original_id,
-                    'buyer': user_map.get(buyer_original_id),
+                    'buyer_id': user_ids.get(buyer_original_id),
                     'buyer_original_id': buyer_original_id,
-                    'purchase': purchase_map.get(purchase_original_id),
+                    'purchase_id': purchase_ids.get(purchase_original_id),
                     'purchase_original_id': purchase_original_id,
                     'earning_type': row.get('earning_type', 'NETWORK').strip(),
-                    'generation_level': self.parse_int(row.get('generation_level')),
-                    'percentage': self.parse_decimal(row.get('percentage')),
-                    'amount': self.parse_decimal(row.get('amount')),
-                    'referral_pool': self.parse_decimal(row.get('referral_pool')),
-                    'referral_system_type': self.parse_int(row.get('referral_system_type')),
+                    'generation_level': parse_int(row.get('generation_level')),
+                    'percentage': parse_decimal(row.get('percentage')),
+                    'amount': parse_decimal(row.get('amount')),
+                    'referral_pool': parse_decimal(row.get('referral_pool')),
+                    'referral_system_type': parse_int(row.get('referral_system_type')),
                     'status': row.get('status', 'PENDING').strip(),
-                    'ppv': self.parse_decimal(row.get('ppv')),
-                    'tv': self.parse_decimal(row.get('tv')),
-                    'tier': self.parse_int(row.get('tier')),
+                    'ppv': parse_decimal(row.get('ppv')),
+                    'tv': parse_decimal(row.get('tv')),
+                    'tier': parse_int(row.get('tier')),
                     'qualification_reason': row.get('qualification_reason', '').strip(),
-                    'tx_amount': self.parse_decimal(row.get('tx_amount')),
-                    'rpr': self.parse_decimal(row.get('rpr')),
+                    'tx_amount': parse_decimal(row.get('tx_amount')),
+                    'rpr': parse_decimal(row.get('rpr')),
                     'calculated_at': self.parse_datetime(row.get('calculated_at')),
-                    'is_sponsor_earning': self.parse_bool(row.get('is_sponsor_earning')),
-                    'sponsor_withhold_amount': self.parse_decimal(row.get('sponsor_withhold_amount')),
+                    'is_sponsor_earning': parse_bool(row.get('is_sponsor_earning')),
+                    'sponsor_withhold_amount': parse_decimal(row.get('sponsor_withhold_amount')),
                 }
             )
             
@@ -438,5 +401,16 @@ class Command(BaseCommand):
             if created_at:
                 earning.created_at = created_at
                 earning.save(update_fields=['created_at'])
+            
+            earnings_count += 1
+        
+        self.stdout.write(f'Created/updated {earnings_count} earnings')
+        
+        # Recompute denormalized counters and team tables
+        BoostyFiUser.objects.refresh_aggregates()
+        self.stdout.write('Refreshed counters, team volume index, team rollups and wallet addresses')
+        
+        version = DatasetVersion.publish(Dataset.BOOSTYFI)
+        self.stdout.write(f'Published dataset version {version} with a fresh stats snapshot')
         
-        self.stdout.write(self.style.SUCCESS(f'BoostyFi import completed'))
+        self.stdout.write(self.style.SUCCESS('BoostyFi import completed'))
@@ -0,0 +1,60 @@
+"""
+Management command to recompute the denormalized user counters and check them for drift.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized user counters (children, purchases, volume, earnings)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--app',
+            type=str,
+            choices=['limitless', 'boostyfi', 'all'],
+            default='all',
+            help='Which app counters to refresh (default: all)'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift, fail if any counter is stale'
+        )
+
+    def handle(self, *args, **options):
+        from apps.limitless.models import LimitlessUser
+        from apps.boostyfi.models import BoostyFiUser
+
+        models = {
+            'limitless': LimitlessUser,
+            'boostyfi': BoostyFiUser,
+        }
+        app = options['app']
+        check = options['check']
+
+        total_drift = 0
+        for name, model in models.items():
+            if app not in [name, 'all']:
+                continue
+
+            drifted = model.objects.with_counter_drift()
+            drift_count = drifted.count()
+            total_drift += drift_count
+
+            if drift_count:
+                sample = drifted.values_list('original_id', flat=True)[:10]
+                self.stdout.write(self.style.WARNING(
+                    f'{name}: {drift_count} users with stale counters '
+                    f'(e.g. original_id {", ".join(map(str, sample))})'
+                ))
+            else:
+                self.stdout.write(f'{name}: counters are up to date')
+
+            if not check:
+                with transaction.atomic():
+                    updated = model.objects.refresh_counters()
+                self.stdout.write(self.style.SUCCESS(f'{name}: recomputed counters for {updated} users'))
+
+        if check and total_drift:
+            raise CommandError(f'{total_drift} users have stale counters')
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.9 on 2026-10-16 20:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletAddress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(db_index=True, max_length=255)),
+                ('owner_type', models.CharField(choices=[('limitless_user', 'Limitless User'), ('boostyfi_user', 'BoostyFi User'), ('wallet_profile', 'Wallet Profile')], max_length=20)),
+                ('owner_id', models.IntegerField()),
+                ('field', models.CharField(max_length=50)),
+            ],
+            options={
+                'verbose_name': 'Wallet Address',
+                'verbose_name_plural': 'Wallet Addresses',
+                'unique_together': {('address', 'owner_type', 'owner_id', 'field')},
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.9 on 2026-10-16 20:50
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_wallet_address'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset', models.CharField(choices=[('limitless', 'Limitless'), ('boostyfi', 'BoostyFi'), ('wallet_profiles', 'Wallet Profiles')], max_length=20, unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Dataset Version',
+                'verbose_name_plural': 'Dataset Versions',
+            },
+        ),
+        migrations.CreateModel(
+            name='StatsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset', models.CharField(choices=[('limitless', 'Limitless'), ('boostyfi', 'BoostyFi'), ('wallet_profiles', 'Wallet Profiles')], max_length=20, unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Stats Snapshot',
+                'verbose_name_plural': 'Stats Snapshots',
+            },
+        ),
+    ]
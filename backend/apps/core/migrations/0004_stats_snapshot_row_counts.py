@@ -0,0 +1,18 @@
+# Generated by Django 5.0.9 on 2026-10-16 20:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_stats_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='statssnapshot',
+            name='row_counts',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -1,9 +1,17 @@
 """
 Base models for the project.
 """
-from django.db import models
+import json
+import uuid
+
+from django.apps import apps
+from django.db import models, transaction
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .wallets import canonical_address, split_addresses
 
 
 class TimeStampedModel(models.Model):
@@ -91,17 +99,315 @@ class SellerAssignment(TimeStampedModel):
             target_user_id=target_user_id
         ).select_related('seller')
     
+    def to_seller_info(self) -> dict:
+        """Serialize the seller side of this assignment."""
+        return {
+            'id': self.id,
+            'seller_id': self.seller.id,
+            'seller_name': self.seller.full_name or self.seller.username,
+            'seller_username': self.seller.username,
+            'created_at': self.created_at.isoformat(),
+        }
+    
     @classmethod
     def get_seller_names_for_user(cls, platform: str, target_user_id: int) -> list:
         """Get list of seller names for a specific wallet."""
         assignments = cls.get_assignments_for_user(platform, target_user_id)
-        return [
-            {
-                'id': a.id,
-                'seller_id': a.seller.id,
-                'seller_name': a.seller.full_name or a.seller.username,
-                'seller_username': a.seller.username,
-                'created_at': a.created_at.isoformat(),
-            }
-            for a in assignments
-        ]
+        return [a.to_seller_info() for a in assignments]
+    
+    @staticmethod
+    def state_key(platform):
+        return f'seller-assignments-state:{platform}'
+    
+    @classmethod
+    def state_token(cls, platform: str) -> str:
+        """
+        Opaque token of the assignments on ``platform``, replaced by
+        ``touch()`` on every change. A token lost from the cache is replaced
+        by a new one, so it never repeats for different assignments.
+        """
+        key = cls.state_key(platform)
+        token = cache.get(key)
+        if token is None:
+            token = uuid.uuid4().hex
+            if not cache.add(key, token, None):
+                token = cache.get(key) or token
+        return token
+    
+    @classmethod
+    def touch(cls, platform: str):
+        """Replace the state token of ``platform`` after its assignments changed."""
+        cache.set(cls.state_key(platform), uuid.uuid4().hex, None)
+    
+    @classmethod
+    def get_seller_names_for_users(cls, platform: str, target_user_ids) -> dict:
+        """
+        Get seller names for many wallets with one query.
+        Returns a dict of target_user_id -> list of seller info.
+        """
+        assignments = cls.objects.filter(
+            platform=platform,
+            target_user_id__in=list(target_user_ids)
+        ).select_related('seller')
+        
+        result = {}
+        for a in assignments:
+            result.setdefault(a.target_user_id, []).append(a.to_seller_info())
+        return result
+
+
+class WalletOwner(models.TextChoices):
+    """Kinds of rows a wallet address can belong to."""
+    LIMITLESS_USER = 'limitless_user', 'Limitless User'
+    BOOSTYFI_USER = 'boostyfi_user', 'BoostyFi User'
+    WALLET_PROFILE = 'wallet_profile', 'Wallet Profile'
+
+
+class WalletAddress(models.Model):
+    """
+    Lookup table from canonical wallet address to every user and profile row
+    holding it, in any of their wallet fields. Rebuilt per owner type by the
+    importers.
+    """
+    address = models.CharField(max_length=255, db_index=True)
+    owner_type = models.CharField(max_length=20, choices=WalletOwner.choices)
+    # The pk of the LimitlessUser, BoostyFiUser or WalletProfile
+    owner_id = models.IntegerField()
+    # The field the address was found in
+    field = models.CharField(max_length=50)
+    
+    class Meta:
+        verbose_name = 'Wallet Address'
+        verbose_name_plural = 'Wallet Addresses'
+        unique_together = [['address', 'owner_type', 'owner_id', 'field']]
+    
+    def __str__(self):
+        return f"{self.address} -> {self.owner_type}:{self.owner_id} ({self.field})"
+    
+    @classmethod
+    def rebuild(cls, owner_type, queryset, fields, partial=False):
+        """
+        Replace the addresses of one owner type with those found in ``fields``
+        of ``queryset``, or with ``partial`` only those of the owners in
+        ``queryset``. Comma-separated values hold several addresses.
+        """
+        rows = queryset.order_by().values_list('pk', *fields)
+        stale = cls.objects.filter(owner_type=owner_type)
+        if partial:
+            stale = stale.filter(owner_id__in=queryset.order_by().values('pk'))
+        with transaction.atomic():
+            stale.delete()
+            cls.objects.bulk_create(
+                (
+                    cls(address=address, owner_type=owner_type, owner_id=pk, field=field)
+                    for pk, *values in rows.iterator()
+                    for field, value in zip(fields, values)
+                    for address in split_addresses(value)
+                ),
+                batch_size=1000
+            )
+    
+    @classmethod
+    def get_owners(cls, address) -> dict:
+        """
+        Find every row holding ``address`` with one index lookup.
+        Returns owner_type -> {owner_id: [matched fields]}.
+        """
+        return cls.get_owners_many([address]).get(canonical_address(address), {})
+    
+    @classmethod
+    def get_owners_many(cls, addresses, owner_type=None) -> dict:
+        """
+        Find the rows holding any of ``addresses`` with one index lookup,
+        optionally of one owner type only.
+        Returns canonical address -> owner_type -> {owner_id: [matched fields]}.
+        """
+        queryset = cls.objects.filter(address__in={canonical_address(a) for a in addresses})
+        if owner_type:
+            queryset = queryset.filter(owner_type=owner_type)
+        
+        result = {}
+        for address, owner_type, owner_id, field in queryset.values_list(
+            'address', 'owner_type', 'owner_id', 'field'
+        ):
+            result.setdefault(address, {}).setdefault(owner_type, {}).setdefault(owner_id, []).append(field)
+        return result
+
+
+class Dataset(models.TextChoices):
+    """Imported datasets, each versioned and summarized on its own."""
+    LIMITLESS = 'limitless', 'Limitless'
+    BOOSTYFI = 'boostyfi', 'BoostyFi'
+    WALLET_PROFILES = 'wallet_profiles', 'Wallet Profiles'
+
+
+# Tables whose row counts are kept in each dataset's stats snapshot
+DATASET_MODELS = {
+    Dataset.LIMITLESS: ['limitless.LimitlessUser', 'limitless.LimitlessPurchase', 'limitless.LimitlessEarning'],
+    Dataset.BOOSTYFI: ['boostyfi.BoostyFiUser', 'boostyfi.BoostyFiPurchase', 'boostyfi.BoostyFiEarning'],
+    Dataset.WALLET_PROFILES: ['limitless.WalletProfile'],
+}
+
+
+class DatasetVersion(models.Model):
+    """
+    Version counter of a dataset, bumped by every import that changes it,
+    so data derived from the dataset can tell which import it reflects.
+    """
+    dataset = models.CharField(max_length=20, choices=Dataset.choices, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Dataset Version'
+        verbose_name_plural = 'Dataset Versions'
+    
+    def __str__(self):
+        return f"{self.dataset} v{self.version}"
+    
+    @classmethod
+    def current(cls, dataset) -> int:
+        """Current version of ``dataset``, 0 before its first import."""
+        return cls.objects.filter(dataset=dataset).values_list('version', flat=True).first() or 0
+    
+    @staticmethod
+    def cache_key(dataset):
+        return f'dataset-version:{dataset}'
+    
+    @classmethod
+    def cached(cls, dataset):
+        """
+        ``(version, published_at)`` of ``dataset`` read through the default
+        cache, where ``publish()`` stores every new version once its
+        transaction commits. published_at is None before the first import.
+        """
+        key = cls.cache_key(dataset)
+        state = cache.get(key)
+        if state is None:
+            row = cls.objects.filter(dataset=dataset).values_list('version', 'updated_at').first()
+            state = row or (0, None)
+            # add() so a version published meanwhile is not overwritten
+            cache.add(key, state, settings.RESPONSE_CACHE_TIMEOUT)
+        return state
+    
+    @classmethod
+    def publish(cls, dataset, stats=None) -> int:
+        """
+        Record a new version of ``dataset`` once an import is committed and
+        refresh its stats snapshot, from ``stats`` when already collected.
+        Returns the new version.
+        """
+        with transaction.atomic():
+            row, _ = cls.objects.select_for_update().get_or_create(dataset=dataset)
+            row.version += 1
+            row.save(update_fields=['version', 'updated_at'])
+            StatsSnapshot.refresh(dataset, row.version, stats)
+            transaction.on_commit(lambda: cache.set(
+                cls.cache_key(dataset), (row.version, row.updated_at), settings.RESPONSE_CACHE_TIMEOUT
+            ))
+        return row.version
+
+
+class StatsSnapshot(models.Model):
+    """
+    Stored result of a dataset's stats endpoint. Refreshed when the dataset
+    is published after an import and periodically by Celery beat, so the
+    endpoints read one row instead of aggregating on every request.
+    """
+    dataset = models.CharField(max_length=20, choices=Dataset.choices, unique=True)
+    # The dataset version the stats were computed from
+    version = models.PositiveBigIntegerField(default=0)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    # Model label -> row count of each table in DATASET_MODELS
+    row_counts = models.JSONField(default=dict)
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Stats Snapshot'
+        verbose_name_plural = 'Stats Snapshots'
+    
+    def __str__(self):
+        return f"{self.dataset} stats v{self.version} at {self.computed_at:%Y-%m-%d %H:%M}"
+    
+    @staticmethod
+    def compute(dataset) -> dict:
+        """Aggregate the stats of ``dataset`` from its tables."""
+        if dataset == Dataset.LIMITLESS:
+            from apps.limitless.models import LimitlessUser
+            return LimitlessUser.objects.compute_stats()
+        if dataset == Dataset.BOOSTYFI:
+            from apps.boostyfi.models import BoostyFiUser
+            return BoostyFiUser.objects.compute_stats()
+        if dataset == Dataset.WALLET_PROFILES:
+            from apps.limitless.models import WalletProfile
+            return WalletProfile.compute_stats()
+        raise ValueError(f"Unknown dataset: {dataset}")
+    
+    @staticmethod
+    def count_rows(dataset) -> dict:
+        """Count the rows of each table of ``dataset``."""
+        return {
+            label: apps.get_model(label).objects.count()
+            for label in DATASET_MODELS[dataset]
+        }
+    
+    @classmethod
+    def collect(cls, dataset) -> dict:
+        """
+        ``data`` and ``row_counts`` of a fresh snapshot of ``dataset``, in
+        the form they are stored in, so they compare equal to a stored one.
+        """
+        stats = {'data': cls.compute(dataset), 'row_counts': cls.count_rows(dataset)}
+        return json.loads(json.dumps(stats, cls=DjangoJSONEncoder))
+    
+    @classmethod
+    def refresh(cls, dataset, version=None, stats=None):
+        """Store the snapshot of ``dataset``, recomputing it unless ``stats`` is given."""
+        if version is None:
+            version = DatasetVersion.current(dataset)
+        if stats is None:
+            stats = cls.collect(dataset)
+        snapshot, _ = cls.objects.update_or_create(
+            dataset=dataset,
+            defaults={'version': version, **stats}
+        )
+        return snapshot
+    
+    @classmethod
+    def publish_if_changed(cls, dataset):
+        """
+        Recompute the snapshot of ``dataset`` and, if it differs from the
+        stored one, publish a new version with it, so cached stats and
+        responses of the old data are dropped. Returns the new version, or
+        None when nothing changed.
+        """
+        stats = cls.collect(dataset)
+        stored = cls.objects.filter(dataset=dataset).values('data', 'row_counts').first()
+        if stored == stats:
+            return None
+        return DatasetVersion.publish(dataset, stats)
+    
+    @classmethod
+    def get(cls, dataset):
+        """The stored snapshot of ``dataset``, computed on first use."""
+        return cls.objects.filter(dataset=dataset).first() or cls.refresh(dataset)
+    
+    @classmethod
+    def row_count(cls, model):
+        """
+        Row count of ``model``'s table as of its dataset's snapshot, or None
+        for tables outside DATASET_MODELS.
+        """
+        label = model._meta.label
+        for dataset, labels in DATASET_MODELS.items():
+            if label in labels:
+                return cls.get(dataset).row_counts.get(label)
+        return None
+    
+    def as_response(self) -> dict:
+        """Stats payload with the snapshot time and dataset version."""
+        return {
+            **self.data,
+            'snapshot_at': self.computed_at,
+            'dataset_version': self.version,
+        }
@@ -0,0 +1,214 @@
+"""
+Keyset (cursor) pagination for the large, append-mostly list endpoints.
+"""
+import base64
+import datetime
+import json
+from collections import OrderedDict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginate on the view's ordering with an opaque cursor holding the
+    ordering values of the last (or first) row of the current page.
+
+    Each page is a ``WHERE (ordering) > (cursor) ORDER BY ... LIMIT n`` that
+    an index on the ordering columns answers directly, however deep the page.
+    Unless the ordering already contains a unique field, the primary key is
+    appended as a tiebreaker so rows with equal values are neither skipped
+    nor repeated. Ordering fields must be non-null model fields.
+
+    No ``COUNT(*)`` is run per page: ``count`` is only included when the
+    request passes ``count=true``, counted exactly for a filtered list and
+    read from the dataset's stats snapshot for an unfiltered one. The latter
+    is approximate: it is the row count as of the last snapshot, taken when
+    the dataset is published and by the periodic refresh, so rows written
+    outside the importers are missing from it until then.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    invalid_cursor_message = 'Invalid cursor'
+    # Ordering to paginate on instead of the view's, e.g. for custom actions
+    ordering = None
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.keyset = self.get_ordering(request, queryset, view)
+        values, reverse = self.decode_cursor(request, queryset)
+        self.count = self.get_count(request, queryset)
+
+        ordering = [(name, desc != reverse) for name, desc in self.keyset]
+        if values is not None:
+            queryset = queryset.filter(self.keyset_condition(ordering, values))
+        queryset = queryset.order_by(*(f'-{name}' if desc else name for name, desc in ordering))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        """
+        ``[(field, descending)]`` from ``ordering`` or else the view's
+        ``OrderingFilter`` (or its ``ordering``), cut at the first unique
+        field or else extended by the primary key in the direction of the
+        last field. Fields may be model fields or annotations.
+        """
+        ordering = self.ordering
+        for backend in getattr(view, 'filter_backends', []) if ordering is None else []:
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if ordering is None:
+            ordering = getattr(view, 'ordering', None) or queryset.model._meta.ordering or ['pk']
+        if isinstance(ordering, str):
+            ordering = [ordering]
+
+        fields = []
+        for item in ordering:
+            name = item.lstrip('-')
+            fields.append((name, item.startswith('-')))
+            if self.get_field(queryset, name).unique:
+                return fields
+        return fields + [('pk', fields[-1][1] if fields else False)]
+
+    def get_count(self, request, queryset):
+        if request.query_params.get(self.count_query_param, '').lower() not in ('1', 'true'):
+            return None
+        if not queryset.query.where:
+            from apps.core.models import StatsSnapshot
+            count = StatsSnapshot.row_count(queryset.model)
+            if count is not None:
+                return count
+        return queryset.count()
+
+    @staticmethod
+    def keyset_condition(ordering, values):
+        """
+        Rows after ``values`` in ``ordering``: for each field, the earlier
+        fields are equal and this one is past its value. Spelled out as OR'd
+        terms rather than a row comparison so directions may be mixed, and
+        ANDed with the redundant bound on the leading field that lets the
+        planner walk the index range in order and stop at the page size.
+        """
+        condition = Q()
+        for index, (name, desc) in enumerate(ordering):
+            term = Q(**{f'{name}__{"lt" if desc else "gt"}': values[index]})
+            for (earlier, _), value in zip(ordering[:index], values):
+                term &= Q(**{earlier: value})
+            condition |= term
+        name, desc = ordering[0]
+        return Q(**{f'{name}__{"lte" if desc else "gte"}': values[0]}) & condition
+
+    def decode_cursor(self, request, queryset):
+        """``(values, reverse)`` from the cursor parameter, ``(None, False)`` without one."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            raw_values, reverse = payload['v'], bool(payload.get('r'))
+            if len(raw_values) != len(self.keyset):
+                raise ValueError
+            values = [
+                self.get_field(queryset, name).to_python(value)
+                for (name, _), value in zip(self.keyset, raw_values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def encode_cursor(self, row, reverse):
+        # isoformat() keeps the microseconds DjangoJSONEncoder would truncate
+        values = [
+            value.isoformat() if isinstance(value, (datetime.date, datetime.time)) else value
+            for value in (getattr(row, name) for name, _ in self.keyset)
+        ]
+        payload = json.dumps({'v': values, 'r': int(reverse)}, cls=DjangoJSONEncoder, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def get_field(queryset, name):
+        """Model field, or the output field of an annotation, named ``name``."""
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        opts = queryset.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {
+                    'type': 'integer',
+                    'nullable': True,
+                    'description': (
+                        'Only with count=true; approximate (as of the last stats snapshot) when unfiltered'
+                    ),
+                },
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class RootsPagination(KeysetPagination):
+    """Keyset pages of tree roots, sized by ``limit`` (50, at most 200)."""
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 200
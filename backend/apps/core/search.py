@@ -0,0 +1,31 @@
+"""
+Trigram search shared by the user and wallet profile search endpoints.
+"""
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import Q
+from django.db.models.functions import Greatest, Upper
+
+
+def trigram_index(field, name):
+    """
+    GIN trigram index over ``UPPER(field)``, the expression ``icontains``
+    compiles to on PostgreSQL, so substring filters can use the index.
+    """
+    return GinIndex(OpClass(Upper(field), name='gin_trgm_ops'), name=name)
+
+
+def trigram_search(queryset, fields, query):
+    """
+    Filter ``queryset`` to rows where any of ``fields`` contains ``query`` and
+    rank them by their best trigram similarity to it, most similar first.
+    Each field needs a ``trigram_index`` for the filter to avoid a full scan.
+    """
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__icontains': query})
+
+    scores = [TrigramSimilarity(field, query) for field in fields]
+    return queryset.filter(condition).annotate(
+        similarity=Greatest(*scores) if len(scores) > 1 else scores[0]
+    ).order_by('-similarity', *queryset.model._meta.ordering)
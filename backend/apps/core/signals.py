@@ -0,0 +1,14 @@
+"""
+Signal handlers of the core app.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import SellerAssignment
+
+
+@receiver([post_save, post_delete], sender=SellerAssignment)
+def seller_assignment_changed(sender, instance, **kwargs):
+    """Replace the platform's seller state token, which keys cached responses' ETags."""
+    transaction.on_commit(lambda: SellerAssignment.touch(instance.platform))
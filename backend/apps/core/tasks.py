@@ -1,8 +1,15 @@
 """
 Celery tasks for core app.
 """
-from celery import shared_task
+from celery import chain, shared_task
+from contextlib import contextmanager
 import logging
+import time
+
+from django.apps import apps
+
+from .importing import acquire_import_lock, release_import_lock
+from .models import DATASET_MODELS, Dataset, DatasetVersion, StatsSnapshot
 
 logger = logging.getLogger(__name__)
 
@@ -17,21 +24,138 @@ def sample_task():
 @shared_task
 def rebuild_tree_task(app_name: str):
     """
-    Task to rebuild MPTT tree structure.
+    Task to rebuild MPTT tree structure and the team tables derived from it.
     
     Args:
         app_name: Either 'limitless' or 'boostyfi'
     """
     if app_name == 'limitless':
         from apps.limitless.models import LimitlessUser
-        LimitlessUser.objects.rebuild()
+        LimitlessUser.objects.bulk_rebuild()
+        LimitlessUser.objects.refresh_aggregates()
+        DatasetVersion.publish(Dataset.LIMITLESS)
         logger.info("Limitless tree rebuilt successfully")
     elif app_name == 'boostyfi':
         from apps.boostyfi.models import BoostyFiUser
-        BoostyFiUser.objects.rebuild()
+        BoostyFiUser.objects.bulk_rebuild()
+        BoostyFiUser.objects.refresh_aggregates()
+        DatasetVersion.publish(Dataset.BOOSTYFI)
         logger.info("BoostyFi tree rebuilt successfully")
     else:
         logger.error(f"Unknown app: {app_name}")
         raise ValueError(f"Unknown app: {app_name}")
     
     return f"{app_name} tree rebuilt"
+
+
+def get_user_model(app_name: str):
+    """User model of a tree platform, ValueError for anything else."""
+    if app_name not in (Dataset.LIMITLESS, Dataset.BOOSTYFI):
+        raise ValueError(f"Unknown app: {app_name}")
+    return apps.get_model(DATASET_MODELS[app_name][0])
+
+
+@contextmanager
+def stage(state: dict, name: str):
+    """Time a pipeline stage into ``state['durations']``."""
+    started = time.monotonic()
+    yield
+    state['durations'][name] = round(time.monotonic() - started, 3)
+    logger.info(f"{state['app']} pipeline: {name} took {state['durations'][name]}s")
+
+
+@shared_task
+def post_import_pipeline(app_name: str, rebuild: bool = True):
+    """
+    Task to bring a platform up to date after an import, as a chain of one
+    task per stage: tree rebuild, team rollups, stats snapshot (publishing
+    a new dataset version) and cache warming of the top roots' trees.
+    
+    The chain holds the platform's import lock from start to end, so it
+    never overlaps an import or another pipeline; when the lock is taken
+    the run is skipped. Each stage adds its duration to the state passed
+    down the chain, which the last stage logs and returns.
+    
+    Args:
+        app_name: Either 'limitless' or 'boostyfi'
+        rebuild: False when the caller already rebuilt and published the
+            data, as the import commands do, so only the cache is warmed
+    """
+    get_user_model(app_name)
+    token = acquire_import_lock(app_name)
+    if token is None:
+        logger.warning(f"{app_name} pipeline skipped: an import is in progress")
+        return None
+    
+    state = {'app': app_name, 'token': token, 'durations': {}}
+    if rebuild:
+        stages = [pipeline_rebuild_tree.s(state), pipeline_rollups.s(), pipeline_stats.s(), pipeline_warm_cache.s()]
+    else:
+        state['version'] = DatasetVersion.current(app_name)
+        stages = [pipeline_warm_cache.s(state)]
+    pipeline = chain(*stages).on_error(release_import_lock_task.si(app_name, token))
+    return pipeline.apply_async().id
+
+
+@shared_task
+def pipeline_rebuild_tree(state: dict):
+    with stage(state, 'tree'):
+        get_user_model(state['app']).objects.bulk_rebuild()
+    return state
+
+
+@shared_task
+def pipeline_rollups(state: dict):
+    with stage(state, 'rollups'):
+        get_user_model(state['app']).objects.refresh_aggregates()
+    return state
+
+
+@shared_task
+def pipeline_stats(state: dict):
+    with stage(state, 'stats'):
+        state['version'] = DatasetVersion.publish(state['app'])
+    return state
+
+
+@shared_task
+def pipeline_warm_cache(state: dict):
+    from .cache import warm_response_cache
+    try:
+        with stage(state, 'warm'):
+            state['warmed'] = warm_response_cache(state['app'])
+    finally:
+        release_import_lock(state['app'], state['token'])
+    
+    total = round(sum(state['durations'].values()), 3)
+    stages = ', '.join(f"{name} {seconds}s" for name, seconds in state['durations'].items())
+    logger.info(
+        f"{state['app']} pipeline done in {total}s at version {state['version']} "
+        f"({stages}; {state['warmed']} responses warmed)"
+    )
+    return {key: value for key, value in state.items() if key != 'token'}
+
+
+@shared_task
+def release_import_lock_task(app_name: str, token: str):
+    """Errback of ``post_import_pipeline`` freeing the lock a failed stage held."""
+    release_import_lock(app_name, token)
+    logger.error(f"{app_name} pipeline failed, import lock released")
+
+
+@shared_task
+def refresh_stats_snapshots():
+    """
+    Periodic task recomputing the stats snapshot of every dataset, catching
+    changes made outside the importers. A dataset whose snapshot changed is
+    published at a new version, so its cached responses are replaced too.
+    """
+    published = 0
+    for dataset in Dataset.values:
+        version = StatsSnapshot.publish_if_changed(dataset)
+        if version is None:
+            logger.info(f"{dataset} stats snapshot unchanged")
+        else:
+            published += 1
+            logger.info(f"{dataset} stats snapshot changed, published version {version}")
+    return f"{published} of {len(Dataset.values)} datasets published"
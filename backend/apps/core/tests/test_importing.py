@@ -0,0 +1,98 @@
+"""
+COPY importer: full reloads and delta imports of CSV exports.
+"""
+import csv
+import io
+
+import pytest
+from django.core.management import call_command
+
+from apps.core.importing import CopyImporter
+from apps.limitless.models import LimitlessPurchase, LimitlessTeamRollup, LimitlessUser
+
+pytestmark = pytest.mark.django_db
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def run_import(data_dir, **options):
+    return CopyImporter('limitless', data_dir, log=lambda message: None, **options).run()
+
+
+def test_repeated_original_id_keeps_the_last_row(tmp_path):
+    write_csv(tmp_path / 'limitless_users.csv', [
+        {'id': 1, 'parent_id': '', 'username': 'first'},
+        {'id': 2, 'parent_id': 1, 'username': 'child'},
+        {'id': 1, 'parent_id': '', 'username': 'again'},
+    ])
+
+    loaded = run_import(tmp_path)
+
+    assert loaded == {'users': 2}
+    assert dict(LimitlessUser.objects.values_list('original_id', 'username')) == {1: 'again', 2: 'child'}
+    assert LimitlessUser.objects.get(original_id=2).parent.username == 'again'
+
+
+def test_delta_links_rows_imported_before_their_reference(tmp_path):
+    users = [{'id': 1, 'parent_id': '', 'username': 'root'}]
+    write_csv(tmp_path / 'limitless_users.csv', users)
+    write_csv(tmp_path / 'limitless_purchases.csv', [
+        {'id': 10, 'buyer_id': 2, 'amount_usdt': '50', 'payment_status': 'COMPLETED'},
+    ])
+    run_import(tmp_path, delta=True)
+    assert LimitlessPurchase.objects.get(original_id=10).buyer is None
+
+    # The buyer arrives with a later export; the purchase row is unchanged
+    write_csv(tmp_path / 'limitless_users.csv', users + [{'id': 2, 'parent_id': 1, 'username': 'buyer'}])
+    loaded = run_import(tmp_path, delta=True)
+
+    assert loaded == {'users': 1, 'purchases': 1}
+    buyer = LimitlessUser.objects.get(original_id=2)
+    assert LimitlessPurchase.objects.get(original_id=10).buyer == buyer
+    assert buyer.purchases_count == 1
+
+    assert run_import(tmp_path, delta=True) == {'users': 0, 'purchases': 0}
+
+
+
+def test_delta_refreshes_the_trees_of_old_and_new_buyers_only(tmp_path):
+    write_csv(tmp_path / 'limitless_users.csv', [
+        {'id': 1, 'parent_id': '', 'username': 'a'},
+        {'id': 2, 'parent_id': 1, 'username': 'a child'},
+        {'id': 3, 'parent_id': '', 'username': 'b'},
+        {'id': 4, 'parent_id': '', 'username': 'c'},
+    ])
+    purchase = {'id': 10, 'buyer_id': 2, 'amount_usdt': '50', 'payment_status': 'COMPLETED'}
+    write_csv(tmp_path / 'limitless_purchases.csv', [purchase])
+    run_import(tmp_path, delta=True)
+    assert LimitlessTeamRollup.objects.get(user__original_id=1).team_volume == 50
+    # Stale on purpose: only a full refresh would rewrite it
+    LimitlessTeamRollup.objects.filter(user__original_id=4).update(team_size=99)
+
+    # The purchase moves from tree a to tree b
+    write_csv(tmp_path / 'limitless_purchases.csv', [{**purchase, 'buyer_id': 3}])
+    assert run_import(tmp_path, delta=True) == {'users': 0, 'purchases': 1}
+
+    rollups = {rollup.user.original_id: rollup for rollup in LimitlessTeamRollup.objects.select_related('user')}
+    assert (rollups[1].team_volume, rollups[2].team_volume, rollups[3].team_volume) == (0, 0, 50)
+    assert LimitlessUser.objects.get(original_id=2).purchases_count == 0
+    assert rollups[4].team_size == 99
+
+
+def test_import_csv_links_parents_in_one_update(tmp_path):
+    (tmp_path / 'limitless').mkdir()
+    write_csv(tmp_path / 'limitless' / 'limitless_users.csv', [
+        {'id': 1, 'parent_id': '', 'username': 'root'},
+        {'id': 2, 'parent_id': 1, 'username': 'child'},
+        {'id': 3, 'parent_id': 2, 'username': 'grandchild'},
+    ])
+
+    call_command('import_csv', app='limitless', sheets_dir=str(tmp_path), no_warm=True, stdout=io.StringIO())
+
+    parents = dict(LimitlessUser.objects.values_list('original_id', 'parent__original_id'))
+    assert parents == {1: None, 2: 1, 3: 2}
@@ -0,0 +1,26 @@
+"""
+Per-process response cache.
+"""
+from apps.core.cache import attach_sellers
+from apps.core.local_cache import LocalCache
+
+
+def test_set_stores_a_detached_copy_served_as_is():
+    cache = LocalCache(max_bytes=1024 * 1024, timeout=60)
+    body = {'results': [{'id': 1, 'assigned_sellers': []}]}
+    cache.set('limitless', 'key', body)
+    body['results'][0]['assigned_sellers'].append('stored after set')
+
+    first = cache.get('limitless', 'key')
+    assert first == {'results': [{'id': 1, 'assigned_sellers': []}]}
+    # Hits share the stored object instead of unpickling a copy each
+    assert cache.get('limitless', 'key') is first
+
+
+def test_attaching_sellers_leaves_the_cached_entry_alone(db):
+    cache = LocalCache(max_bytes=1024 * 1024, timeout=60)
+    cache.set('limitless', 'key', {'results': [{'id': 1, 'assigned_sellers': ['stale']}], 'count': 1})
+
+    filled = attach_sellers(cache.get('limitless', 'key'), 'limitless')
+    assert filled == {'results': [{'id': 1, 'assigned_sellers': []}], 'count': 1}
+    assert cache.get('limitless', 'key')['results'][0]['assigned_sellers'] == ['stale']
@@ -0,0 +1,42 @@
+"""
+Post-import pipeline: the import commands queue it to warm the response cache.
+"""
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.core.cache import warm_response_cache, warm_urls
+from apps.core.tests.test_importing import write_csv
+from apps.limitless.models import LimitlessUser
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    write_csv(tmp_path / 'limitless_users.csv', [
+        {'id': 1, 'parent_id': '', 'username': 'root'},
+        {'id': 2, 'parent_id': 1, 'username': 'child'},
+    ])
+    return tmp_path
+
+
+def test_warm_response_cache_renders_every_url(data_dir):
+    call_command('copy_import', app='limitless', data_dir=data_dir, no_warm=True)
+
+    assert warm_response_cache('limitless') == len(warm_urls('limitless', 20, [3, 5]))
+
+
+def test_import_queues_the_pipeline(client, data_dir, django_capture_on_commit_callbacks, settings):
+    settings.CACHE_WARM_URL = 'http://testserver'
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command('copy_import', app='limitless', data_dir=data_dir)
+
+    root = LimitlessUser.objects.get(original_id=1)
+    for url in [reverse('limitless:user-stats'), f"{reverse('limitless:user-tree', args=[root.pk])}?depth=3"]:
+        with CaptureQueriesContext(connection) as queries:
+            assert client.get(url).status_code == 200
+        # Served from the warmed cache, apart from the live seller lookups
+        assert not [query for query in queries if 'seller' not in query['sql']]
@@ -0,0 +1,99 @@
+"""
+Query budgets of the list pages of both platforms: the count must not grow
+with the number of rows on the page.
+"""
+from decimal import Decimal
+
+import pytest
+from django.apps import apps
+from django.contrib import admin
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+pytestmark = pytest.mark.django_db
+
+# Platform -> model labels and the purchase/earning fields of its exports
+PLATFORMS = {
+    'limitless': {
+        'user': 'limitless.LimitlessUser',
+        'purchase': ('limitless.LimitlessPurchase', {'buyer': 'buyer', 'amount': 'amount_usdt'}),
+        'earning': ('limitless.LimitlessEarning', {'user': 'recipient', 'amount': 'amount_usdt'}),
+    },
+    'boostyfi': {
+        'user': 'boostyfi.BoostyFiUser',
+        'purchase': ('boostyfi.BoostyFiPurchase', {'buyer': 'buyer', 'amount': 'amount'}),
+        'earning': ('boostyfi.BoostyFiEarning', {'user': 'user', 'amount': 'amount'}),
+    },
+}
+
+
+@pytest.fixture(params=list(PLATFORMS))
+def platform(request):
+    """A platform with 30 users in two trees, each with a purchase and an earning."""
+    spec = PLATFORMS[request.param]
+    user_model = apps.get_model(spec['user'])
+    purchase_label, purchase_fields = spec['purchase']
+    earning_label, earning_fields = spec['earning']
+
+    users = []
+    for original_id in range(1, 31):
+        parent = users[(original_id - 3) // 2] if original_id > 2 else None
+        user = user_model.objects.create(
+            original_id=original_id,
+            username=f'user{original_id:02d}',
+            wallet=f'0x{original_id:040x}',
+            parent=parent,
+        )
+        apps.get_model(purchase_label).objects.create(**{
+            'original_id': original_id,
+            purchase_fields['buyer']: user,
+            f"{purchase_fields['buyer']}_original_id": original_id,
+            purchase_fields['amount']: Decimal('100'),
+            'payment_status': 'COMPLETED',
+        })
+        apps.get_model(earning_label).objects.create(**{
+            'original_id': original_id,
+            earning_fields['user']: user,
+            f"{earning_fields['user']}_original_id": original_id,
+            earning_fields['amount']: Decimal('10'),
+            'status': 'WITHDRAWN',
+        })
+        users.append(user)
+    user_model.objects.bulk_rebuild()
+    user_model.objects.refresh_aggregates()
+    return request.param, user_model
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(queries)
+
+
+def test_user_list_query_count_is_constant(client, platform):
+    name, _ = platform
+    url = reverse(f'{name}:user-list')
+    client.get(url)  # caches the dataset version
+
+    small = count_queries(client, f'{url}?page_size=5')
+    large = count_queries(client, f'{url}?page_size=30')
+
+    assert small == large == 1
+    rows = client.get(f'{url}?page_size=30').json()['results']
+    assert [row['purchases_count'] for row in rows] == [1] * 30
+    assert rows[0]['children_count'] == 2
+
+
+def test_user_changelist_query_count_is_constant(admin_client, platform, monkeypatch):
+    _, user_model = platform
+    url = reverse(f'admin:{user_model._meta.app_label}_{user_model._meta.model_name}_changelist')
+    model_admin = type(admin.site._registry[user_model])
+
+    monkeypatch.setattr(model_admin, 'list_per_page', 5)
+    small = count_queries(admin_client, url)
+    monkeypatch.setattr(model_admin, 'list_per_page', 30)
+    large = count_queries(admin_client, url)
+
+    assert small == large == 5
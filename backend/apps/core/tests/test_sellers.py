@@ -0,0 +1,90 @@
+"""
+Seller assignments in the tree responses of both platforms: one grouped
+query per response, shared with the refresh of cached bodies.
+"""
+import pytest
+from django.apps import apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.core.models import SellerAssignment
+
+pytestmark = pytest.mark.django_db
+
+PLATFORMS = [('limitless', 'limitless.LimitlessUser'), ('boostyfi', 'boostyfi.BoostyFiUser')]
+
+
+@pytest.fixture(params=PLATFORMS, ids=[platform for platform, _ in PLATFORMS])
+def tree(request, django_user_model):
+    """Two roots with ten users under each, every third user claimed."""
+    platform, user_label = request.param
+    user_model = apps.get_model(user_label)
+    users = []
+    for original_id in range(1, 23):
+        parent = users[(original_id - 3) // 2] if original_id > 2 else None
+        users.append(user_model.objects.create(
+            original_id=original_id, username=f'user{original_id:02d}', parent=parent
+        ))
+    user_model.objects.bulk_rebuild()
+    user_model.objects.refresh_aggregates()
+
+    seller = django_user_model.objects.create(username='seller', full_name='Seller One', is_seller=True)
+    assignments = {
+        user.id: SellerAssignment.objects.create(seller=seller, platform=platform, target_user_id=user.id)
+        for user in users[::3]
+    }
+    return platform, users, assignments
+
+
+def nodes_of(items):
+    """Every node of a tree response body, by id."""
+    nodes, stack = {}, list(items)
+    while stack:
+        node = stack.pop()
+        nodes[node['id']] = node
+        stack.extend(node.get('children', []))
+    return nodes
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response.json(), len(queries)
+
+
+def test_roots_sellers_cost_one_query(client, tree):
+    platform, users, assignments = tree
+    url = reverse(f'{platform}:user-roots')
+    client.get(f'{url}?limit=1')  # caches the dataset version and takes the stats snapshot
+
+    # The page with its rollups, the sellers, the stats snapshot, the subtree
+    assert get(client, f'{url}?depth=0')[1] == 3
+    body, queries = get(client, f'{url}?depth=5')
+    assert queries == 4
+
+    nodes = nodes_of(body['results'])
+    assert len(nodes) == len(users)
+    assert {pk: node['assigned_sellers'] for pk, node in nodes.items() if node['assigned_sellers']} == {
+        pk: [assignment.to_seller_info()] for pk, assignment in assignments.items()
+    }
+
+
+@pytest.mark.parametrize('action', ['tree', 'ancestors'])
+def test_tree_and_ancestors_list_current_sellers(client, tree, action):
+    platform, users, assignments = tree
+    url = reverse(f'{platform}:user-{action}', args=[users[9].pk])
+
+    body, _ = get(client, f'{url}?depth=3')
+    nodes = nodes_of(body['path'] if action == 'ancestors' else [body])
+    assert len(nodes) > 1
+    for pk, node in nodes.items():
+        expected = [assignments[pk].to_seller_info()] if pk in assignments else []
+        assert node['assigned_sellers'] == expected
+
+    # Cached body, refreshed through the same grouped query
+    SellerAssignment.objects.filter(target_user_id__in=list(nodes)).delete()
+    body, _ = get(client, f'{url}?depth=3')
+    nodes = nodes_of(body['path'] if action == 'ancestors' else [body])
+    assert not any(node['assigned_sellers'] for node in nodes.values())
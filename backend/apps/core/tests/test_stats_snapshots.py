@@ -0,0 +1,46 @@
+"""
+Periodic stats snapshot refresh.
+"""
+import pytest
+from django.urls import reverse
+
+from apps.core.models import Dataset, DatasetVersion
+from apps.core.tasks import refresh_stats_snapshots
+from apps.limitless.models import LimitlessUser, WalletProfile
+
+pytestmark = pytest.mark.django_db
+
+
+def test_changed_snapshot_publishes_a_new_version(client, django_capture_on_commit_callbacks):
+    LimitlessUser.objects.create(original_id=1, username='root')
+    with django_capture_on_commit_callbacks(execute=True):
+        DatasetVersion.publish(Dataset.LIMITLESS)
+    url = reverse('limitless:user-stats')
+    assert client.get(url).json()['total_users'] == 1
+
+    # Changed outside the importers, behind the cached response
+    LimitlessUser.objects.create(original_id=2, username='other')
+    with django_capture_on_commit_callbacks(execute=True):
+        refresh_stats_snapshots()
+
+    stats = client.get(url).json()
+    assert stats['total_users'] == 2
+    assert stats['dataset_version'] == 2
+
+
+def test_unchanged_snapshot_keeps_the_version():
+    LimitlessUser.objects.create(original_id=1, username='root')
+    for dataset in Dataset.values:
+        DatasetVersion.publish(dataset)
+
+    assert refresh_stats_snapshots() == f'0 of {len(Dataset.values)} datasets published'
+    assert DatasetVersion.current(Dataset.LIMITLESS) == 1
+
+
+def test_wallet_profile_snapshot_keeps_totals_as_numbers(client):
+    WalletProfile.objects.create(export_id=1, main_wallet=f'0x{1:040x}', atla_balance='12.50', community_count=3)
+    DatasetVersion.publish(Dataset.WALLET_PROFILES)
+
+    totals = client.get(reverse('limitless:wallet-profile-stats')).json()['totals']
+    assert totals['total_atla'] == 12.5
+    assert totals['total_community'] == 3
@@ -0,0 +1,21 @@
+"""
+Team volume on the user detail and tree endpoints of both platforms.
+"""
+import pytest
+from django.apps import apps
+from django.urls import reverse
+
+pytestmark = pytest.mark.django_db
+
+PLATFORMS = [('limitless', 'limitless.LimitlessUser'), ('boostyfi', 'boostyfi.BoostyFiUser')]
+
+
+@pytest.mark.parametrize('platform, user_label', PLATFORMS)
+@pytest.mark.parametrize('action', ['detail', 'tree'])
+def test_user_without_rollup_has_zero_team_volume(client, platform, user_label, action):
+    user = apps.get_model(user_label).objects.create(original_id=1, username='new')
+
+    response = client.get(reverse(f'{platform}:user-{action}', args=[user.pk]))
+
+    assert response.status_code == 200
+    assert response.json()['team_volume'] == 0.0
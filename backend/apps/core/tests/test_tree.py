@@ -0,0 +1,18 @@
+"""
+Nested-set helpers shared by both platforms' trees.
+"""
+from decimal import Decimal
+
+from apps.core.tree import running_totals
+
+
+def test_running_totals_difference_is_the_subtree_sum():
+    # Tree 1: 1 -> (2 -> 3), 4; tree 2: 5
+    nodes = [(1, 1, 1, 8), (2, 1, 2, 5), (3, 1, 3, 4), (4, 1, 6, 7), (5, 2, 1, 2)]
+    values = {1: Decimal('1'), 2: Decimal('10'), 3: Decimal('100'), 4: Decimal('1000'), 5: Decimal('7')}
+
+    totals = running_totals(nodes, values)
+
+    assert {pk: at_rght - at_lft for pk, (at_lft, at_rght) in totals.items()} == {
+        1: 1111, 2: 110, 3: 100, 4: 1000, 5: 7,
+    }
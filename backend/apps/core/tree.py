@@ -0,0 +1,226 @@
+"""
+Helpers shared by the MPTT-based user trees of both platforms.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connections, transaction
+from django.db.models import ExpressionWrapper, F, Index, IntegerField, Q
+
+
+def tree_size():
+    """Number of descendants of a node, from its bounds: ``(rght - lft - 1) / 2``."""
+    return ExpressionWrapper((F('rght') - F('lft') - 1) / 2, output_field=IntegerField())
+
+
+def roots_tree_size_index(name):
+    """
+    Partial index over the roots of a tree model in the order of the roots
+    endpoints, ``tree_size()`` descending then original_id, so keyset pages
+    of roots are read off the index instead of sorting every root.
+    """
+    return Index(tree_size().desc(), F('original_id'), name=name, condition=Q(parent__isnull=True))
+
+
+class SubtreeQuerySetMixin:
+    """QuerySet mixin for loading several tree levels with a single query."""
+
+    def subtree(self, nodes, depth, include_self=True):
+        """
+        Return all nodes up to ``depth`` levels below each of ``nodes``
+        using one tree_id/lft/rght/level range query.
+        """
+        condition = Q()
+        for node in nodes:
+            lft_lookup = 'lft__gte' if include_self else 'lft__gt'
+            condition |= Q(
+                tree_id=node.tree_id,
+                rght__lte=node.rght,
+                level__lte=node.level + depth,
+                **{lft_lookup: node.lft}
+            )
+        if not condition:
+            return self.none()
+        return self.filter(condition)
+
+
+class NestedSetBuilderMixin:
+    """
+    TreeManager mixin rebuilding every tree from the parent links in one
+    pass and one bulk write, instead of ``TreeManager.rebuild()``.
+    """
+    
+    def bulk_rebuild(self):
+        """
+        Recompute tree_id/lft/rght/level for all nodes with the same sibling
+        order as ``rebuild()``. Returns the number of nodes.
+        """
+        opts = self.model._mptt_meta
+        nodes = self.order_by(*opts.order_insertion_by, 'pk').values_list(
+            'pk', f'{opts.parent_attr}_id'
+        )
+        rows = list(nested_set_fields(nodes.iterator()))
+        
+        with transaction.atomic(using=self.db):
+            if connections[self.db].vendor == 'postgresql':
+                self._copy_nested_set_fields(rows)
+            else:
+                self.bulk_update(
+                    [
+                        self.model(**{
+                            'pk': pk,
+                            opts.tree_id_attr: tree_id,
+                            opts.left_attr: lft,
+                            opts.right_attr: rght,
+                            opts.level_attr: level,
+                        })
+                        for pk, tree_id, lft, rght, level in rows
+                    ],
+                    [opts.tree_id_attr, opts.left_attr, opts.right_attr, opts.level_attr],
+                    batch_size=1000
+                )
+        return len(rows)
+    
+    def _copy_nested_set_fields(self, rows):
+        """COPY the computed fields into a temp table and apply them with one UPDATE."""
+        opts = self.model._mptt_meta
+        meta = self.model._meta
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        columns = [
+            qn(meta.get_field(attr).column)
+            for attr in (opts.tree_id_attr, opts.left_attr, opts.right_attr, opts.level_attr)
+        ]
+        assignments = ', '.join(f'{column} = ns.{column}' for column in columns)
+        changed = ' OR '.join(f't.{column} IS DISTINCT FROM ns.{column}' for column in columns)
+        
+        with connection.cursor() as cursor:
+            # Dropped on commit, but a caller's outer transaction may rebuild twice
+            cursor.execute('DROP TABLE IF EXISTS nested_set_rebuild')
+            cursor.execute(
+                'CREATE TEMP TABLE nested_set_rebuild '
+                f'(id bigint PRIMARY KEY, {", ".join(f"{c} integer" for c in columns)}) '
+                'ON COMMIT DROP'
+            )
+            with cursor.copy(
+                f'COPY nested_set_rebuild (id, {", ".join(columns)}) FROM STDIN'
+            ) as copy:
+                for row in rows:
+                    copy.write_row(row)
+            cursor.execute(
+                f'UPDATE {qn(meta.db_table)} AS t SET {assignments} '
+                f'FROM nested_set_rebuild AS ns '
+                f'WHERE t.{qn(meta.pk.column)} = ns.id AND ({changed})'
+            )
+
+
+def nested_set_fields(nodes):
+    """
+    Number the nodes of a parent map as nested sets in one iterative pass.
+    
+    ``nodes`` is an iterable of ``(pk, parent_id)`` tuples in sibling order;
+    roots become trees numbered from 1 in the same order. Yields
+    ``(pk, tree_id, lft, rght, level)`` for every node reachable from a root.
+    """
+    roots = []
+    children = defaultdict(list)
+    for pk, parent_id in nodes:
+        if parent_id is None:
+            roots.append(pk)
+        else:
+            children[parent_id].append(pk)
+    
+    for tree_id, root in enumerate(roots, start=1):
+        stack = [(root, 0, 1, iter(children.pop(root, ())))]
+        counter = 2
+        while stack:
+            pk, level, lft, pending = stack[-1]
+            child = next(pending, None)
+            if child is not None:
+                stack.append((child, level + 1, counter, iter(children.pop(child, ()))))
+                counter += 1
+            else:
+                stack.pop()
+                yield pk, tree_id, lft, counter, level
+                counter += 1
+
+
+def group_children(nodes):
+    """
+    Group a flat list of tree nodes into a ``parent_id -> [children]`` map,
+    keeping the queryset order within each group.
+    """
+    children_map = defaultdict(list)
+    for node in nodes:
+        children_map[node.parent_id].append(node)
+    return children_map
+
+
+def running_totals(nodes, values):
+    """
+    Compute a per-tree prefix sum of ``values`` over nested-set order.
+    
+    ``nodes`` is an iterable of ``(pk, tree_id, lft, rght)`` tuples ordered by
+    ``(tree_id, lft)`` and ``values`` maps pk to the node's own amount.
+    Returns ``pk -> (total_at_lft, total_at_rght)``: the running total before
+    the node and after its last descendant. Their difference is the sum over
+    the node's subtree.
+    """
+    totals = {}
+    stack = []  # open subtrees as (pk, total_at_lft, rght)
+    running = Decimal('0')
+    current_tree = None
+    
+    for pk, tree_id, lft, rght in nodes:
+        if tree_id != current_tree:
+            while stack:
+                open_pk, total_at_lft, _ = stack.pop()
+                totals[open_pk] = (total_at_lft, running)
+            running = Decimal('0')
+            current_tree = tree_id
+        
+        # Close every subtree that ends before this node starts
+        while stack and stack[-1][2] < lft:
+            open_pk, total_at_lft, _ = stack.pop()
+            totals[open_pk] = (total_at_lft, running)
+        
+        stack.append((pk, running, rght))
+        running += values.get(pk) or 0
+    
+    while stack:
+        open_pk, total_at_lft, _ = stack.pop()
+        totals[open_pk] = (total_at_lft, running)
+    
+    return totals
+
+
+def subtree_rollups(nodes):
+    """
+    Aggregate per-node amounts over every subtree in one bottom-up pass.
+    
+    ``nodes`` is an iterable of ``(pk, parent_id, *amounts)`` tuples ordered by
+    ``(tree_id, lft)`` descending, so each node is visited after all of its
+    descendants. Returns ``pk -> (team_size, max_depth, *team_amounts)`` where
+    team_size counts the descendants, max_depth is the deepest level below the
+    node and each team amount includes the node's own amount.
+    """
+    rollups = {}
+    pending = {}  # parent pk -> [team_size, max_depth, amounts] of visited children
+    
+    for pk, parent_id, *amounts in nodes:
+        size, depth, totals = pending.pop(pk, (0, 0, None))
+        if totals is not None:
+            amounts = [own + total for own, total in zip(amounts, totals)]
+        rollups[pk] = (size, depth, *amounts)
+        
+        if parent_id is None:
+            continue
+        parent = pending.get(parent_id)
+        if parent is None:
+            pending[parent_id] = [size + 1, depth + 1, list(amounts)]
+        else:
+            parent[0] += size + 1
+            parent[1] = max(parent[1], depth + 1)
+            parent[2] = [total + amount for total, amount in zip(parent[2], amounts)]
+    
+    return rollups
@@ -4,7 +4,7 @@ URL configuration for core API.
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from .views import SellerAssignmentViewSet
+from .views import SellerAssignmentViewSet, WalletLookupView
 
 app_name = 'core'
 
@@ -12,5 +12,6 @@ router = DefaultRouter()
 router.register('seller-assignments', SellerAssignmentViewSet, basename='seller-assignment')
 
 urlpatterns = [
+    path('wallets/<str:address>/', WalletLookupView.as_view(), name='wallet-lookup'),
     path('', include(router.urls)),
 ]
@@ -7,13 +7,14 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
 
-from .models import SellerAssignment
+from .models import SellerAssignment, WalletAddress, WalletOwner
 from .serializers import (
     SellerAssignmentSerializer,
     ClaimWalletSerializer,
     UnclaimWalletSerializer,
     SellerInfoSerializer,
 )
+from .wallets import canonical_address
 
 
 class IsSeller(IsAuthenticated):
@@ -144,23 +145,39 @@ class SellerAssignmentViewSet(viewsets.ViewSet):
         # Limit to 200 users max
         user_ids = user_ids[:200]
         
-        # Get all assignments for these users
-        assignments = SellerAssignment.objects.filter(
-            platform=platform,
-            target_user_id__in=user_ids
-        ).select_related('seller')
-        
-        # Group by target_user_id
-        result = {}
-        for assignment in assignments:
-            if assignment.target_user_id not in result:
-                result[assignment.target_user_id] = []
-            result[assignment.target_user_id].append({
-                'id': assignment.id,
-                'seller_id': assignment.seller.id,
-                'seller_name': assignment.seller.full_name or assignment.seller.username,
-                'seller_username': assignment.seller.username,
-                'created_at': assignment.created_at.isoformat(),
-            })
+        # Get all assignments for these users, grouped by target_user_id
+        result = SellerAssignment.get_seller_names_for_users(platform, user_ids)
         
         return Response({'assignments': result})
+
+
+class WalletLookupView(APIView):
+    """
+    Find a wallet on every platform: the Limitless and BoostyFi users holding
+    it in any wallet field and the wallet profiles listing it, matched exactly
+    on the canonical address.
+    """
+    permission_classes = [AllowAny]
+    
+    def get(self, request, address):
+        from apps.boostyfi.models import BoostyFiUser
+        from apps.boostyfi.serializers import BoostyFiUserListSerializer
+        from apps.limitless.models import LimitlessUser, WalletProfile
+        from apps.limitless.serializers import LimitlessUserListSerializer, WalletProfileListSerializer
+        
+        sources = [
+            ('limitless', WalletOwner.LIMITLESS_USER, LimitlessUser, LimitlessUserListSerializer),
+            ('boostyfi', WalletOwner.BOOSTYFI_USER, BoostyFiUser, BoostyFiUserListSerializer),
+            ('wallet_profiles', WalletOwner.WALLET_PROFILE, WalletProfile, WalletProfileListSerializer),
+        ]
+        owners = WalletAddress.get_owners(address)
+        
+        result = {'address': canonical_address(address)}
+        for key, owner_type, model, serializer_class in sources:
+            matches = owners.get(owner_type, {})
+            rows = model.objects.filter(pk__in=list(matches)) if matches else []
+            data = serializer_class(rows, many=True).data
+            for item in data:
+                item['matched_fields'] = matches[item['id']]
+            result[key] = data
+        return Response(result)
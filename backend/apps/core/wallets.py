@@ -0,0 +1,25 @@
+"""
+Canonical wallet addresses for exact lookups across platforms.
+"""
+import re
+
+EVM_ADDRESS = re.compile(r'^0x[0-9a-fA-F]{40}$')
+
+
+def canonical_address(value):
+    """
+    Canonical form of a wallet address.
+
+    EVM addresses are lowercased, which drops the EIP-55 checksum casing.
+    Base58 addresses such as TRON are case-sensitive and only stripped.
+    """
+    value = (value or '').strip()
+    if EVM_ADDRESS.match(value):
+        return value.lower()
+    return value
+
+
+def split_addresses(value):
+    """Canonical addresses in a comma-separated value, without duplicates."""
+    addresses = (canonical_address(part) for part in (value or '').split(','))
+    return list(dict.fromkeys(address for address in addresses if address))
@@ -2,11 +2,12 @@
 Django Admin configuration for Limitless models.
 """
 from django.contrib import admin
-from django.db.models import Sum, Count
 from django.utils.html import format_html
 from mptt.admin import MPTTModelAdmin
 
-from .models import LimitlessUser, LimitlessPurchase, LimitlessEarning, WalletProfile
+from .models import (
+    LimitlessUser, LimitlessPurchase, LimitlessEarning, WalletProfile, WalletProfileSubwallet,
+)
 
 
 class LimitlessPurchaseInline(admin.TabularInline):
@@ -79,27 +80,16 @@ class LimitlessUserAdmin(MPTTModelAdmin):
         return obj.short_wallet
     short_wallet_display.short_description = 'Wallet'
     
-    def children_count(self, obj):
-        return obj.get_children().count()
-    children_count.short_description = 'Children'
-    
-    def purchases_count(self, obj):
-        return obj.purchases.filter(payment_status='COMPLETED').count()
-    purchases_count.short_description = 'Purchases'
-    
+    # Counters are stored columns refreshed after every import
     def total_volume(self, obj):
-        result = obj.purchases.filter(
-            payment_status='COMPLETED'
-        ).aggregate(total=Sum('amount_usdt'))
-        return f"${result['total'] or 0:.2f}"
+        return f"${obj.direct_volume:.2f}"
     total_volume.short_description = 'Volume'
+    total_volume.admin_order_field = 'direct_volume'
     
     def total_earnings(self, obj):
-        result = obj.earnings.filter(
-            status='WITHDRAWN'
-        ).aggregate(total=Sum('amount_usdt'))
-        return f"${result['total'] or 0:.2f}"
+        return f"${obj.total_earnings:.2f}"
     total_earnings.short_description = 'Earnings'
+    total_earnings.admin_order_field = 'total_earnings'
 
 
 @admin.register(LimitlessPurchase)
@@ -150,9 +140,22 @@ class LimitlessEarningAdmin(admin.ModelAdmin):
     recipient_display.short_description = 'Recipient'
 
 
+class WalletProfileSubwalletInline(admin.TabularInline):
+    """Inline for profile subwallets, rebuilt on import."""
+    model = WalletProfileSubwallet
+    extra = 0
+    readonly_fields = ['position', 'address']
+    fields = ['position', 'address']
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(WalletProfile)
 class WalletProfileAdmin(admin.ModelAdmin):
     """Admin for Wallet Profiles."""
+    inlines = [WalletProfileSubwalletInline]
     list_display = [
         'export_id', 'short_wallet_display', 'email', 'rank',
         'atla_balance', 'community_count', 'has_lp', 'has_chs', 'has_dsy',
@@ -0,0 +1,22 @@
+"""
+Filter sets for Limitless endpoints.
+"""
+import django_filters
+
+from .models import PROFILE_FLAG_FIELDS, WalletProfile
+
+
+class WalletProfileFilter(django_filters.FilterSet):
+    """
+    Wallet profile filters shared by the list and stats endpoints.
+    Any combination can be passed, e.g. ``?rank__in=Gold,Guardian&has_lp=true``.
+    """
+    
+    class Meta:
+        model = WalletProfile
+        fields = {
+            'rank': ['exact', 'in'],
+            'atla_balance': ['gte', 'lte'],
+            'community_count': ['gte', 'lte'],
+            **{flag: ['exact'] for flag in PROFILE_FLAG_FIELDS},
+        }
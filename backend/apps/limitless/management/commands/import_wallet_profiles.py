@@ -1,13 +1,14 @@
 """
 Management command to import wallet profiles from rank_users export CSV.
 """
-import csv
 from decimal import Decimal, InvalidOperation
 from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
+from apps.core.importing import iter_csv
+from apps.core.models import Dataset, DatasetVersion
 from apps.limitless.models import WalletProfile
 
 
@@ -63,16 +64,10 @@ class Command(BaseCommand):
         
         self.stdout.write(f'Reading CSV from {csv_path}...')
         
-        with open(csv_path, 'r', encoding='utf-8-sig') as f:  # utf-8-sig handles BOM
-            reader = csv.DictReader(f)
-            rows = list(reader)
-        
-        self.stdout.write(f'Found {len(rows)} rows to import')
-        
         created_count = 0
         updated_count = 0
         
-        for row in rows:
+        for row in iter_csv(csv_path):
             export_id = self.parse_int(row.get('ID'))
             if not export_id:
                 continue
@@ -123,8 +118,12 @@ class Command(BaseCommand):
             else:
                 updated_count += 1
         
+        WalletProfile.refresh_addresses()
+        version = DatasetVersion.publish(Dataset.WALLET_PROFILES)
+        
         self.stdout.write(
             self.style.SUCCESS(
-                f'Import completed: {created_count} created, {updated_count} updated'
+                f'Import completed: {created_count} created, {updated_count} updated '
+                f'(dataset version {version})'
             )
         )
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.9 on 2026-10-16 20:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('limitless', '0002_add_wallet_profile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LimitlessTeamVolumeIndex',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='volume_index', serialize=False, to='limitless.limitlessuser')),
+                ('total_at_lft', models.DecimalField(decimal_places=6, default=0, max_digits=24)),
+                ('total_at_rght', models.DecimalField(decimal_places=6, default=0, max_digits=24)),
+            ],
+            options={
+                'verbose_name': 'Limitless Team Volume Index',
+                'verbose_name_plural': 'Limitless Team Volume Index',
+            },
+        ),
+    ]
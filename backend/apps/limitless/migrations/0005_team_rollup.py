@@ -0,0 +1,29 @@
+# Generated by Django 5.0.9 on 2026-10-16 20:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('limitless', '0004_user_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LimitlessTeamRollup',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='limitless.limitlessuser')),
+                ('team_size', models.IntegerField(default=0)),
+                ('team_volume', models.DecimalField(db_index=True, decimal_places=6, default=0, max_digits=24)),
+                ('team_earnings', models.DecimalField(decimal_places=6, default=0, max_digits=24)),
+                ('team_purchases', models.IntegerField(default=0)),
+                ('max_depth', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Limitless Team Rollup',
+                'verbose_name_plural': 'Limitless Team Rollups',
+            },
+        ),
+    ]
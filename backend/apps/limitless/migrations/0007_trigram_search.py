@@ -0,0 +1,73 @@
+# Generated by Django 5.0.9 on 2026-10-16 20:42
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('limitless', '0006_content_hash'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='limitlessuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('username'), name='gin_trgm_ops'), name='limitless_username_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='limitlessuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('wallet'), name='gin_trgm_ops'), name='limitless_wallet_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='limitlessuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('referral_code'), name='gin_trgm_ops'), name='limitless_referral_code_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='limitlessuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='gin_trgm_ops'), name='limitless_email_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='walletprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('main_wallet'), name='gin_trgm_ops'), name='profile_main_wallet_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='walletprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('subwallets'), name='gin_trgm_ops'), name='profile_subwallets_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='walletprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='gin_trgm_ops'), name='profile_email_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='walletprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('rank'), name='gin_trgm_ops'), name='profile_rank_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='walletprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('telegram'), name='gin_trgm_ops'), name='profile_telegram_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='walletprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('facebook'), name='gin_trgm_ops'), name='profile_facebook_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='walletprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('whatsapp'), name='gin_trgm_ops'), name='profile_whatsapp_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='walletprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('viber'), name='gin_trgm_ops'), name='profile_viber_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='walletprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('line'), name='gin_trgm_ops'), name='profile_line_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='walletprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('other_contact'), name='gin_trgm_ops'), name='profile_other_contact_trgm'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.9 on 2026-10-16 20:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def split_subwallets(apps, schema_editor):
+    WalletProfile = apps.get_model('limitless', 'WalletProfile')
+    WalletProfileSubwallet = apps.get_model('limitless', 'WalletProfileSubwallet')
+    profiles = WalletProfile.objects.exclude(subwallets='').values_list('pk', 'subwallets')
+    WalletProfileSubwallet.objects.bulk_create(
+        (
+            WalletProfileSubwallet(profile_id=pk, address=address, position=position)
+            for pk, subwallets in profiles.iterator()
+            for position, address in enumerate(
+                dict.fromkeys(w.strip() for w in subwallets.split(',') if w.strip())
+            )
+        ),
+        batch_size=1000
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('limitless', '0007_trigram_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletProfileSubwallet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(db_index=True, max_length=255)),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subwallet_entries', to='limitless.walletprofile')),
+            ],
+            options={
+                'verbose_name': 'Wallet Profile Subwallet',
+                'verbose_name_plural': 'Wallet Profile Subwallets',
+                'ordering': ['profile', 'position'],
+                'unique_together': {('profile', 'address')},
+            },
+        ),
+        migrations.RunPython(split_subwallets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.9 on 2026-10-16 20:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('limitless', '0008_wallet_profile_subwallet'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='limitlessearning',
+            index=models.Index(fields=['created_at', 'id'], name='limitless_l_created_fdf347_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='limitlessearning',
+            index=models.Index(fields=['recipient_original_id', 'created_at', 'id'], name='limitless_l_recipie_57d7d7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='limitlesspurchase',
+            index=models.Index(fields=['created_at', 'id'], name='limitless_l_created_4ff600_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='limitlesspurchase',
+            index=models.Index(fields=['buyer_original_id', 'created_at', 'id'], name='limitless_l_buyer_o_8dfcbc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='limitlessuser',
+            index=models.Index(fields=['created_at', 'id'], name='limitless_l_created_08e2e8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='limitlessuser',
+            index=models.Index(fields=['username', 'id'], name='limitless_l_usernam_1143b9_idx'),
+        ),
+    ]
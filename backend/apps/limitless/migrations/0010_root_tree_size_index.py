@@ -0,0 +1,18 @@
+# Generated by Django 5.0.9 on 2026-10-16 21:02
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('limitless', '0009_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='limitlessuser',
+            index=models.Index(models.OrderBy(models.ExpressionWrapper(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('rght'), '-', models.F('lft')), '-', models.Value(1)), '/', models.Value(2)), output_field=models.IntegerField()), descending=True), models.F('original_id'), condition=models.Q(('parent__isnull', True)), name='limitless_root_tree_size_idx'),
+        ),
+    ]
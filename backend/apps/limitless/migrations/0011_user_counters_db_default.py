@@ -0,0 +1,33 @@
+# Generated by Django 5.0.9 on 2026-10-16 21:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('limitless', '0010_root_tree_size_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='limitlessuser',
+            name='children_count',
+            field=models.IntegerField(db_default=0, default=0),
+        ),
+        migrations.AlterField(
+            model_name='limitlessuser',
+            name='direct_volume',
+            field=models.DecimalField(db_default=0, decimal_places=6, default=0, max_digits=20),
+        ),
+        migrations.AlterField(
+            model_name='limitlessuser',
+            name='purchases_count',
+            field=models.IntegerField(db_default=0, default=0),
+        ),
+        migrations.AlterField(
+            model_name='limitlessuser',
+            name='total_earnings',
+            field=models.DecimalField(db_default=0, decimal_places=6, default=0, max_digits=20),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.9 on 2026-10-16 21:40
+
+from django.db import migrations
+
+from apps.core.wallets import split_addresses
+
+
+def backfill_wallet_addresses(apps, schema_editor):
+    WalletAddress = apps.get_model('core', 'WalletAddress')
+    owners = [
+        ('limitless_user', apps.get_model('limitless', 'LimitlessUser'), ['wallet']),
+        ('wallet_profile', apps.get_model('limitless', 'WalletProfile'), ['main_wallet', 'subwallets']),
+    ]
+    for owner_type, model, fields in owners:
+        rows = model.objects.order_by().values_list('pk', *fields)
+        WalletAddress.objects.filter(owner_type=owner_type).delete()
+        WalletAddress.objects.bulk_create(
+            (
+                WalletAddress(address=address, owner_type=owner_type, owner_id=pk, field=field)
+                for pk, *values in rows.iterator()
+                for field, value in zip(fields, values)
+                for address in split_addresses(value)
+            ),
+            batch_size=1000
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_wallet_address'),
+        ('limitless', '0012_content_hash_db_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_wallet_addresses, migrations.RunPython.noop),
+    ]
@@ -2,65 +2,165 @@
 Limitless models for users, purchases, and earnings.
 """
 from decimal import Decimal
-from django.db import models
-from django.db.models import Count, Sum, Q, Value, DecimalField, OuterRef, Subquery
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models, transaction
+from django.db.models import Count, Sum, Q, F, Prefetch, Value, DecimalField, OuterRef, Subquery
 from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
 from mptt.models import MPTTModel, TreeForeignKey
 from mptt.managers import TreeManager
 
-from apps.core.models import TimeStampedModel
+from apps.core.models import TimeStampedModel, WalletAddress, WalletOwner
+from apps.core.search import trigram_index
+from apps.core.tree import (
+    NestedSetBuilderMixin,
+    SubtreeQuerySetMixin,
+    roots_tree_size_index,
+    running_totals,
+    subtree_rollups,
+)
 
+# Denormalized per-user counters, recomputed in bulk after every import
+COUNTER_FIELDS = ['children_count', 'purchases_count', 'direct_volume', 'total_earnings']
 
-class LimitlessUserQuerySet(models.QuerySet):
-    """Custom QuerySet with tree field annotations."""
-    
-    def annotate_tree_fields(self):
-        """Add computed fields for tree display using subqueries to avoid JOIN multiplication."""
+# Latest earnings shown on the user detail endpoint
+RECENT_EARNINGS = 15
+
+# Text fields matched by the search endpoints, each with a trigram index
+USER_SEARCH_FIELDS = ['username', 'wallet', 'referral_code', 'email']
+PROFILE_SEARCH_FIELDS = [
+    'main_wallet', 'subwallets', 'email', 'rank',
+    'telegram', 'facebook', 'whatsapp', 'viber', 'line', 'other_contact',
+]
+
+# Wallet profile flags and sums reported by the stats endpoint
+PROFILE_FLAG_FIELDS = [
+    'has_lp', 'has_chs', 'has_dsy', 'email_verified', 'is_seller',
+    'need_private_zoom_call', 'want_business_dev_access', 'want_ceo_access',
+]
+PROFILE_TOTAL_FIELDS = {
+    'total_atla': 'atla_balance',
+    'total_jggl': 'jggl',
+    'total_bfi_atla': 'bfi_atla',
+    'total_bfi_jggl': 'bfi_jggl',
+    'total_community': 'community_count',
+}
+
+
+class LimitlessUserQuerySet(SubtreeQuerySetMixin, models.QuerySet):
+    """Custom QuerySet with helpers for the denormalized counter columns."""
+    
+    def counter_expressions(self):
+        """
+        Subquery expressions computing each counter column from the source
+        tables, without JOIN multiplication.
+        """
         from .models import LimitlessPurchase, LimitlessEarning
         
+        # Subquery for children count
+        children_count_sq = LimitlessUser.objects.filter(
+            parent=OuterRef('pk')
+        ).order_by().values('parent').annotate(cnt=Count('id')).values('cnt')
+        
         # Subquery for purchases count
         purchases_count_sq = LimitlessPurchase.objects.filter(
             buyer=OuterRef('pk'),
             payment_status='COMPLETED'
-        ).values('buyer').annotate(cnt=Count('id')).values('cnt')
+        ).order_by().values('buyer').annotate(cnt=Count('id')).values('cnt')
         
         # Subquery for direct volume
         direct_volume_sq = LimitlessPurchase.objects.filter(
             buyer=OuterRef('pk'),
             payment_status='COMPLETED'
-        ).values('buyer').annotate(total=Sum('amount_usdt')).values('total')
+        ).order_by().values('buyer').annotate(total=Sum('amount_usdt')).values('total')
         
         # Subquery for total earnings
         total_earnings_sq = LimitlessEarning.objects.filter(
             recipient=OuterRef('pk'),
             status='WITHDRAWN'
-        ).values('recipient').annotate(total=Sum('amount_usdt')).values('total')
+        ).order_by().values('recipient').annotate(total=Sum('amount_usdt')).values('total')
         
-        return self.annotate(
-            children_count=Count('children', distinct=True),
-            purchases_count=Coalesce(
-                Subquery(purchases_count_sq),
-                Value(0)
-            ),
-            direct_volume=Coalesce(
-                Subquery(direct_volume_sq),
-                Value(Decimal('0'), output_field=DecimalField(max_digits=20, decimal_places=2))
-            ),
-            total_earnings=Coalesce(
-                Subquery(total_earnings_sq),
-                Value(Decimal('0'), output_field=DecimalField(max_digits=20, decimal_places=2))
-            )
+        zero = Value(Decimal('0'), output_field=DecimalField(max_digits=20, decimal_places=6))
+        return {
+            'children_count': Coalesce(Subquery(children_count_sq), Value(0)),
+            'purchases_count': Coalesce(Subquery(purchases_count_sq), Value(0)),
+            'direct_volume': Coalesce(Subquery(direct_volume_sq), zero),
+            'total_earnings': Coalesce(Subquery(total_earnings_sq), zero),
+        }
+    
+    def refresh_counters(self):
+        """Recompute the stored counter columns with a single UPDATE."""
+        return self.update(**self.counter_expressions())
+    
+    def for_detail(self):
+        """
+        Join and prefetch what the detail serializer reads: the rollup and
+        parent rows, the purchases and the latest earnings with their buyers.
+        """
+        from .models import LimitlessEarning
+        
+        recent_earnings = LimitlessEarning.objects.select_related('buyer').order_by('-created_at', '-id')
+        return self.select_related('rollup', 'parent').prefetch_related(
+            'purchases',
+            Prefetch('earnings', queryset=recent_earnings[:RECENT_EARNINGS], to_attr='recent_earnings'),
         )
+    
+    def with_counter_drift(self):
+        """Users whose stored counters differ from the source tables."""
+        live = {f'live_{name}': expr for name, expr in self.counter_expressions().items()}
+        drift = Q()
+        for name in COUNTER_FIELDS:
+            drift |= ~Q(**{name: F(f'live_{name}')})
+        return self.annotate(**live).filter(drift)
 
 
-class LimitlessUserManager(TreeManager):
+class LimitlessUserManager(NestedSetBuilderMixin, TreeManager):
     """Custom manager for LimitlessUser."""
     
     def get_queryset(self):
         return LimitlessUserQuerySet(self.model, using=self._db)
     
-    def annotate_tree_fields(self):
-        return self.get_queryset().annotate_tree_fields()
+    def refresh_counters(self):
+        return self.get_queryset().refresh_counters()
+    
+    def with_counter_drift(self):
+        return self.get_queryset().with_counter_drift()
+    
+    def for_detail(self):
+        return self.get_queryset().for_detail()
+    
+    def subtree(self, nodes, depth, include_self=True):
+        return self.get_queryset().subtree(nodes, depth, include_self=include_self)
+    
+    def refresh_aggregates(self, tree_ids=None):
+        """
+        Recompute the counter columns and the team tables built from them,
+        and re-index the wallet addresses. Run after imports and tree rebuilds.
+        ``tree_ids`` limits the refresh to those trees, for imports that
+        changed rows of a few trees without renumbering them.
+        """
+        users = self.all() if tree_ids is None else self.filter(tree_id__in=tree_ids)
+        users.refresh_counters()
+        LimitlessTeamVolumeIndex.rebuild(tree_ids)
+        LimitlessTeamRollup.rebuild(tree_ids)
+        WalletAddress.rebuild(WalletOwner.LIMITLESS_USER, users, ['wallet'], partial=tree_ids is not None)
+    
+    def compute_stats(self):
+        """Totals shown by the stats endpoint, stored in the stats snapshot."""
+        purchases = LimitlessPurchase.objects.filter(payment_status=PaymentStatus.COMPLETED).aggregate(
+            count=Count('id'),
+            volume=Sum('amount_usdt'),
+        )
+        earnings = LimitlessEarning.objects.filter(status=EarningStatus.WITHDRAWN).aggregate(
+            total=Sum('amount_usdt'),
+        )
+        return {
+            'total_users': self.count(),
+            'total_purchases': purchases['count'],
+            'total_volume': purchases['volume'] or 0,
+            'total_earnings': earnings['total'] or 0,
+            'root_users': self.filter(parent__isnull=True).count(),
+        }
 
 
 class LimitlessUser(MPTTModel, TimeStampedModel):
@@ -70,6 +170,8 @@ class LimitlessUser(MPTTModel, TimeStampedModel):
     """
     # Original ID from CSV
     original_id = models.IntegerField(unique=True, db_index=True)
+    # Hash of the imported CSV values, compared by delta imports
+    content_hash = models.CharField(max_length=32, blank=True, editable=False, default='', db_default='')
     
     # User info
     username = models.CharField(max_length=255, blank=True, db_index=True)
@@ -107,6 +209,13 @@ class LimitlessUser(MPTTModel, TimeStampedModel):
     original_tree_id = models.IntegerField(null=True, blank=True)
     original_level = models.IntegerField(null=True, blank=True)
     
+    # Denormalized counters (see COUNTER_FIELDS), with database defaults so
+    # raw SQL inserts such as import_direct.py may leave them out
+    children_count = models.IntegerField(default=0, db_default=0)
+    purchases_count = models.IntegerField(default=0, db_default=0)
+    direct_volume = models.DecimalField(max_digits=20, decimal_places=6, default=0, db_default=0)
+    total_earnings = models.DecimalField(max_digits=20, decimal_places=6, default=0, db_default=0)
+    
     objects = LimitlessUserManager()
     
     class MPTTMeta:
@@ -116,6 +225,14 @@ class LimitlessUser(MPTTModel, TimeStampedModel):
         verbose_name = 'Limitless User'
         verbose_name_plural = 'Limitless Users'
         ordering = ['original_id']
+        indexes = [
+            trigram_index(field, f'limitless_{field}_trgm') for field in USER_SEARCH_FIELDS
+        ] + [
+            # Keyset pagination orderings, with the primary key as tiebreaker
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['username', 'id']),
+            roots_tree_size_index('limitless_root_tree_size_idx'),
+        ]
     
     def __str__(self):
         return f"{self.username or f'User {self.original_id}'}"
@@ -125,6 +242,32 @@ class LimitlessUser(MPTTModel, TimeStampedModel):
         if self.wallet:
             return f"{self.wallet[:6]}...{self.wallet[-4:]}"
         return "No wallet"
+    
+    @cached_property
+    def earnings_summary(self):
+        """
+        Earnings count and total per type plus the pending total, from one
+        grouped query. Cached for the detail serializer.
+        """
+        rows = self.earnings.order_by().values('earning_type').annotate(
+            count=Count('id'),
+            total=Sum('amount_usdt'),
+            pending=Sum('amount_usdt', filter=Q(status=EarningStatus.PENDING)),
+        )
+        by_type = []
+        pending = Decimal('0')
+        for row in rows:
+            pending += row.pop('pending') or 0
+            by_type.append(row)
+        return {'by_type': by_type, 'pending': pending}
+    
+    @property
+    def team_rollup(self):
+        """The user's team rollup, or None if rollups were not built yet."""
+        try:
+            return self.rollup
+        except ObjectDoesNotExist:
+            return None
 
 
 class WalletProfile(TimeStampedModel):
@@ -187,6 +330,9 @@ class WalletProfile(TimeStampedModel):
         verbose_name = 'Wallet Profile'
         verbose_name_plural = 'Wallet Profiles'
         ordering = ['-export_id']
+        indexes = [
+            trigram_index(field, f'profile_{field}_trgm') for field in PROFILE_SEARCH_FIELDS
+        ]
     
     def __str__(self):
         return f"Profile #{self.export_id} - {self.short_wallet}"
@@ -197,12 +343,95 @@ class WalletProfile(TimeStampedModel):
             return f"{self.main_wallet[:6]}...{self.main_wallet[-4:]}"
         return "No wallet"
     
+    @classmethod
+    def refresh_addresses(cls):
+        """Re-index the main and sub wallet addresses for exact lookups."""
+        WalletProfileSubwallet.rebuild()
+        WalletAddress.rebuild(WalletOwner.WALLET_PROFILE, cls.objects.all(), ['main_wallet', 'subwallets'])
+    
+    @classmethod
+    def compute_stats(cls, queryset=None):
+        """
+        Stats of ``queryset`` (all profiles by default) in one table scan.
+        Rows are grouped by rank with every flag counted through a FILTER
+        clause, then the per-rank rows are folded into the overall totals.
+        Decimal sums are returned as floats, so the endpoint and the stored
+        snapshot report them as JSON numbers.
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+        rows = queryset.order_by().values('rank').annotate(
+            count=Count('id'),
+            **{total: Sum(field) for total, field in PROFILE_TOTAL_FIELDS.items()},
+            **{f'{flag}_count': Count('id', filter=Q(**{flag: True})) for flag in PROFILE_FLAG_FIELDS},
+        )
+        
+        rank_stats = []
+        totals = dict.fromkeys(PROFILE_TOTAL_FIELDS)
+        feature_counts = dict.fromkeys(PROFILE_FLAG_FIELDS, 0)
+        for row in rows:
+            rank_stats.append({'rank': row['rank'], 'count': row['count']})
+            for total in totals:
+                if row[total] is not None:
+                    totals[total] = (totals[total] or 0) + row[total]
+            for flag in feature_counts:
+                feature_counts[flag] += row[f'{flag}_count']
+        rank_stats.sort(key=lambda rank: rank['count'], reverse=True)
+        
+        return {
+            'total_profiles': sum(rank['count'] for rank in rank_stats),
+            'rank_distribution': rank_stats,
+            'totals': {
+                total: float(value) if isinstance(value, Decimal) else value
+                for total, value in totals.items()
+            },
+            'feature_counts': feature_counts,
+        }
+    
     @property
     def subwallets_list(self):
-        """Return subwallets as a list."""
-        if not self.subwallets:
-            return []
-        return [w.strip() for w in self.subwallets.split(',') if w.strip()]
+        """Return subwallets as a list, from the (prefetchable) subwallet rows."""
+        return [entry.address for entry in self.subwallet_entries.all()]
+
+
+class WalletProfileSubwallet(models.Model):
+    """
+    One row per address in ``WalletProfile.subwallets``, in the order listed.
+    Rebuilt from the imported column by ``WalletProfile.refresh_addresses()``.
+    """
+    profile = models.ForeignKey(
+        WalletProfile,
+        on_delete=models.CASCADE,
+        related_name='subwallet_entries'
+    )
+    address = models.CharField(max_length=255, db_index=True)
+    position = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Wallet Profile Subwallet'
+        verbose_name_plural = 'Wallet Profile Subwallets'
+        ordering = ['profile', 'position']
+        unique_together = [['profile', 'address']]
+    
+    def __str__(self):
+        return f"{self.address} (profile #{self.profile_id})"
+    
+    @classmethod
+    def rebuild(cls):
+        """Split every profile's subwallets column into rows."""
+        profiles = WalletProfile.objects.exclude(subwallets='').order_by().values_list('pk', 'subwallets')
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(
+                (
+                    cls(profile_id=pk, address=address, position=position)
+                    for pk, subwallets in profiles.iterator()
+                    for position, address in enumerate(
+                        dict.fromkeys(w.strip() for w in subwallets.split(',') if w.strip())
+                    )
+                ),
+                batch_size=1000
+            )
 
 
 class PaymentStatus(models.TextChoices):
@@ -218,6 +447,8 @@ class LimitlessPurchase(TimeStampedModel):
     """
     # Original ID from CSV
     original_id = models.IntegerField(unique=True, db_index=True)
+    # Hash of the imported CSV values, compared by delta imports
+    content_hash = models.CharField(max_length=32, blank=True, editable=False, default='', db_default='')
     
     # Relationship
     buyer = models.ForeignKey(
@@ -252,6 +483,11 @@ class LimitlessPurchase(TimeStampedModel):
         verbose_name = 'Limitless Purchase'
         verbose_name_plural = 'Limitless Purchases'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination, unfiltered and per buyer
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['buyer_original_id', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"Purchase #{self.original_id} - ${self.amount_usdt}"
@@ -275,6 +511,8 @@ class LimitlessEarning(TimeStampedModel):
     """
     # Original ID from CSV
     original_id = models.IntegerField(unique=True, db_index=True)
+    # Hash of the imported CSV values, compared by delta imports
+    content_hash = models.CharField(max_length=32, blank=True, editable=False, default='', db_default='')
     
     # Relationships
     recipient = models.ForeignKey(
@@ -337,6 +575,156 @@ class LimitlessEarning(TimeStampedModel):
         verbose_name = 'Limitless Earning'
         verbose_name_plural = 'Limitless Earnings'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination, unfiltered and per recipient
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['recipient_original_id', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"Earning #{self.original_id} - ${self.amount_usdt} ({self.earning_type})"
+
+
+class LimitlessTeamVolumeIndex(models.Model):
+    """
+    Prefix-sum index of completed purchase volume over the nested set.
+    Each row holds the running total of the user's tree (ordered by lft)
+    before the user and after their last descendant, so team volume is
+    a single subtraction. Rebuilt after tree rebuilds and imports.
+    """
+    user = models.OneToOneField(
+        LimitlessUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='volume_index'
+    )
+    total_at_lft = models.DecimalField(max_digits=24, decimal_places=6, default=0)
+    total_at_rght = models.DecimalField(max_digits=24, decimal_places=6, default=0)
+    
+    class Meta:
+        verbose_name = 'Limitless Team Volume Index'
+        verbose_name_plural = 'Limitless Team Volume Index'
+    
+    def __str__(self):
+        return f"Team volume for user #{self.user_id} - ${self.team_volume}"
+    
+    @property
+    def team_volume(self):
+        return self.total_at_rght - self.total_at_lft
+    
+    @classmethod
+    def get_team_volumes(cls, user_ids=None, tree_ids=None) -> dict:
+        """
+        Get team volume for many users, or the users of ``tree_ids``, or
+        every indexed user by default, with one query (user_id -> volume).
+        """
+        rows = cls.objects.all()
+        if user_ids is not None:
+            rows = rows.filter(user_id__in=list(user_ids))
+        if tree_ids is not None:
+            rows = rows.filter(user__tree_id__in=tree_ids)
+        rows = rows.values_list('user_id', 'total_at_lft', 'total_at_rght')
+        return {user_id: at_rght - at_lft for user_id, at_lft, at_rght in rows.iterator()}
+    
+    @classmethod
+    def get_team_volume(cls, user_id):
+        """Get team volume for one user, or None if the user is not indexed."""
+        return cls.get_team_volumes([user_id]).get(user_id)
+    
+    @classmethod
+    def rebuild(cls, tree_ids=None):
+        """Recompute the index for every tree, or ``tree_ids``, from completed purchases."""
+        purchases = LimitlessPurchase.objects.filter(
+            payment_status=PaymentStatus.COMPLETED,
+            buyer__isnull=False
+        )
+        nodes = LimitlessUser.objects.all()
+        rows = cls.objects.all()
+        if tree_ids is not None:
+            purchases = purchases.filter(buyer__tree_id__in=tree_ids)
+            nodes = nodes.filter(tree_id__in=tree_ids)
+            rows = rows.filter(user__tree_id__in=tree_ids)
+        volumes = dict(
+            purchases.order_by().values('buyer').annotate(
+                total=Sum('amount_usdt')
+            ).values_list('buyer', 'total')
+        )
+        nodes = nodes.order_by('tree_id', 'lft').values_list(
+            'id', 'tree_id', 'lft', 'rght'
+        )
+        totals = running_totals(nodes.iterator(), volumes)
+        
+        with transaction.atomic():
+            rows.delete()
+            cls.objects.bulk_create(
+                (
+                    cls(user_id=user_id, total_at_lft=at_lft, total_at_rght=at_rght)
+                    for user_id, (at_lft, at_rght) in totals.items()
+                ),
+                batch_size=1000
+            )
+        return len(totals)
+
+
+class LimitlessTeamRollup(models.Model):
+    """
+    Subtree totals per user, computed in one bottom-up pass over each tree
+    from the stored counter columns, with team_volume taken from the team
+    volume index. team_size counts descendants, max_depth is the deepest
+    level below the user, the other totals include the user.
+    """
+    user = models.OneToOneField(
+        LimitlessUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rollup'
+    )
+    team_size = models.IntegerField(default=0)
+    team_volume = models.DecimalField(max_digits=24, decimal_places=6, default=0, db_index=True)
+    team_earnings = models.DecimalField(max_digits=24, decimal_places=6, default=0)
+    team_purchases = models.IntegerField(default=0)
+    max_depth = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Limitless Team Rollup'
+        verbose_name_plural = 'Limitless Team Rollups'
+    
+    def __str__(self):
+        return f"Team of user #{self.user_id} - {self.team_size} members"
+    
+    @classmethod
+    def rebuild(cls, tree_ids=None):
+        """
+        Recompute rollups for every tree, or ``tree_ids``. Expects fresh
+        counter columns and a fresh team volume index, which team_volume is
+        read from.
+        """
+        nodes = LimitlessUser.objects.all()
+        rows = cls.objects.all()
+        if tree_ids is not None:
+            nodes = nodes.filter(tree_id__in=tree_ids)
+            rows = rows.filter(user__tree_id__in=tree_ids)
+        nodes = nodes.order_by('-tree_id', '-lft').values_list(
+            'id', 'parent_id', 'total_earnings', 'purchases_count'
+        )
+        rollups = subtree_rollups(nodes.iterator())
+        volumes = LimitlessTeamVolumeIndex.get_team_volumes(tree_ids=tree_ids)
+        
+        with transaction.atomic():
+            rows.delete()
+            cls.objects.bulk_create(
+                (
+                    cls(
+                        user_id=user_id,
+                        team_size=team_size,
+                        max_depth=max_depth,
+                        team_volume=volumes.get(user_id, 0),
+                        team_earnings=team_earnings,
+                        team_purchases=team_purchases,
+                    )
+                    for user_id, (team_size, max_depth, team_earnings, team_purchases)
+                    in rollups.items()
+                ),
+                batch_size=1000
+            )
+        return len(rollups)
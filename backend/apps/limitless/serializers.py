@@ -2,9 +2,14 @@
 Serializers for Limitless API.
 """
 from rest_framework import serializers
-from django.db.models import Sum, Count, Q
 
-from .models import LimitlessUser, LimitlessPurchase, LimitlessEarning, WalletProfile
+from .models import (
+    RECENT_EARNINGS,
+    LimitlessUser,
+    LimitlessPurchase,
+    LimitlessEarning,
+    WalletProfile,
+)
 from apps.core.models import SellerAssignment
 
 
@@ -32,11 +37,11 @@ class LimitlessEarningSerializer(serializers.ModelSerializer):
 
 
 class LimitlessUserListSerializer(serializers.ModelSerializer):
-    """Serializer for user list view."""
-    children_count = serializers.SerializerMethodField()
-    purchases_count = serializers.SerializerMethodField()
-    direct_volume = serializers.SerializerMethodField()
-    total_earnings = serializers.SerializerMethodField()
+    """Serializer for user list view, reading the stored counter columns."""
+    children_count = serializers.IntegerField(read_only=True)
+    purchases_count = serializers.IntegerField(read_only=True)
+    direct_volume = serializers.FloatField(read_only=True)
+    total_earnings = serializers.FloatField(read_only=True)
     
     class Meta:
         model = LimitlessUser
@@ -45,35 +50,25 @@ class LimitlessUserListSerializer(serializers.ModelSerializer):
             'is_active', 'children_count', 'purchases_count',
             'direct_volume', 'total_earnings', 'created_at'
         ]
-    
-    def get_children_count(self, obj):
-        return obj.get_children().count()
-    
-    def get_purchases_count(self, obj):
-        return obj.purchases.filter(payment_status='COMPLETED').count()
-    
-    def get_direct_volume(self, obj):
-        result = obj.purchases.filter(
-            payment_status='COMPLETED'
-        ).aggregate(total=Sum('amount_usdt'))
-        return float(result['total'] or 0)
-    
-    def get_total_earnings(self, obj):
-        result = obj.earnings.filter(
-            status='WITHDRAWN'
-        ).aggregate(total=Sum('amount_usdt'))
-        return float(result['total'] or 0)
 
 
 class LimitlessUserDetailSerializer(serializers.ModelSerializer):
-    """Serializer for user detail view."""
-    children_count = serializers.SerializerMethodField()
+    """
+    Serializer for user detail view. Expects a user loaded with
+    ``LimitlessUser.objects.for_detail()``; counters come from the stored columns.
+    """
+    children_count = serializers.IntegerField(read_only=True)
     team_size = serializers.SerializerMethodField()
-    purchases_count = serializers.SerializerMethodField()
+    purchases_count = serializers.IntegerField(read_only=True)
     pending_purchases_count = serializers.SerializerMethodField()
-    direct_volume = serializers.SerializerMethodField()
-    team_volume = serializers.SerializerMethodField()
-    total_earnings = serializers.SerializerMethodField()
+    direct_volume = serializers.FloatField(read_only=True)
+    team_volume = serializers.FloatField(source='team_rollup.team_volume', read_only=True, default=0)
+    team_earnings = serializers.DecimalField(
+        source='rollup.team_earnings', max_digits=24, decimal_places=2, read_only=True
+    )
+    team_purchases = serializers.IntegerField(source='rollup.team_purchases', read_only=True)
+    max_depth = serializers.IntegerField(source='rollup.max_depth', read_only=True)
+    total_earnings = serializers.FloatField(read_only=True)
     pending_earnings = serializers.SerializerMethodField()
     parent_username = serializers.CharField(source='parent.username', read_only=True)
     purchases = LimitlessPurchaseSerializer(many=True, read_only=True)
@@ -88,58 +83,33 @@ class LimitlessUserDetailSerializer(serializers.ModelSerializer):
             'referral_code_confirmed', 'is_active', 'is_superuser', 'is_staff',
             'date_joined', 'created_at', 'parent_username',
             'children_count', 'team_size', 'purchases_count', 'pending_purchases_count',
-            'direct_volume', 'team_volume', 'total_earnings', 'pending_earnings',
+            'direct_volume', 'team_volume', 'team_earnings', 'team_purchases', 'max_depth',
+            'total_earnings', 'pending_earnings',
             'purchases', 'recent_earnings', 'earnings_by_type', 'assigned_sellers'
         ]
     
-    def get_children_count(self, obj):
-        return obj.get_children().count()
-    
     def get_team_size(self, obj):
+        rollup = obj.team_rollup
+        if rollup is not None:
+            return rollup.team_size
         return obj.get_descendant_count()
     
-    def get_purchases_count(self, obj):
-        return obj.purchases.filter(payment_status='COMPLETED').count()
-    
     def get_pending_purchases_count(self, obj):
-        return obj.purchases.filter(payment_status='PENDING').count()
-    
-    def get_direct_volume(self, obj):
-        result = obj.purchases.filter(
-            payment_status='COMPLETED'
-        ).aggregate(total=Sum('amount_usdt'))
-        return float(result['total'] or 0)
-    
-    def get_team_volume(self, obj):
-        """Calculate total volume from user and all descendants."""
-        descendants = obj.get_descendants(include_self=True)
-        result = LimitlessPurchase.objects.filter(
-            buyer__in=descendants,
-            payment_status='COMPLETED'
-        ).aggregate(total=Sum('amount_usdt'))
-        return float(result['total'] or 0)
-    
-    def get_total_earnings(self, obj):
-        result = obj.earnings.filter(
-            status='WITHDRAWN'
-        ).aggregate(total=Sum('amount_usdt'))
-        return float(result['total'] or 0)
+        # Counted over the purchases listed in the response
+        return sum(1 for purchase in obj.purchases.all() if purchase.payment_status == 'PENDING')
     
     def get_pending_earnings(self, obj):
-        result = obj.earnings.filter(
-            status='PENDING'
-        ).aggregate(total=Sum('amount_usdt'))
-        return float(result['total'] or 0)
+        return float(obj.earnings_summary['pending'])
     
     def get_recent_earnings(self, obj):
-        earnings = obj.earnings.order_by('-created_at')[:15]
+        # Prefetched by for_detail(), otherwise queried with the same join
+        earnings = getattr(obj, 'recent_earnings', None)
+        if earnings is None:
+            earnings = obj.earnings.select_related('buyer').order_by('-created_at', '-id')[:RECENT_EARNINGS]
         return LimitlessEarningSerializer(earnings, many=True).data
     
     def get_earnings_by_type(self, obj):
-        return list(obj.earnings.values('earning_type').annotate(
-            count=Count('id'),
-            total=Sum('amount_usdt')
-        ))
+        return obj.earnings_summary['by_type']
     
     def get_assigned_sellers(self, obj):
         return SellerAssignment.get_seller_names_for_user('limitless', obj.id)
@@ -150,7 +120,13 @@ class LimitlessUserTreeSerializer(serializers.ModelSerializer):
     children = serializers.SerializerMethodField()
     purchases_count = serializers.IntegerField(read_only=True, default=0)
     direct_volume = serializers.DecimalField(max_digits=20, decimal_places=2, read_only=True, default=0)
-    team_volume = serializers.SerializerMethodField()
+    team_volume = serializers.FloatField(source='team_rollup.team_volume', read_only=True, default=0)
+    team_size = serializers.IntegerField(source='rollup.team_size', read_only=True)
+    team_earnings = serializers.DecimalField(
+        source='rollup.team_earnings', max_digits=24, decimal_places=2, read_only=True
+    )
+    team_purchases = serializers.IntegerField(source='rollup.team_purchases', read_only=True)
+    max_depth = serializers.IntegerField(source='rollup.max_depth', read_only=True)
     total_earnings = serializers.DecimalField(max_digits=20, decimal_places=2, read_only=True, default=0)
     children_count = serializers.IntegerField(read_only=True, default=0)
     tree_size = serializers.IntegerField(read_only=True, default=0)
@@ -161,23 +137,10 @@ class LimitlessUserTreeSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'original_id', 'username', 'wallet', 'is_active',
             'children_count', 'tree_size', 'purchases_count', 'direct_volume',
-            'team_volume', 'total_earnings', 'children', 'assigned_sellers'
+            'team_volume', 'team_size', 'team_earnings', 'team_purchases', 'max_depth',
+            'total_earnings', 'children', 'assigned_sellers'
         ]
     
-    def get_team_volume(self, obj):
-        """Calculate total volume from user and all descendants using MPTT."""
-        # Use MPTT lft/rght for efficient descendant query
-        descendants = LimitlessUser.objects.filter(
-            tree_id=obj.tree_id,
-            lft__gte=obj.lft,
-            rght__lte=obj.rght
-        )
-        result = LimitlessPurchase.objects.filter(
-            buyer__in=descendants,
-            payment_status='COMPLETED'
-        ).aggregate(total=Sum('amount_usdt'))
-        return float(result['total'] or 0)
-    
     def get_children(self, obj):
         max_depth = self.context.get('max_depth', 0)
         current_depth = self.context.get('current_depth', 0)
@@ -185,19 +148,24 @@ class LimitlessUserTreeSerializer(serializers.ModelSerializer):
         if current_depth >= max_depth:
             return []
         
-        # Use annotated children
-        children = obj.get_children().annotate_tree_fields()
+        # Use the preloaded subtree if the view provided one, otherwise fetch
+        children_map = self.context.get('children_map')
+        if children_map is not None:
+            children = children_map.get(obj.id, [])
+        else:
+            children = obj.get_children()
         return LimitlessUserTreeSerializer(
             children,
             many=True,
             context={
-                'max_depth': max_depth,
+                **self.context,
                 'current_depth': current_depth + 1
             }
         ).data
     
     def get_assigned_sellers(self, obj):
-        return SellerAssignment.get_seller_names_for_user('limitless', obj.id)
+        # Filled in for the whole response by apps.core.cache.attach_sellers()
+        return []
 
 
 class LimitlessStatsSerializer(serializers.Serializer):
@@ -207,6 +175,8 @@ class LimitlessStatsSerializer(serializers.Serializer):
     total_volume = serializers.DecimalField(max_digits=20, decimal_places=2)
     total_earnings = serializers.DecimalField(max_digits=20, decimal_places=2)
     root_users = serializers.IntegerField()
+    snapshot_at = serializers.DateTimeField()
+    dataset_version = serializers.IntegerField()
 
 
 class WalletProfileSerializer(serializers.ModelSerializer):
@@ -239,3 +209,31 @@ class WalletProfileListSerializer(serializers.ModelSerializer):
             'id', 'export_id', 'main_wallet', 'short_wallet',
             'email', 'rank', 'atla_balance', 'community_count'
         ]
+
+
+class WalletProfileRankCountSerializer(serializers.Serializer):
+    """Profile count of one rank."""
+    rank = serializers.CharField()
+    count = serializers.IntegerField()
+
+
+class WalletProfileTotalsSerializer(serializers.Serializer):
+    """Balance and community sums of the counted profiles."""
+    total_atla = serializers.FloatField()
+    total_jggl = serializers.FloatField()
+    total_bfi_atla = serializers.FloatField()
+    total_bfi_jggl = serializers.FloatField()
+    total_community = serializers.IntegerField()
+
+
+class WalletProfileStatsSerializer(serializers.Serializer):
+    """
+    Serializer for wallet profile statistics, from the snapshot or computed
+    for a filtered list (``snapshot_at`` is null then).
+    """
+    total_profiles = serializers.IntegerField()
+    rank_distribution = WalletProfileRankCountSerializer(many=True)
+    totals = WalletProfileTotalsSerializer()
+    feature_counts = serializers.DictField(child=serializers.IntegerField())
+    snapshot_at = serializers.DateTimeField(allow_null=True)
+    dataset_version = serializers.IntegerField()
@@ -0,0 +1,62 @@
+"""
+Wallet profile lookups by address, through the canonical wallet address index.
+"""
+import pytest
+from django.urls import reverse
+
+from apps.core.models import Dataset, DatasetVersion
+from apps.limitless.models import WalletProfile
+
+pytestmark = pytest.mark.django_db
+
+SUBWALLET = '0x52908400098527886E0F7030069857D2E4169EE7'
+
+
+@pytest.fixture
+def profile():
+    profile = WalletProfile.objects.create(
+        export_id=1, main_wallet=f'0x{1:040x}', subwallets=f'{SUBWALLET}, TXYZopYRdj2D9XRtbG411XZZ3kM5VkAeBf'
+    )
+    WalletProfile.refresh_addresses()
+    return profile
+
+
+def test_by_wallet_finds_a_subwallet_in_any_case(client, profile):
+    url = reverse('limitless:wallet-profile-by-wallet', args=[SUBWALLET.lower()])
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.json()['id'] == profile.pk
+    assert response.json()['subwallets_list'] == [SUBWALLET, 'TXYZopYRdj2D9XRtbG411XZZ3kM5VkAeBf']
+
+
+def test_by_wallets_matches_subwallets_exactly(client, profile):
+    url = reverse('limitless:wallet-profile-by-wallets')
+    response = client.post(url, {'addresses': [SUBWALLET, SUBWALLET[:-1]]}, content_type='application/json')
+
+    assert response.status_code == 200
+    assert list(response.json()['results']) == [SUBWALLET]
+
+
+def test_subwallets_list_is_read_from_the_child_rows(client, profile):
+    # The column is only split on import; responses list the stored rows
+    WalletProfile.objects.filter(pk=profile.pk).update(subwallets='')
+    response = client.get(reverse('limitless:wallet-profile-detail', args=[profile.pk]))
+
+    assert response.json()['subwallets_list'] == [SUBWALLET, 'TXYZopYRdj2D9XRtbG411XZZ3kM5VkAeBf']
+
+
+def test_filtered_stats_match_the_snapshot_shape(client, profile):
+    WalletProfile.objects.filter(pk=profile.pk).update(atla_balance='12.50', rank='Gold')
+    DatasetVersion.publish(Dataset.WALLET_PROFILES)
+    url = reverse('limitless:wallet-profile-stats')
+
+    snapshot = client.get(url).json()
+    filtered = client.get(url, {'rank': 'Gold'}).json()
+
+    assert filtered.keys() == snapshot.keys()
+    assert filtered['totals'] == snapshot['totals'] == {
+        'total_atla': 12.5, 'total_jggl': 0.0, 'total_bfi_atla': 0.0, 'total_bfi_jggl': 0.0, 'total_community': 0,
+    }
+    assert filtered['snapshot_at'] is None
+    assert filtered['dataset_version'] == snapshot['dataset_version'] == 1
@@ -1,7 +1,10 @@
 """
 API Views for Limitless.
 """
-from django.db.models import Sum, Count, Q, Case, When, Value, IntegerField, F, ExpressionWrapper
+from decimal import Decimal
+
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -9,7 +12,22 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
-from .models import LimitlessUser, LimitlessPurchase, LimitlessEarning, WalletProfile
+from apps.core.cache import DatasetCacheMixin, attach_sellers
+from apps.core.models import Dataset, DatasetVersion, StatsSnapshot, WalletAddress, WalletOwner
+from apps.core.pagination import KeysetPagination, RootsPagination
+from apps.core.search import trigram_search
+from apps.core.tree import group_children, tree_size
+from apps.core.wallets import canonical_address
+
+from .models import (
+    PROFILE_SEARCH_FIELDS,
+    USER_SEARCH_FIELDS,
+    LimitlessUser,
+    LimitlessPurchase,
+    LimitlessEarning,
+    WalletProfile,
+)
+from .filters import WalletProfileFilter
 from .serializers import (
     LimitlessUserListSerializer,
     LimitlessUserDetailSerializer,
@@ -19,10 +37,25 @@ from .serializers import (
     LimitlessStatsSerializer,
     WalletProfileSerializer,
     WalletProfileListSerializer,
+    WalletProfileStatsSerializer,
 )
 
+# Upper bound on addresses per batch wallet profile lookup
+MAX_BATCH_WALLETS = 5000
 
-class LimitlessUserViewSet(viewsets.ReadOnlyModelViewSet):
+
+def pick_profile_id(matches):
+    """
+    Pick the profile for an address from its ``{profile_id: [fields]}``
+    matches: the one using it as main wallet, else the oldest one.
+    """
+    return next(
+        (pk for pk, fields in matches.items() if 'main_wallet' in fields),
+        min(matches, default=None)
+    )
+
+
+class LimitlessUserViewSet(DatasetCacheMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Limitless users.
     
@@ -33,9 +66,13 @@ class LimitlessUserViewSet(viewsets.ReadOnlyModelViewSet):
     """
     queryset = LimitlessUser.objects.all()
     permission_classes = [AllowAny]  # Adjust as needed
+    cache_dataset = Dataset.LIMITLESS
+    seller_platform = 'limitless'
+    sellerless_actions = ['list', 'stats']
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['is_active', 'referral_code_confirmed']
-    search_fields = ['username', 'wallet', 'referral_code', 'email']
+    search_fields = USER_SEARCH_FIELDS
     ordering_fields = ['created_at', 'username', 'original_id']
     ordering = ['original_id']
     
@@ -46,6 +83,43 @@ class LimitlessUserViewSet(viewsets.ReadOnlyModelViewSet):
             return LimitlessUserTreeSerializer
         return LimitlessUserListSerializer
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.for_detail()
+        elif self.action != 'list':
+            # Team statistics are read from the rollup table
+            queryset = queryset.select_related('rollup')
+        return queryset
+    
+    def get_tree_context(self, nodes, max_depth):
+        """
+        Build serializer context with the subtrees of ``nodes`` preloaded
+        (joined with their team rollups), so serializing costs a fixed number
+        of queries regardless of depth. The sellers of every node are added
+        to the serialized body by ``with_sellers()``.
+        """
+        children_map = {}
+        if max_depth > 0:
+            subtree = LimitlessUser.objects.subtree(
+                nodes, max_depth, include_self=False
+            ).select_related('rollup')
+            children_map = group_children(subtree)
+        
+        return {
+            'max_depth': max_depth,
+            'current_depth': 0,
+            'children_map': children_map,
+        }
+    
+    def with_sellers(self, data):
+        """
+        Response of ``data`` with the ``assigned_sellers`` of every node filled
+        in by ``attach_sellers()``, the grouped query that also refreshes
+        cached bodies.
+        """
+        return Response(attach_sellers(data, self.seller_platform))
+    
     @action(detail=True, methods=['get'])
     def tree(self, request, pk=None):
         """Get user's subtree with configurable depth."""
@@ -54,124 +128,108 @@ class LimitlessUserViewSet(viewsets.ReadOnlyModelViewSet):
         
         serializer = LimitlessUserTreeSerializer(
             user,
-            context={'max_depth': max_depth, 'current_depth': 0}
+            context=self.get_tree_context([user], max_depth)
         )
-        return Response(serializer.data)
+        return self.with_sellers(serializer.data)
+    
+    # Orderings accepted by the roots ``sort`` parameter
+    ROOTS_ORDERINGS = {
+        'tree_size': ['-tree_size', 'original_id'],
+        'team_volume': ['-team_volume', 'original_id'],
+    }
     
     @action(detail=False, methods=['get'])
     def roots(self, request):
-        """Get root users (users without parents) with pagination, sorted by tree size descending."""
-        # Annotate with tree_size using MPTT lft/rght: (rght - lft - 1) / 2 = number of descendants
-        roots = self.queryset.filter(parent__isnull=True).annotate_tree_fields().annotate(
-            tree_size=ExpressionWrapper(
-                (F('rght') - F('lft') - 1) / 2,
-                output_field=IntegerField()
+        """
+        Get root users (users without parents) sorted by tree size (default)
+        or team volume descending, paginated by cursor. The tree size order
+        is read off a partial index on roots, and the total is the root count
+        kept in the stats snapshot, so every page costs the same.
+        """
+        sort = request.query_params.get('sort', 'tree_size')
+        if sort not in self.ROOTS_ORDERINGS:
+            return Response(
+                {'error': f"sort must be one of: {', '.join(self.ROOTS_ORDERINGS)}"},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        ).order_by('-tree_size', 'original_id')  # Sort by tree size descending, then by original_id
-        max_depth = int(request.query_params.get('depth', 0))  # Default 0 - no children
         
-        # Pagination parameters
-        limit = min(int(request.query_params.get('limit', 50)), 200)  # Max 200
-        offset = int(request.query_params.get('offset', 0))
+        roots = self.get_queryset().filter(parent__isnull=True).annotate(
+            tree_size=tree_size(),
+            team_volume=Coalesce('rollup__team_volume', Value(Decimal('0'))),
+        )
+        max_depth = int(request.query_params.get('depth', 0))  # Default 0 - no children
         
-        total_count = roots.count()
-        roots_page = roots[offset:offset + limit]
+        paginator = RootsPagination(ordering=self.ROOTS_ORDERINGS[sort])
+        roots_page = paginator.paginate_queryset(roots, request, view=self)
         
         serializer = LimitlessUserTreeSerializer(
             roots_page,
             many=True,
-            context={'max_depth': max_depth, 'current_depth': 0}
+            context=self.get_tree_context(roots_page, max_depth)
         )
         
-        return Response({
+        return self.with_sellers({
             'results': serializer.data,
-            'total': total_count,
-            'limit': limit,
-            'offset': offset,
-            'has_more': offset + limit < total_count,
+            'total': StatsSnapshot.get(Dataset.LIMITLESS).data['root_users'],
+            'limit': paginator.page_size,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'has_more': paginator.has_next,
         })
     
     @action(detail=True, methods=['get'])
     def ancestors(self, request, pk=None):
         """Get user's ancestors (path from root to this user)."""
         user = self.get_object()
-        ancestors = user.get_ancestors(include_self=True).annotate_tree_fields()
+        ancestors = list(user.get_ancestors(include_self=True).select_related('rollup'))
         
         serializer = LimitlessUserTreeSerializer(
             ancestors,
             many=True,
-            context={'max_depth': 0, 'current_depth': 0}
+            context=self.get_tree_context(ancestors, 0)
         )
-        return Response({
+        return self.with_sellers({
             'user_id': user.id,
             'path': serializer.data,
         })
     
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Search users with autocomplete-friendly response."""
+        """Search users with autocomplete-friendly response, best matches first."""
         query = request.query_params.get('q', '').strip()
         limit = min(int(request.query_params.get('limit', 20)), 50)
         
         if len(query) < 2:
             return Response({'results': [], 'query': query})
         
-        users = self.queryset.filter(
-            Q(username__icontains=query) |
-            Q(wallet__icontains=query) |
-            Q(referral_code__icontains=query) |
-            Q(email__icontains=query)
-        ).annotate_tree_fields()[:limit]
+        users = trigram_search(self.get_queryset(), USER_SEARCH_FIELDS, query)[:limit]
+        users = list(users)
         
         serializer = LimitlessUserTreeSerializer(
             users,
             many=True,
-            context={'max_depth': 0, 'current_depth': 0}
+            context=self.get_tree_context(users, 0)
         )
-        return Response({
+        return self.with_sellers({
             'results': serializer.data,
             'query': query,
         })
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Get overall statistics."""
-        total_users = LimitlessUser.objects.count()
-        
-        completed_purchases = LimitlessPurchase.objects.filter(
-            payment_status='COMPLETED'
-        )
-        total_purchases = completed_purchases.count()
-        total_volume = completed_purchases.aggregate(
-            total=Sum('amount_usdt')
-        )['total'] or 0
-        
-        withdrawn_earnings = LimitlessEarning.objects.filter(
-            status='WITHDRAWN'
-        )
-        total_earnings = withdrawn_earnings.aggregate(
-            total=Sum('amount_usdt')
-        )['total'] or 0
-        
-        root_users = LimitlessUser.objects.filter(parent__isnull=True).count()
-        
-        data = {
-            'total_users': total_users,
-            'total_purchases': total_purchases,
-            'total_volume': total_volume,
-            'total_earnings': total_earnings,
-            'root_users': root_users,
-        }
-        
-        serializer = LimitlessStatsSerializer(data)
+        """Get overall statistics from the snapshot taken after the last import."""
+        snapshot = StatsSnapshot.get(Dataset.LIMITLESS)
+        serializer = LimitlessStatsSerializer(snapshot.as_response())
         return Response(serializer.data)
 
 
-class LimitlessPurchaseViewSet(viewsets.ReadOnlyModelViewSet):
+class LimitlessPurchaseViewSet(DatasetCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for Limitless purchases."""
     queryset = LimitlessPurchase.objects.all()
     serializer_class = LimitlessPurchaseSerializer
     permission_classes = [AllowAny]
+    cache_dataset = Dataset.LIMITLESS
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['payment_status', 'pack_id', 'buyer_original_id']
     search_fields = ['tx_hash']
@@ -179,18 +237,20 @@ class LimitlessPurchaseViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['-created_at']
 
 
-class LimitlessEarningViewSet(viewsets.ReadOnlyModelViewSet):
+class LimitlessEarningViewSet(DatasetCacheMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for Limitless earnings."""
-    queryset = LimitlessEarning.objects.all()
+    queryset = LimitlessEarning.objects.select_related('buyer')
     serializer_class = LimitlessEarningSerializer
     permission_classes = [AllowAny]
+    cache_dataset = Dataset.LIMITLESS
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['status', 'earning_type', 'recipient_original_id']
     ordering_fields = ['created_at', 'amount_usdt']
     ordering = ['-created_at']
 
 
-class WalletProfileViewSet(viewsets.ReadOnlyModelViewSet):
+class WalletProfileViewSet(DatasetCacheMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for wallet profiles.
     
@@ -201,9 +261,10 @@ class WalletProfileViewSet(viewsets.ReadOnlyModelViewSet):
     """
     queryset = WalletProfile.objects.all()
     permission_classes = [AllowAny]
+    cache_dataset = Dataset.WALLET_PROFILES
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['rank', 'email_verified', 'is_seller', 'has_lp', 'has_chs', 'has_dsy']
-    search_fields = ['main_wallet', 'subwallets', 'email', 'telegram', 'rank']
+    filterset_class = WalletProfileFilter
+    search_fields = PROFILE_SEARCH_FIELDS
     ordering_fields = ['created_at', 'atla_balance', 'export_id', 'rank']
     ordering = ['-export_id']
     
@@ -212,11 +273,17 @@ class WalletProfileViewSet(viewsets.ReadOnlyModelViewSet):
             return WalletProfileListSerializer
         return WalletProfileSerializer
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related('subwallet_entries')
+        return queryset
+    
     @action(detail=False, methods=['get'], url_path='wallet/(?P<wallet_address>[^/.]+)')
     def by_wallet(self, request, wallet_address=None):
         """
         Get wallet profile by wallet address.
-        Searches in main_wallet and subwallets.
+        Looks up main_wallet and subwallets in the wallet address index.
         """
         if not wallet_address or len(wallet_address) < 10:
             return Response(
@@ -224,14 +291,13 @@ class WalletProfileViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Search in main_wallet first
-        profile = WalletProfile.objects.filter(main_wallet=wallet_address).first()
-        
-        # If not found, search in subwallets
-        if not profile:
-            profile = WalletProfile.objects.filter(
-                subwallets__icontains=wallet_address
-            ).first()
+        # Exact match on the canonical address, main wallet first
+        matches = WalletAddress.get_owners(wallet_address).get(WalletOwner.WALLET_PROFILE, {})
+        profile_id = pick_profile_id(matches)
+        profile = (
+            WalletProfile.objects.prefetch_related('subwallet_entries').filter(pk=profile_id).first()
+            if profile_id else None
+        )
         
         if not profile:
             return Response(
@@ -242,22 +308,52 @@ class WalletProfileViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = WalletProfileSerializer(profile)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['post'], url_path='wallets')
+    def by_wallets(self, request):
+        """
+        Get the wallet profiles of many wallet addresses at once.
+        Body: {"addresses": [...]}, up to MAX_BATCH_WALLETS addresses.
+        Returns the list payload of each matched profile keyed by the address
+        as sent; addresses without a profile are left out.
+        """
+        addresses = request.data.get('addresses')
+        if not isinstance(addresses, list) or not all(isinstance(a, str) for a in addresses):
+            return Response(
+                {'error': 'addresses must be a list of wallet addresses'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(addresses) > MAX_BATCH_WALLETS:
+            return Response(
+                {'error': f'At most {MAX_BATCH_WALLETS} addresses per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        owners = WalletAddress.get_owners_many(addresses, WalletOwner.WALLET_PROFILE)
+        profile_ids = {}
+        for address in addresses:
+            matches = owners.get(canonical_address(address), {}).get(WalletOwner.WALLET_PROFILE)
+            if matches:
+                profile_ids[address] = pick_profile_id(matches)
+        
+        profiles = WalletProfile.objects.in_bulk(set(profile_ids.values())).values()
+        payloads = {
+            item['id']: item
+            for item in WalletProfileListSerializer(profiles, many=True).data
+        }
+        return Response({
+            'results': {address: payloads[pk] for address, pk in profile_ids.items()},
+        })
+    
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Search wallet profiles with autocomplete-friendly response."""
+        """Search wallet profiles with autocomplete-friendly response, best matches first."""
         query = request.query_params.get('q', '').strip()
         limit = min(int(request.query_params.get('limit', 20)), 50)
         
         if len(query) < 2:
             return Response({'results': [], 'query': query})
         
-        profiles = self.queryset.filter(
-            Q(main_wallet__icontains=query) |
-            Q(subwallets__icontains=query) |
-            Q(email__icontains=query) |
-            Q(telegram__icontains=query) |
-            Q(rank__icontains=query)
-        )[:limit]
+        profiles = trigram_search(self.queryset, PROFILE_SEARCH_FIELDS, query)[:limit]
         
         serializer = WalletProfileListSerializer(profiles, many=True)
         return Response({
@@ -267,40 +363,20 @@ class WalletProfileViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Get overall wallet profile statistics."""
-        total_profiles = WalletProfile.objects.count()
-        
-        # Rank distribution
-        rank_stats = list(
-            WalletProfile.objects.values('rank')
-            .annotate(count=Count('id'))
-            .order_by('-count')
-        )
-        
-        # Totals
-        totals = WalletProfile.objects.aggregate(
-            total_atla=Sum('atla_balance'),
-            total_jggl=Sum('jggl'),
-            total_bfi_atla=Sum('bfi_atla'),
-            total_bfi_jggl=Sum('bfi_jggl'),
-            total_community=Sum('community_count'),
-        )
-        
-        # Feature counts
-        feature_counts = {
-            'has_lp': WalletProfile.objects.filter(has_lp=True).count(),
-            'has_chs': WalletProfile.objects.filter(has_chs=True).count(),
-            'has_dsy': WalletProfile.objects.filter(has_dsy=True).count(),
-            'email_verified': WalletProfile.objects.filter(email_verified=True).count(),
-            'is_seller': WalletProfile.objects.filter(is_seller=True).count(),
-            'need_private_zoom_call': WalletProfile.objects.filter(need_private_zoom_call=True).count(),
-            'want_business_dev_access': WalletProfile.objects.filter(want_business_dev_access=True).count(),
-            'want_ceo_access': WalletProfile.objects.filter(want_ceo_access=True).count(),
-        }
-        
-        return Response({
-            'total_profiles': total_profiles,
-            'rank_distribution': rank_stats,
-            'totals': totals,
-            'feature_counts': feature_counts,
-        })
+        """
+        Get wallet profile statistics. Unfiltered requests read the snapshot
+        taken after the last import; with any list filter or search the
+        stats of the matching profiles are computed in one scan, with a
+        null ``snapshot_at``.
+        """
+        filter_params = set(WalletProfileFilter.base_filters) | {SearchFilter.search_param}
+        if filter_params.isdisjoint(request.query_params):
+            stats = StatsSnapshot.get(Dataset.WALLET_PROFILES).as_response()
+        else:
+            profiles = self.filter_queryset(self.get_queryset())
+            stats = {
+                **WalletProfile.compute_stats(profiles),
+                'snapshot_at': None,
+                'dataset_version': DatasetVersion.current(Dataset.WALLET_PROFILES),
+            }
+        return Response(WalletProfileStatsSerializer(stats).data)
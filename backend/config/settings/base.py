@@ -26,6 +26,7 @@ DJANGO_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 
 THIRD_PARTY_APPS = [
@@ -167,6 +168,13 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+CELERY_BEAT_SCHEDULE = {
+    # Stats endpoints read snapshots; imports refresh them, this catches the rest
+    'refresh-stats-snapshots': {
+        'task': 'apps.core.tasks.refresh_stats_snapshots',
+        'schedule': config('STATS_SNAPSHOT_INTERVAL', default=3600, cast=int),
+    },
+}
 
 # Caching
 CACHES = {
@@ -176,6 +184,32 @@ CACHES = {
     }
 }
 
+# Lifetime of cached API responses (seconds). Imports publish a new dataset
+# version, which replaces them sooner; 0 disables the response cache.
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Per-process LRU in front of Redis for the hottest responses, bounded by
+# pickled size (bytes, per worker) and lifetime (seconds); 0 disables it
+LOCAL_RESPONSE_CACHE_BYTES = config('LOCAL_RESPONSE_CACHE_BYTES', default=32 * 1024 * 1024, cast=int)
+LOCAL_RESPONSE_CACHE_TIMEOUT = config('LOCAL_RESPONSE_CACHE_TIMEOUT', default=60, cast=int)
+
+# Concurrent misses on one response: seconds the others wait for the worker
+# computing it before computing it themselves, and the lifetime of its lock
+RESPONSE_COALESCE_WAIT = config('RESPONSE_COALESCE_WAIT', default=10, cast=float)
+RESPONSE_COALESCE_LOCK_TIMEOUT = config('RESPONSE_COALESCE_LOCK_TIMEOUT', default=60, cast=int)
+
+# Post-import pipeline: responses pre-rendered into the cache, requested with
+# the public origin of the API so their pagination links match live requests
+CACHE_WARM_URL = config('CACHE_WARM_URL', default='http://localhost')
+CACHE_WARM_TOP_ROOTS = config('CACHE_WARM_TOP_ROOTS', default=20, cast=int)
+# Tree depths the frontend requests: the focused user view and node expansion
+CACHE_WARM_TREE_DEPTHS = config(
+    'CACHE_WARM_TREE_DEPTHS', default='3,5', cast=lambda v: [int(s) for s in v.split(',') if s.strip()]
+)
+
+# Longest an import may hold its platform's import lock (seconds)
+IMPORT_LOCK_TIMEOUT = config('IMPORT_LOCK_TIMEOUT', default=6 * 3600, cast=int)
+
 # Logging
 LOGGING = {
     'version': 1,
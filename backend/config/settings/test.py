@@ -0,0 +1,18 @@
+"""
+Test settings.
+"""
+from .base import *  # noqa: F401, F403
+
+# No Redis needed: the shared cache is per process
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Admin pages render without collectstatic
+STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+CELERY_TASK_ALWAYS_EAGER = True
@@ -0,0 +1,14 @@
+import pytest
+from django.core.cache import cache
+
+from apps.core.cache import local_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test without cached versions, snapshots or responses."""
+    cache.clear()
+    local_cache.clear()
+    yield
+    cache.clear()
+    local_cache.clear()
@@ -7,12 +7,14 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.local')
 django.setup()
 
-import csv
 from decimal import Decimal, InvalidOperation
 from datetime import datetime
 from django.utils import timezone
 from django.db import connection
 from apps.limitless.models import LimitlessUser, LimitlessPurchase, LimitlessEarning
+from apps.core.importing import IdMap, iter_csv
+from apps.core.models import Dataset, DatasetVersion
+from apps.core.tasks import post_import_pipeline
 
 def parse_datetime(value):
     if not value or value.strip() == '':
@@ -48,10 +50,6 @@ def parse_int(value, default=None):
     except ValueError:
         return default
 
-def read_csv(filepath):
-    with open(filepath, 'r', encoding='utf-8-sig') as f:
-        return list(csv.DictReader(f))
-
 print("Clearing existing Limitless data...")
 with connection.cursor() as cursor:
     cursor.execute("DELETE FROM limitless_limitlessearning")
@@ -61,22 +59,15 @@ print("Done clearing.")
 
 # Import users
 print("Importing users...")
-users_data = read_csv('./limitless_new_data/jggl_users_202512131646.csv')
-print(f"Found {len(users_data)} users")
-
-user_map = {}
-parent_map = {}
+users_file = './limitless_new_data/jggl_users_202512131646.csv'
 
+users_count = 0
 with connection.cursor() as cursor:
-    for idx, row in enumerate(users_data):
+    for idx, row in enumerate(iter_csv(users_file)):
         original_id = parse_int(row.get('id'))
         if not original_id:
             continue
         
-        parent_id = parse_int(row.get('parent_id'))
-        if parent_id:
-            parent_map[original_id] = parent_id
-        
         email = row.get('email', '').strip() or None
         date_joined = parse_datetime(row.get('date_joined'))
         parent_changed_at = parse_datetime(row.get('parent_changed_at'))
@@ -88,7 +79,6 @@ with connection.cursor() as cursor:
              date_joined, parent_changed_at, original_lft, original_rght, original_tree_id, original_level,
              lft, rght, tree_id, level, parent_id)
             VALUES (NOW(), NOW(), %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NULL)
-            RETURNING id
         """, [
             original_id,
             row.get('username', '').strip(),
@@ -114,42 +104,41 @@ with connection.cursor() as cursor:
             idx + 1,      # tree_id
             0,            # level
         ])
-        db_id = cursor.fetchone()[0]
-        user_map[original_id] = db_id
+        users_count += 1
         
         if (idx + 1) % 500 == 0:
             print(f"  Imported {idx + 1} users...")
 
-print(f"Created {len(user_map)} users")
+print(f"Created {users_count} users")
+user_ids = IdMap.from_queryset(LimitlessUser.objects.all())
 
-# Set parent relationships
+# Set parent relationships from a second pass over the users file
 print("Setting parent relationships...")
 with connection.cursor() as cursor:
-    for original_id, parent_original_id in parent_map.items():
-        if original_id in user_map and parent_original_id in user_map:
+    for row in iter_csv(users_file):
+        user_id = user_ids.get(parse_int(row.get('id')))
+        parent_id = user_ids.get(parse_int(row.get('parent_id')))
+        if user_id and parent_id:
             cursor.execute(
                 "UPDATE limitless_limitlessuser SET parent_id = %s WHERE id = %s",
-                [user_map[parent_original_id], user_map[original_id]]
+                [parent_id, user_id]
             )
 
 print("Rebuilding MPTT tree...")
-LimitlessUser.objects.rebuild()
+LimitlessUser.objects.bulk_rebuild()
 print("Done with users.")
 
 # Import purchases
 print("Importing purchases...")
-purchases_data = read_csv('./limitless_new_data/jggl_purchases_202512131646.csv')
-print(f"Found {len(purchases_data)} purchases")
-
-purchase_map = {}
+purchases_count = 0
 with connection.cursor() as cursor:
-    for idx, row in enumerate(purchases_data):
+    for row in iter_csv('./limitless_new_data/jggl_purchases_202512131646.csv'):
         original_id = parse_int(row.get('id'))
         if not original_id:
             continue
         
         buyer_original_id = parse_int(row.get('buyer_id'))
-        buyer_db_id = user_map.get(buyer_original_id)
+        buyer_db_id = user_ids.get(buyer_original_id)
         created_at = parse_datetime(row.get('created_at')) or timezone.now()
         
         metadata = row.get('metadata', '{}').strip()
@@ -169,7 +158,6 @@ with connection.cursor() as cursor:
             (created_at, updated_at, original_id, buyer_id, buyer_original_id, amount_usdt, 
              tx_hash, block_number, contract_address, metadata, payment_status, referral_system_status, pack_id)
             VALUES (%s, NOW(), %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
         """, [
             created_at,
             original_id,
@@ -184,19 +172,16 @@ with connection.cursor() as cursor:
             parse_int(row.get('referral_system_status')),
             parse_int(row.get('pack_id')),
         ])
-        db_id = cursor.fetchone()[0]
-        purchase_map[original_id] = db_id
+        purchases_count += 1
 
-print(f"Created {len(purchase_map)} purchases")
+print(f"Created {purchases_count} purchases")
+purchase_ids = IdMap.from_queryset(LimitlessPurchase.objects.all())
 
 # Import earnings
 print("Importing earnings...")
-earnings_data = read_csv('./limitless_new_data/jggl_ref_earnings_202512131646.csv')
-print(f"Found {len(earnings_data)} earnings")
-
 earnings_count = 0
 with connection.cursor() as cursor:
-    for idx, row in enumerate(earnings_data):
+    for idx, row in enumerate(iter_csv('./limitless_new_data/jggl_ref_earnings_202512131646.csv')):
         original_id = parse_int(row.get('id'))
         if not original_id:
             continue
@@ -215,11 +200,11 @@ with connection.cursor() as cursor:
         """, [
             created_at,
             original_id,
-            user_map.get(recipient_original_id),
+            user_ids.get(recipient_original_id),
             recipient_original_id,
-            user_map.get(buyer_original_id),
+            user_ids.get(buyer_original_id),
             buyer_original_id,
-            purchase_map.get(purchase_original_id),
+            purchase_ids.get(purchase_original_id),
             purchase_original_id,
             row.get('earning_type', 'NETWORK').strip(),
             parse_int(row.get('level')),
@@ -240,6 +225,15 @@ with connection.cursor() as cursor:
 
 print(f"Created {earnings_count} earnings")
 
+print("Refreshing counters and team tables...")
+LimitlessUser.objects.refresh_aggregates()
+
+version = DatasetVersion.publish(Dataset.LIMITLESS)
+print(f"Published dataset version {version}")
+if '--no-warm' not in sys.argv:
+    task_id = post_import_pipeline.delay(Dataset.LIMITLESS, rebuild=False).id
+    print(f"Queued the post-import pipeline ({task_id})")
+
 print("\n=== Import completed! ===")
 print(f"Users: {LimitlessUser.objects.count()}")
 print(f"Purchases: {LimitlessPurchase.objects.count()}")
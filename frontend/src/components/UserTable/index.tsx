@@ -1,4 +1,4 @@
-import { useState } from 'react'
+import { useEffect, useState } from 'react'
 import { useQuery } from '@tanstack/react-query'
 import {
   Table,
@@ -14,7 +14,7 @@ import { Input } from '@/components/ui/input'
 import { BlockLoader } from '@/components/BlockLoader'
 import { ChevronLeft, ChevronRight, Search, UserCheck, ArrowUpDown, ArrowUp, ArrowDown } from 'lucide-react'
 import { limitlessApi, boostyfiApi } from '@/lib/api'
-import { shortWallet, formatCurrency, formatNumber } from '@/lib/utils'
+import { shortWallet, formatCurrency, formatNumber, cursorFrom } from '@/lib/utils'
 import type { LimitlessUser, BoostyFiUser, PaginatedResponse } from '@/types'
 
 type SortField = 'username' | 'wallet' | 'purchases_count' | 'direct_volume' | 'total_earnings' | 'children_count' | 'total_atla'
@@ -26,7 +26,9 @@ interface UserTableProps {
 }
 
 export function UserTable({ variant, onUserClick }: UserTableProps) {
+  const [cursor, setCursor] = useState<string | undefined>()
   const [page, setPage] = useState(1)
+  const [totalCount, setTotalCount] = useState(0)
   const [search, setSearch] = useState('')
   const [searchInput, setSearchInput] = useState('')
   const [sortField, setSortField] = useState<SortField>('username')
@@ -36,23 +38,38 @@ export function UserTable({ variant, onUserClick }: UserTableProps) {
   const api = variant === 'limitless' ? limitlessApi : boostyfiApi
   
   const { data, isLoading } = useQuery<PaginatedResponse<LimitlessUser | BoostyFiUser>>({
-    queryKey: [variant, 'users', 'table', page, search, sortField, sortOrder],
+    queryKey: [variant, 'users', 'table', cursor, search, sortField, sortOrder],
     queryFn: () => api.getUsers({
-      page,
+      cursor,
       page_size: pageSize,
+      // The total only changes with the filters, so it is fetched with the first page
+      count: cursor ? undefined : true,
       search: search || undefined,
       ordering: sortOrder === 'desc' ? `-${sortField}` : sortField,
     }),
   })
   
+  useEffect(() => {
+    if (data?.count != null) setTotalCount(data.count)
+  }, [data])
+  
   const users = data?.results || []
-  const totalCount = data?.count || 0
-  const totalPages = Math.ceil(totalCount / pageSize)
+  const totalPages = Math.max(1, Math.ceil(totalCount / pageSize))
+  
+  const resetPage = () => {
+    setCursor(undefined)
+    setPage(1)
+  }
+  
+  const goTo = (link: string | null, offset: number) => {
+    setCursor(cursorFrom(link))
+    setPage(page + offset)
+  }
   
   const handleSearch = (e: React.FormEvent) => {
     e.preventDefault()
     setSearch(searchInput)
-    setPage(1)
+    resetPage()
   }
   
   const handleSort = (field: SortField) => {
@@ -62,7 +79,7 @@ export function UserTable({ variant, onUserClick }: UserTableProps) {
       setSortField(field)
       setSortOrder('asc')
     }
-    setPage(1)
+    resetPage()
   }
   
   const SortIcon = ({ field }: { field: SortField }) => {
@@ -276,13 +293,13 @@ export function UserTable({ variant, onUserClick }: UserTableProps) {
       </div>
       
       {/* Pagination */}
-      {totalPages > 1 && (
+      {(data?.next || data?.previous) && (
         <div className="flex items-center justify-center gap-4">
           <Button
             variant="outline"
             size="sm"
-            onClick={() => setPage(Math.max(1, page - 1))}
-            disabled={page === 1 || isLoading}
+            onClick={() => goTo(data?.previous ?? null, -1)}
+            disabled={!data?.previous || isLoading}
           >
             <ChevronLeft className="w-4 h-4 mr-1" />
             Previous
@@ -293,8 +310,8 @@ export function UserTable({ variant, onUserClick }: UserTableProps) {
           <Button
             variant="outline"
             size="sm"
-            onClick={() => setPage(Math.min(totalPages, page + 1))}
-            disabled={page >= totalPages || isLoading}
+            onClick={() => goTo(data?.next ?? null, 1)}
+            disabled={!data?.next || isLoading}
           >
             Next
             <ChevronRight className="w-4 h-4 ml-1" />
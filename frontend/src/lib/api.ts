@@ -8,9 +8,11 @@ import type {
   BoostyFiStats,
   PaginatedResponse,
   RootsResponse,
+  RootsSort,
   SearchResponse,
   AncestorsResponse,
   WalletProfile,
+  WalletProfileListItem,
   SellerAssignment,
   SellerInfo,
   CurrentUser,
@@ -69,8 +71,8 @@ export const limitlessApi = {
     return data
   },
 
-  getRoots: async (depth = 1, limit = 50, offset = 0): Promise<RootsResponse<LimitlessUserTree>> => {
-    const { data } = await api.get('/limitless/users/roots/', { params: { depth, limit, offset } })
+  getRoots: async (depth = 1, limit = 50, cursor?: string, sort: RootsSort = 'tree_size'): Promise<RootsResponse<LimitlessUserTree>> => {
+    const { data } = await api.get('/limitless/users/roots/', { params: { depth, limit, cursor, sort } })
     return data
   },
 
@@ -101,6 +103,13 @@ export const limitlessApi = {
       return null
     }
   },
+
+  // Wallet Profiles of many wallets in one request, keyed by address
+  getWalletProfiles: async (walletAddresses: string[]): Promise<Record<string, WalletProfileListItem>> => {
+    if (walletAddresses.length === 0) return {}
+    const { data } = await api.post('/limitless/wallet-profiles/wallets/', { addresses: walletAddresses })
+    return data.results
+  },
 }
 
 // BoostyFi API
@@ -121,8 +130,8 @@ export const boostyfiApi = {
     return data
   },
 
-  getRoots: async (depth = 1, limit = 50, offset = 0): Promise<RootsResponse<BoostyFiUserTree>> => {
-    const { data } = await api.get('/boostyfi/users/roots/', { params: { depth, limit, offset } })
+  getRoots: async (depth = 1, limit = 50, cursor?: string, sort: RootsSort = 'tree_size'): Promise<RootsResponse<BoostyFiUserTree>> => {
+    const { data } = await api.get('/boostyfi/users/roots/', { params: { depth, limit, cursor, sort } })
     return data
   },
 
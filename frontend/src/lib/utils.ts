@@ -25,3 +25,8 @@ export function shortWallet(wallet: string | null | undefined): string {
   if (wallet.length <= 13) return wallet
   return `${wallet.slice(0, 6)}...${wallet.slice(-4)}`
 }
+
+// Cursor of a next/previous link returned by the keyset-paginated API
+export function cursorFrom(link: string | null | undefined): string | undefined {
+  return link ? new URL(link).searchParams.get('cursor') ?? undefined : undefined
+}
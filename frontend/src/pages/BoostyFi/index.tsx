@@ -12,6 +12,7 @@ import { BlockLoader } from '@/components/BlockLoader'
 import { ModeToggle } from '@/components/mode-toggle'
 import { UserSearch } from '@/components/UserSearch'
 import { boostyfiApi } from '@/lib/api'
+import { cursorFrom } from '@/lib/utils'
 import type { BoostyFiUserTree, BoostyFiStats, BoostyFiUser, RootsResponse, AncestorsResponse } from '@/types'
 
 type ViewMode = 'tree' | 'table'
@@ -21,7 +22,8 @@ export function BoostyFiPage() {
   const [expandLevel, setExpandLevel] = useState(0)
   const [selectedUserId, setSelectedUserId] = useState<number | null>(null)
   const [focusedUserId, setFocusedUserId] = useState<number | null>(null)
-  const [offset, setOffset] = useState(0)
+  const [cursor, setCursor] = useState<string | undefined>()
+  const [currentPage, setCurrentPage] = useState(1)
   const limit = 50
   
   const { data: stats, isLoading: statsLoading } = useQuery<BoostyFiStats>({
@@ -31,8 +33,8 @@ export function BoostyFiPage() {
   
   // Load root users when not focused on a specific user
   const { data: rootsData, isLoading: treeLoading } = useQuery<RootsResponse<BoostyFiUserTree>>({
-    queryKey: ['boostyfi', 'roots', expandLevel, offset],
-    queryFn: () => boostyfiApi.getRoots(expandLevel, limit, offset),
+    queryKey: ['boostyfi', 'roots', expandLevel, cursor],
+    queryFn: () => boostyfiApi.getRoots(expandLevel, limit, cursor),
     enabled: focusedUserId === null,
   })
   
@@ -53,7 +55,6 @@ export function BoostyFiPage() {
   const rootUsers = rootsData?.results
   const totalRoots = rootsData?.total || 0
   const hasMore = rootsData?.has_more || false
-  const currentPage = Math.floor(offset / limit) + 1
   const totalPages = Math.ceil(totalRoots / limit)
   
   const { data: selectedUser, isLoading: userLoading } = useQuery<BoostyFiUser>({
@@ -218,8 +219,11 @@ export function BoostyFiPage() {
                 <Button
                   variant="outline"
                   size="sm"
-                  onClick={() => setOffset(Math.max(0, offset - limit))}
-                  disabled={offset === 0 || treeLoading}
+                  onClick={() => {
+                    setCursor(cursorFrom(rootsData?.previous))
+                    setCurrentPage(currentPage - 1)
+                  }}
+                  disabled={!rootsData?.previous || treeLoading}
                 >
                   <ChevronLeft className="w-4 h-4 mr-1" />
                   Previous
@@ -230,7 +234,10 @@ export function BoostyFiPage() {
                 <Button
                   variant="outline"
                   size="sm"
-                  onClick={() => setOffset(offset + limit)}
+                  onClick={() => {
+                    setCursor(cursorFrom(rootsData?.next))
+                    setCurrentPage(currentPage + 1)
+                  }}
                   disabled={!hasMore || treeLoading}
                 >
                   Next
@@ -19,6 +19,9 @@ export interface LimitlessUser {
   pending_purchases_count?: number
   direct_volume: number
   team_volume: number
+  team_earnings?: number | null
+  team_purchases?: number | null
+  max_depth?: number | null
   total_earnings: number
   pending_earnings?: number
   purchases?: LimitlessPurchase[]
@@ -81,6 +84,9 @@ export interface BoostyFiUser {
   pending_purchases_count?: number
   direct_volume: number
   team_volume: number
+  team_earnings?: number | null
+  team_purchases?: number | null
+  max_depth?: number | null
   total_earnings: number
   pending_earnings?: number
   purchases?: BoostyFiPurchase[]
@@ -142,6 +148,8 @@ export interface LimitlessStats {
   total_volume: number
   total_earnings: number
   root_users: number
+  snapshot_at: string
+  dataset_version: number
 }
 
 export interface BoostyFiStats {
@@ -151,20 +159,26 @@ export interface BoostyFiStats {
   total_earnings: number
   total_atla: number
   root_users: number
+  snapshot_at: string
+  dataset_version: number
 }
 
 export interface PaginatedResponse<T> {
-  count: number
+  // Only present when requested with count=true on keyset-paginated lists
+  count: number | null
   next: string | null
   previous: string | null
   results: T[]
 }
 
+export type RootsSort = 'tree_size' | 'team_volume'
+
 export interface RootsResponse<T> {
   results: T[]
   total: number
   limit: number
-  offset: number
+  next: string | null
+  previous: string | null
   has_more: boolean
 }
 
@@ -261,3 +275,9 @@ export interface WalletProfile {
   created_at: string
   updated_at: string
 }
+
+// Wallet Profile list payload (batch lookup)
+export type WalletProfileListItem = Pick<
+  WalletProfile,
+  'id' | 'export_id' | 'main_wallet' | 'short_wallet' | 'email' | 'rank' | 'atla_balance' | 'community_count'
+>